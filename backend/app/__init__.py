@@ -0,0 +1,6 @@
+# File: __init__.py
+
+from dotenv import load_dotenv
+
+# Read .env once, before any app module reads its config from os.environ
+load_dotenv()
@@ -2,19 +2,29 @@
 
 import os
 import re
-import requests
+import json
+import time
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
-from dotenv import load_dotenv
-from supabase import create_client, Client
+from typing import Optional, TYPE_CHECKING
+
+from app import openrouter_client
+from app.auth import get_current_user_id
+from app.chat_store import ChatHistoryCache, WriteBehindQueue, HISTORY_LIMIT, now_iso, merge_pending
+from app.log import get_logger
+from app.metrics import (
+    STAGE_SECONDS, SUPABASE_SECONDS, SUPABASE_ERRORS, LLM_ATTEMPT_FAILURES, LLM_RESPONSES, LLM_EXHAUSTED,
+)
 
-# --- 1. SETUP AND CONFIGURATION ---
-load_dotenv()
+if TYPE_CHECKING:
+    from supabase import AsyncClient
 
+# --- 1. SETUP AND CONFIGURATION ---
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-SUPABASE_URL = f"https://{os.getenv('SUPABASE_PROJECT_ID')}.supabase.co"
+# SUPABASE_URL overrides the project URL (self-hosted Supabase, local stubs)
+SUPABASE_URL = os.getenv("SUPABASE_URL", f"https://{os.getenv('SUPABASE_PROJECT_ID')}.supabase.co").rstrip("/")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 
 if not OPENROUTER_API_KEY:
@@ -23,10 +33,27 @@ if not SUPABASE_ANON_KEY:
     raise Exception("❌ ERROR: SUPABASE_ANON_KEY missing in .env file!")
 
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+
+# Async Supabase client — created on first use (or by the start-up warm-up) so
+# no call blocks the event loop; the supabase package itself (~0.3 s of
+# imports) is only loaded then
+_supabase: "AsyncClient | None" = None
+
+
+def load_supabase_package():
+    """Import the supabase stack without building a client (warm-up step a pre-fork master can run)."""
+    import supabase  # noqa: F401
+
+
+async def get_supabase() -> "AsyncClient":
+    global _supabase
+    if _supabase is None:
+        from supabase import acreate_client
+        _supabase = await acreate_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+    return _supabase
 
 router = APIRouter()
-security = HTTPBearer()
+log = get_logger(__name__)
 
 PRIMARY_MODEL = "nvidia/nemotron-nano-12b-v2-vl:free"
 FALLBACK_MODEL = "mistralai/mistral-small-3.1-24b-instruct:free"
@@ -54,31 +81,8 @@ SYSTEM_PROMPT = (
 
 
 # --- 2. AUTH HELPER ---
-
-def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
-    """Validate Supabase JWT and extract user ID by calling the Supabase Auth API."""
-    token = credentials.credentials
-    try:
-        response = requests.get(
-            f"{SUPABASE_URL}/auth/v1/user",
-            headers={
-                "Authorization": f"Bearer {token}",
-                "apikey": SUPABASE_ANON_KEY,
-            },
-            timeout=10,
-        )
-        if response.status_code != 200:
-            raise HTTPException(status_code=401, detail="Invalid or expired token.")
-        user_data = response.json()
-        user_id = user_data.get("id")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Could not extract user ID from token.")
-        return user_id
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"❌ Auth error: {e}")
-        raise HTTPException(status_code=401, detail="Authentication failed.")
+# Supabase JWTs are verified locally by the shared dependency in app.auth
+# (get_current_user_id is imported above).
 
 
 # --- 3. PYDANTIC MODELS ---
@@ -121,81 +125,258 @@ def strip_markdown(text: str) -> str:
     return text.strip()
 
 
+class MarkdownStreamStripper:
+    """
+    Applies strip_markdown incrementally to a token stream. The raw text is
+    released up to its last whitespace run, minus anything that could still
+    turn into markdown: an unfinished line from its first * or _ on (a later
+    marker on the same line can re-pair every emphasis before it), an
+    unclosed `, a trailing #, or a line that is so far only a list marker.
+    The released prefix is re-stripped as a whole and only the part
+    extending what was already sent is emitted.
+
+    feed() / flush() return the SSE payload to send, or None:
+      {"token": text}    append to what the client has
+      {"replace": text}  the stripped text so far, replacing what the client
+                         has — only if re-stripping rewrote something already
+                         sent, which the hold-back rules above are there to avoid
+    """
+
+    def __init__(self):
+        self.raw = ""
+        self.released = 0
+        self.emitted = ""
+
+    def _safe_cut(self) -> int:
+        ws = re.search(r'\s+\S*$', self.raw)
+        if ws is None:
+            return 0
+        cut = ws.start()
+        head = self.raw[:cut]
+
+        if head.count("`") % 2:
+            cut = min(cut, head.index("`"))
+        line_start = head.rfind("\n") + 1
+        line = head[line_start:]
+        hashes = re.search(r'#+$', head)
+        if hashes:
+            cut = min(cut, hashes.start())
+        if re.fullmatch(r'[\s#\d.\-•*]*', line):
+            # List regexes also swallow blank (or marker-only) lines before the
+            # marker — hold those back, but not the end of the line above
+            # (a closing * there belongs to that line's emphasis)
+            tail = re.search(r'(?:^|\n)[\s#\d.\-•*]*$', head)
+            cut = min(cut, tail.start())
+
+        # Emphasis never spans lines: release a line's * / _ only once the
+        # line has ended, counted from wherever the rules above left the cut
+        if not re.match(r'[ \t]*\n', self.raw[cut:]):
+            line_start = self.raw.rfind("\n", 0, cut) + 1
+            emphasis = re.search(r'[*_]', self.raw[line_start:cut])
+            if emphasis:
+                cut = line_start + emphasis.start()
+        return cut
+
+    def _advance(self, stripped: str) -> Optional[dict]:
+        if stripped == self.emitted:
+            return None
+        if not stripped.startswith(self.emitted):
+            self.emitted = stripped
+            return {"replace": stripped}
+        new = stripped[len(self.emitted):]
+        self.emitted = stripped
+        return {"token": new}
+
+    def feed(self, delta: str) -> Optional[dict]:
+        self.raw += delta
+        cut = self._safe_cut()
+        if cut <= self.released:
+            return None
+        self.released = cut
+        return self._advance(strip_markdown(self.raw[:cut]))
+
+    def flush(self) -> Optional[dict]:
+        """Emit the rest, once the model's stream has ended."""
+        return self._advance(self.final())
+
+    def final(self) -> str:
+        return strip_markdown(self.raw)
+
+
 # --- 5. SUPABASE HELPERS ---
+# Reads go through a per-user in-memory cache (warmed on first access) and
+# writes go through a write-behind queue that batches chat_history inserts,
+# so a chat turn doesn't wait on the database.
 
-def fetch_chat_history(user_id: str) -> list[dict]:
-    """Fetch last 20 messages for this user, returned in chronological order."""
+async def insert_chat_rows(rows: list[dict]):
+    """One multi-row insert into chat_history (used by the write-behind queue)."""
+    supabase = await get_supabase()
     try:
-        result = (
-            supabase.table("chat_history")
-            .select("role, content, created_at")
-            .eq("user_id", user_id)
-            .order("created_at", desc=True)
-            .limit(20)
-            .execute()
-        )
-        # Reverse: DB returns newest-first, we want oldest-first for LLM context
-        return list(reversed(result.data or []))
-    except Exception as e:
-        print(f"⚠️ Failed to fetch chat history: {e}")
-        return []
+        with SUPABASE_SECONDS.time("chat_history", "insert"):
+            await supabase.table("chat_history").insert(rows).execute()
+    except Exception:
+        SUPABASE_ERRORS.inc("chat_history", "insert")
+        raise
+
 
+history_cache = ChatHistoryCache()
+chat_writer = WriteBehindQueue(insert_chat_rows)
+
+
+async def fetch_chat_history(user_id: str) -> list[dict]:
+    """Fetch last 20 messages for this user, returned in chronological order."""
+    cached = history_cache.get_history(user_id)
+    if cached is not None:
+        return cached
 
-def save_message(user_id: str, role: str, content: str):
-    """Persist a single message to Supabase chat_history."""
     try:
-        supabase.table("chat_history").insert({
-            "user_id": user_id,
-            "role": role,
-            "content": content,
-        }).execute()
+        supabase = await get_supabase()
+        with SUPABASE_SECONDS.time("chat_history", "select"):
+            result = await (
+                supabase.table("chat_history")
+                .select("role, content, created_at")
+                .eq("user_id", user_id)
+                .order("created_at", desc=True)
+                .limit(HISTORY_LIMIT)
+                .execute()
+            )
     except Exception as e:
-        print(f"⚠️ Failed to save message (role={role}): {e}")
+        SUPABASE_ERRORS.inc("chat_history", "select")
+        log.warning("chat_history_fetch_failed", error=str(e))
+        return []
+
+    # Reverse: DB returns newest-first, we want oldest-first for LLM context
+    messages = list(reversed(result.data or []))
+    # Rows still waiting in the write-behind queue aren't in the DB yet
+    messages = merge_pending(messages, chat_writer.pending_for(user_id))
+    history_cache.set_history(user_id, messages)
+    return messages[-HISTORY_LIMIT:]
+
+
+async def save_message(user_id: str, role: str, content: str):
+    """Queue a message for chat_history and add it to the user's cached history."""
+    row = {
+        "user_id": user_id,
+        "role": role,
+        "content": content,
+        "created_at": now_iso(),
+    }
+    chat_writer.enqueue(row)
+    history_cache.append(user_id, {"role": role, "content": content, "created_at": row["created_at"]})
 
 
-def fetch_user_profile(user_id: str) -> dict:
+async def fetch_user_profile(user_id: str) -> dict:
     """Fetch user profile from Supabase profiles table."""
+    cached = history_cache.get_profile(user_id)
+    if cached is not None:
+        return cached
+
     try:
-        result = (
-            supabase.table("profiles")
-            .select("full_name, email")
-            .eq("id", user_id)
-            .single()
-            .execute()
-        )
-        return result.data or {}
+        supabase = await get_supabase()
+        with SUPABASE_SECONDS.time("profiles", "select"):
+            result = await (
+                supabase.table("profiles")
+                .select("full_name, email")
+                .eq("id", user_id)
+                .single()
+                .execute()
+            )
     except Exception as e:
-        print(f"⚠️ Failed to fetch profile: {e}")
+        SUPABASE_ERRORS.inc("profiles", "select")
+        log.warning("profile_fetch_failed", error=str(e))
         return {}
 
+    profile = result.data or {}
+    history_cache.set_profile(user_id, profile)
+    return profile
+
 
 # --- 6. OPENROUTER CALL WITH MODEL FALLBACK ---
 
-def call_openrouter(messages_payload: list[dict]) -> str:
+async def call_openrouter(messages_payload: list[dict]) -> str:
     """Call OpenRouter with primary model, automatically falling back on failure."""
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-    }
-
     for model in [PRIMARY_MODEL, FALLBACK_MODEL]:
         try:
-            print(f"🤖 Trying model: {model}")
-            resp = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=headers,
-                json={"model": model, "messages": messages_payload},
-                timeout=40,
-            )
+            log.debug_sampled("chat_attempt", model=model)
+            resp = await openrouter_client.chat_completion(model, messages_payload, timeout=40)
             resp.raise_for_status()
-            raw_text = resp.json()["choices"][0]["message"]["content"]
+            raw_text = openrouter_client.completion_text(resp)
             clean_text = strip_markdown(raw_text)
-            print(f"✅ Response from {model}: {clean_text[:80]}...")
+            log.debug("chat_response", model=model, response=clean_text)
+            LLM_RESPONSES.inc("chat", model)
             return clean_text
         except Exception as e:
-            print(f"⚠️ Model {model} failed: {e}")
+            log.warning("chat_model_failed", model=model, error=str(e))
+            LLM_ATTEMPT_FAILURES.inc("chat", model)
             continue
 
+    LLM_EXHAUSTED.inc("chat")
+    raise HTTPException(
+        status_code=503,
+        detail="All AI models are currently unavailable. Please try again later.",
+    )
+
+
+async def build_llm_messages(user_id: str, user_message: str, report_context: Optional[str]) -> list[dict]:
+    """System prompt (profile + report context) + recent history + the new user turn."""
+    # Profile and conversation history are independent — fetch them concurrently
+    profile, history = await asyncio.gather(
+        fetch_user_profile(user_id),
+        fetch_chat_history(user_id),
+    )
+
+    # Build system prompt — inject report data if provided
+    system_content = SYSTEM_PROMPT
+    # Inject user profile
+    full_name = profile.get("full_name", "").strip()
+    if full_name:
+        system_content += (
+            f"\n\nThe user's name is {full_name}. "
+            "Address them by their first name naturally throughout the conversation. "
+            "Never ask for their name — you already know it."
+        )
+        
+    if report_context:
+        system_content += (
+            "\n\nThe user has recently uploaded and analysed a health report. "
+            "Here is the extracted OCR data and ML risk analysis:\n"
+            + report_context
+            + "\n\nThis data is available as background context only. "
+            "Do not mention or reference this report data unless the user brings up a symptom, "
+            "asks about their report, or asks a health question that directly relates to it. "
+            "Never volunteer this information unprompted."
+        )
+
+    # Assemble the full messages array for the LLM
+    messages_for_llm: list[dict] = [{"role": "system", "content": system_content}]
+    for msg in history:
+        if msg["role"] in ("user", "assistant"):
+            messages_for_llm.append({"role": msg["role"], "content": msg["content"]})
+    messages_for_llm.append({"role": "user", "content": user_message})
+    return messages_for_llm
+
+
+async def stream_openrouter(messages_payload: list[dict]):
+    """Streaming call_openrouter — falls back to the next model only before the first token."""
+    for model in [PRIMARY_MODEL, FALLBACK_MODEL]:
+        started = False
+        try:
+            log.debug_sampled("chat_stream_attempt", model=model)
+            async for delta in openrouter_client.stream_chat_completion(model, messages_payload, timeout=40):
+                if not started:
+                    started = True
+                    LLM_RESPONSES.inc("chat_stream", model)
+                yield delta
+            if started:
+                return
+        except Exception as e:
+            if started:
+                raise
+            log.warning("chat_model_failed", model=model, error=str(e), stream=True)
+            LLM_ATTEMPT_FAILURES.inc("chat_stream", model)
+            continue
+
+    LLM_EXHAUSTED.inc("chat_stream")
     raise HTTPException(
         status_code=503,
         detail="All AI models are currently unavailable. Please try again later.",
@@ -210,7 +391,7 @@ async def get_chat_history(user_id: str = Depends(get_current_user_id)):
     Returns the last 20 chat messages for the authenticated user.
     Frontend calls this on mount to pre-populate the chat UI.
     """
-    messages = fetch_chat_history(user_id)
+    messages = await fetch_chat_history(user_id)
     return HistoryOut(
         messages=[
             HistoryMessage(
@@ -243,46 +424,79 @@ async def handle_chat_message(
     if not user_message:
         raise HTTPException(status_code=400, detail="Message cannot be empty.")
 
-    print(f"💬 User [{user_id[:8]}...]: {user_message[:80]}")
+    log.info("chat_message", user=user_id[:8], chars=len(user_message))
+    log.debug("chat_message_text", message=user_message)
 
-    # Build system prompt — inject report data if provided
-    system_content = SYSTEM_PROMPT
-    # Inject user profile
-    profile = fetch_user_profile(user_id)
-    full_name = profile.get("full_name", "").strip()
-    if full_name:
-        system_content += (
-            f"\n\nThe user's name is {full_name}. "
-            "Address them by their first name naturally throughout the conversation. "
-            "Never ask for their name — you already know it."
-        )
-        
-    if report_context:
-        system_content += (
-            "\n\nThe user has recently uploaded and analysed a health report. "
-            "Here is the extracted OCR data and ML risk analysis:\n"
-            + report_context
-            + "\n\nThis data is available as background context only. "
-            "Do not mention or reference this report data unless the user brings up a symptom, "
-            "asks about their report, or asks a health question that directly relates to it. "
-            "Never volunteer this information unprompted."
-        )
-
-    # Fetch existing conversation history for context window
-    history = fetch_chat_history(user_id)
-
-    # Assemble the full messages array for the LLM
-    messages_for_llm: list[dict] = [{"role": "system", "content": system_content}]
-    for msg in history:
-        if msg["role"] in ("user", "assistant"):
-            messages_for_llm.append({"role": msg["role"], "content": msg["content"]})
-    messages_for_llm.append({"role": "user", "content": user_message})
+    with STAGE_SECONDS.time("chat_context"):
+        messages_for_llm = await build_llm_messages(user_id, user_message, report_context)
 
     # Call AI with fallback — response is already markdown-stripped
-    ai_response = call_openrouter(messages_for_llm)
+    with STAGE_SECONDS.time("chat_llm"):
+        ai_response = await call_openrouter(messages_for_llm)
 
     # Persist both turns to Supabase
-    save_message(user_id, "user", user_message)
-    save_message(user_id, "assistant", ai_response)
+    with STAGE_SECONDS.time("chat_persist"):
+        await save_message(user_id, "user", user_message)
+        await save_message(user_id, "assistant", ai_response)
+
+    return ChatOut(response=ai_response)
+
 
-    return ChatOut(response=ai_response)
\ No newline at end of file
+def _sse(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@router.post("/chat/stream")
+async def stream_chat_message(
+    payload: ChatIn,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Streaming variant of /chat — forwards markdown-stripped tokens as
+    Server-Sent Events ("data: {"token": ...}", or rarely "data: {"replace":
+    ...}" with the whole text so far), then a final "done" event whose
+    "response" is the authoritative full text. Both turns are persisted
+    once the stream ends.
+    """
+    user_message = payload.message.strip()
+    if not user_message:
+        raise HTTPException(status_code=400, detail="Message cannot be empty.")
+
+    log.info("chat_message", user=user_id[:8], chars=len(user_message), stream=True)
+    log.debug("chat_message_text", message=user_message)
+    with STAGE_SECONDS.time("chat_context"):
+        messages_for_llm = await build_llm_messages(user_id, user_message, payload.report_context)
+
+    async def event_stream():
+        stripper = MarkdownStreamStripper()
+        started, first_token = time.perf_counter(), True
+        try:
+            async for delta in stream_openrouter(messages_for_llm):
+                if first_token:
+                    STAGE_SECONDS.observe(time.perf_counter() - started, "chat_first_token")
+                    first_token = False
+                out = stripper.feed(delta)
+                if out:
+                    yield _sse(out)
+            tail = stripper.flush()
+            if tail:
+                yield _sse(tail)
+        except HTTPException as e:
+            yield _sse({"detail": e.detail}, event="error")
+            return
+        except Exception as e:
+            log.warning("chat_stream_failed", error=str(e))
+            yield _sse({"detail": "The AI response was interrupted. Please try again."}, event="error")
+            return
+
+        ai_response = stripper.final()
+        await save_message(user_id, "user", user_message)
+        await save_message(user_id, "assistant", ai_response)
+        yield _sse({"response": ai_response}, event="done")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
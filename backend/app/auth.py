@@ -0,0 +1,184 @@
+# File: auth.py
+
+import os
+import time
+import asyncio
+import httpx
+from collections import OrderedDict
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+from app.log import get_logger
+
+# --- 1. SETUP AND CONFIGURATION ---
+SUPABASE_URL          = os.getenv("SUPABASE_URL", f"https://{os.getenv('SUPABASE_PROJECT_ID')}.supabase.co").rstrip("/")
+SUPABASE_ANON_KEY     = os.getenv("SUPABASE_ANON_KEY")
+SUPABASE_JWT_SECRET   = os.getenv("SUPABASE_JWT_SECRET")            # legacy HS256 projects
+SUPABASE_JWT_ISSUER   = os.getenv("SUPABASE_JWT_ISSUER")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+SUPABASE_JWKS_URL     = os.getenv("SUPABASE_JWKS_URL", f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json")
+
+JWKS_TTL          = float(os.getenv("JWKS_TTL", "600"))             # periodic re-fetch to pick up rotation
+JWKS_MIN_REFRESH  = float(os.getenv("JWKS_MIN_REFRESH", "30"))      # unknown-kid re-fetches at most this often
+TOKEN_CACHE_SIZE  = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+JWT_LEEWAY        = int(os.getenv("JWT_LEEWAY", "30"))
+
+ALLOWED_ALGORITHMS = {"HS256", "RS256", "ES256"}
+
+security = HTTPBearer()
+log = get_logger(__name__)
+
+
+# --- 2. SIGNING KEYS (JWKS, cached with rotation) ---
+
+class JWKSCache:
+    """Supabase signing keys by kid. Re-fetched every JWKS_TTL or when an unknown kid shows up."""
+
+    def __init__(self, url: str = SUPABASE_JWKS_URL):
+        self.url = url
+        self.keys: dict[str, dict] = {}
+        self.fetched_at = 0.0
+        self.available = True
+        self._lock = asyncio.Lock()
+
+    async def _refresh(self):
+        async with httpx.AsyncClient(timeout=10) as client:
+            response = await client.get(self.url)
+        response.raise_for_status()
+        self.keys = {k["kid"]: k for k in response.json().get("keys", []) if "kid" in k}
+        self.fetched_at = time.monotonic()
+        self.available = True
+        log.info("jwks_loaded", keys=len(self.keys))
+
+    async def get_key(self, kid: str) -> dict | None:
+        age = time.monotonic() - self.fetched_at
+        if age > JWKS_TTL or (kid not in self.keys and age > JWKS_MIN_REFRESH):
+            async with self._lock:
+                # Another request may have refreshed while we waited
+                age = time.monotonic() - self.fetched_at
+                if age > JWKS_TTL or (kid not in self.keys and age > JWKS_MIN_REFRESH):
+                    try:
+                        await self._refresh()
+                    except Exception as e:
+                        log.warning("jwks_fetch_failed", error=str(e))
+                        self.fetched_at = time.monotonic()
+                        self.available = bool(self.keys)
+        return self.keys.get(kid)
+
+
+jwks = JWKSCache()
+
+
+# --- 3. VERIFIED-TOKEN CACHE ---
+# token → (user_id, exp). A hit costs one dict lookup until the token expires.
+_verified: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+
+def _cache_get(token: str) -> str | None:
+    entry = _verified.get(token)
+    if entry is None:
+        return None
+    user_id, exp = entry
+    if exp <= time.time():
+        del _verified[token]
+        return None
+    _verified.move_to_end(token)
+    return user_id
+
+
+def _cache_put(token: str, user_id: str, exp: float):
+    _verified[token] = (user_id, exp)
+    _verified.move_to_end(token)
+    while len(_verified) > TOKEN_CACHE_SIZE:
+        _verified.popitem(last=False)
+
+
+# --- 4. VERIFICATION ---
+
+async def _verify_remote(token: str) -> str:
+    """Fallback when no signing key is available: ask Supabase Auth."""
+    async with httpx.AsyncClient(timeout=10) as client:
+        response = await client.get(
+            f"{SUPABASE_URL}/auth/v1/user",
+            headers={"Authorization": f"Bearer {token}", "apikey": SUPABASE_ANON_KEY or ""},
+        )
+    if response.status_code != 200:
+        raise HTTPException(status_code=401, detail="Invalid or expired token.")
+    user_id = response.json().get("id")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Could not extract user ID from token.")
+    return user_id
+
+
+async def verify_token(token: str) -> str:
+    """Verify a Supabase access token locally and return its user ID (sub)."""
+    user_id = _cache_get(token)
+    if user_id is not None:
+        return user_id
+
+    # python-jose pulls in cryptography (~75 ms of imports); the warm-up loads
+    # it at startup, and cache hits above never need it
+    from jose import jwt, JWTError
+
+    try:
+        header = jwt.get_unverified_header(token)
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid or expired token.")
+
+    alg = header.get("alg")
+    if alg not in ALLOWED_ALGORITHMS:
+        raise HTTPException(status_code=401, detail="Invalid or expired token.")
+
+    if alg == "HS256":
+        key = SUPABASE_JWT_SECRET
+    else:
+        key = await jwks.get_key(header.get("kid"))
+        if key is None and jwks.available:
+            raise HTTPException(status_code=401, detail="Invalid or expired token.")
+
+    if not key:
+        user_id = await _verify_remote(token)
+        # Don't trust the unverified exp for long — re-check remotely after a minute
+        expires = time.time() + 60
+        try:
+            expires = min(float(jwt.get_unverified_claims(token).get("exp", 0)), expires)
+        except (JWTError, TypeError, ValueError):
+            pass    # opaque token Supabase accepted: the one-minute bound alone
+        _cache_put(token, user_id, expires)
+        return user_id
+
+    try:
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=[alg],
+            audience=SUPABASE_JWT_AUDIENCE,
+            issuer=SUPABASE_JWT_ISSUER,
+            options={
+                "leeway":      JWT_LEEWAY,
+                "verify_iss":  bool(SUPABASE_JWT_ISSUER),
+                # python-jose accepts tokens without these; Supabase Auth doesn't
+                "require_exp": True,
+                "require_sub": True,
+            },
+        )
+    except JWTError as e:
+        log.info("auth_rejected", error=str(e))
+        raise HTTPException(status_code=401, detail="Invalid or expired token.")
+
+    user_id = claims.get("sub")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Could not extract user ID from token.")
+
+    _cache_put(token, user_id, float(claims.get("exp", 0)))
+    return user_id
+
+
+def load_jwt_backend():
+    """Import python-jose ahead of the first token check (start-up warm-up step)."""
+    from jose import jwt  # noqa: F401
+
+
+async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
+    """Shared FastAPI dependency: validate the Supabase JWT and return the user ID."""
+    return await verify_token(credentials.credentials)
@@ -0,0 +1,232 @@
+# File: chat_store.py
+
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+
+from app.log import get_logger
+
+log = get_logger(__name__)
+
+# --- 1. CONFIGURATION ---
+HISTORY_LIMIT        = 20                                             # messages kept per user (matches the DB query)
+CHAT_CACHE_USERS     = int(os.getenv("CHAT_CACHE_USERS", "1000"))     # users kept in memory, LRU-evicted
+PROFILE_TTL          = float(os.getenv("CHAT_PROFILE_TTL", "600"))    # seconds before a profile is re-read
+# Seconds before a cached history is re-read: turns handled by another
+# worker (or another device) show up in this worker's context within this
+HISTORY_TTL          = float(os.getenv("CHAT_HISTORY_TTL", "60"))
+FLUSH_INTERVAL       = float(os.getenv("CHAT_FLUSH_INTERVAL", "1.0"))
+FLUSH_BATCH_SIZE     = int(os.getenv("CHAT_FLUSH_BATCH_SIZE", "50"))
+FLUSH_MAX_RETRIES    = int(os.getenv("CHAT_FLUSH_MAX_RETRIES", "3"))
+
+
+def now_iso() -> str:
+    """Client-side timestamp so rows inserted in one batch keep their order."""
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _message_key(message: dict) -> tuple:
+    # The database may render created_at differently from now_iso() ("Z" vs "+00:00")
+    created_at = message.get("created_at")
+    try:
+        created_at = datetime.fromisoformat(str(created_at).replace("Z", "+00:00"))
+    except ValueError:
+        pass
+    return (created_at, message.get("role"), message.get("content"))
+
+
+def merge_pending(stored: list[dict], pending: list[dict]) -> list[dict]:
+    """
+    Appends queued rows to the history read from the database, skipping
+    any the read already returned — a batch being written while the read
+    ran can be in both.
+    """
+    seen = {_message_key(m) for m in stored}
+    merged = list(stored)
+    for row in pending:
+        message = {"role": row["role"], "content": row["content"], "created_at": row["created_at"]}
+        if _message_key(message) not in seen:
+            seen.add(_message_key(message))
+            merged.append(message)
+    return merged
+
+
+# --- 2. PER-USER RECENT HISTORY CACHE ---
+
+class ChatHistoryCache:
+    """
+    Bounded LRU of user_id → last HISTORY_LIMIT messages (+ profile).
+    Warmed from the database on first access, then updated in place after
+    every turn so the chat path doesn't read Supabase again — until
+    `history_ttl` has passed since the read, so turns this worker didn't
+    handle are picked up too.
+    """
+
+    def __init__(self, max_users: int = CHAT_CACHE_USERS, limit: int = HISTORY_LIMIT,
+                 profile_ttl: float = PROFILE_TTL, history_ttl: float = HISTORY_TTL):
+        self.max_users   = max_users
+        self.limit       = limit
+        self.profile_ttl = profile_ttl
+        self.history_ttl = history_ttl
+        self._users: OrderedDict[str, dict] = OrderedDict()
+        self.hits   = 0
+        self.misses = 0
+
+    def _entry(self, user_id: str) -> dict:
+        entry = self._users.get(user_id)
+        if entry is None:
+            entry = {"history": None, "history_at": 0.0, "profile": None, "profile_at": 0.0}
+            self._users[user_id] = entry
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        self._users.move_to_end(user_id)
+        return entry
+
+    def get_history(self, user_id: str) -> Optional[list[dict]]:
+        entry = self._users.get(user_id)
+        if (entry is None or entry["history"] is None
+                or time.monotonic() - entry["history_at"] > self.history_ttl):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._users.move_to_end(user_id)
+        return list(entry["history"])
+
+    def set_history(self, user_id: str, messages: list[dict]):
+        entry = self._entry(user_id)
+        entry["history"] = list(messages[-self.limit:])
+        entry["history_at"] = time.monotonic()
+
+    def append(self, user_id: str, message: dict):
+        """Add a message to a warmed entry; cold users are warmed on next read."""
+        entry = self._users.get(user_id)
+        if entry is None or entry["history"] is None:
+            return
+        entry["history"].append(message)
+        del entry["history"][:-self.limit]
+
+    def get_profile(self, user_id: str) -> Optional[dict]:
+        entry = self._users.get(user_id)
+        if entry is None or entry["profile"] is None:
+            return None
+        if time.monotonic() - entry["profile_at"] > self.profile_ttl:
+            return None
+        return entry["profile"]
+
+    def set_profile(self, user_id: str, profile: dict):
+        entry = self._entry(user_id)
+        entry["profile"] = profile
+        entry["profile_at"] = time.monotonic()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "users":     len(self._users),
+            "max_users": self.max_users,
+            "hits":      self.hits,
+            "misses":    self.misses,
+            "hit_rate":  round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+# --- 3. WRITE-BEHIND INSERT QUEUE ---
+
+class WriteBehindQueue:
+    """
+    Buffers rows and writes them with one multi-row insert, every
+    `interval` seconds or as soon as `batch_size` rows are waiting.
+    Failed batches are retried up to `max_retries` times; stop() drains.
+    """
+
+    def __init__(self, write_batch: Callable[[list[dict]], Awaitable[None]],
+                 interval: float = FLUSH_INTERVAL, batch_size: int = FLUSH_BATCH_SIZE,
+                 max_retries: int = FLUSH_MAX_RETRIES):
+        self.write_batch = write_batch
+        self.interval    = interval
+        self.batch_size  = batch_size
+        self.max_retries = max_retries
+
+        self._pending: list[tuple[dict, int]] = []    # (row, attempts)
+        self._in_flight: list[dict] = []
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._flush_lock: asyncio.Lock | None = None
+        self._stopping = False
+
+        self.rows_written = 0
+        self.batches      = 0
+        self.failures     = 0
+        self.dropped      = 0
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+
+    def enqueue(self, row: dict):
+        self._ensure_started()
+        self._pending.append((row, 0))
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def pending_for(self, user_id: str) -> list[dict]:
+        """Rows for this user that are queued or being written right now."""
+        rows = self._in_flight + [row for row, _ in self._pending]
+        return [r for r in rows if r.get("user_id") == user_id]
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        if not self._pending or self._flush_lock is None:
+            return
+        async with self._flush_lock:
+            while self._pending:
+                batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+                self._in_flight = [row for row, _ in batch]
+                try:
+                    await self.write_batch(self._in_flight)
+                    self.rows_written += len(batch)
+                    self.batches += 1
+                except Exception as e:
+                    self.failures += 1
+                    log.warning("write_behind_flush_failed", rows=len(batch), error=str(e))
+                    retry = [(row, n + 1) for row, n in batch if n + 1 < self.max_retries]
+                    self.dropped += len(batch) - len(retry)
+                    # Keep original order ahead of anything queued meanwhile
+                    self._pending = retry + self._pending
+                    return
+                finally:
+                    self._in_flight = []
+
+    async def stop(self):
+        """Stop the background loop (letting a running flush finish) and drain the queue."""
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        for _ in range(self.max_retries):
+            if not self._pending:
+                break
+            await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending":      len(self._pending),
+            "rows_written": self.rows_written,
+            "batches":      self.batches,
+            "failures":     self.failures,
+            "dropped":      self.dropped,
+        }
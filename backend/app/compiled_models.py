@@ -0,0 +1,128 @@
+# File: compiled_models.py
+
+import json
+import hashlib
+import numpy as np
+
+# Written by app/model_export.py next to the pickles: <disease>_compiled.npz
+COMPILED_SUFFIX = "_compiled.npz"
+FORMAT_VERSION  = 1
+
+
+def source_fingerprint(paths: list[str]) -> str:
+    """SHA-256 over the pickles a compiled model was built from (staleness check)."""
+    h = hashlib.sha256()
+    for p in paths:
+        with open(p, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def _one_hot(index: np.ndarray, n: int) -> np.ndarray:
+    m = np.zeros((len(index), n))
+    m[np.arange(len(index)), index] = 1.0
+    return m
+
+
+# ── NumPy-only runtime for exported calibrated models ────────────────────────
+class CompiledModel:
+    """
+    Evaluates an exported StandardScaler + CalibratedClassifierCV(sigmoid)
+    pair with plain NumPy — no scikit-learn import, no per-call validation.
+
+    Every kind stores one base estimator per CV fold plus that fold's sigmoid
+    calibration (a, b); the result is the mean calibrated probability, as in
+    CalibratedClassifierCV.predict_proba.
+
+      linear  — LogisticRegression with the scaler folded into coef/intercept
+      svc_rbf — SVC with the scaler folded into the support vectors
+      forest  — RandomForest trees flattened into depth-first node arrays
+                (scaler kept, since sklearn compares float32-cast scaled inputs)
+    """
+
+    def __init__(self, path: str):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {k: data[k] for k in data.files}
+
+        self.meta = json.loads(str(arrays.pop("meta_json")))
+        if self.meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported compiled model format {self.meta.get('format_version')}")
+        self.kind  = self.meta["kind"]
+        self.cal_a = arrays["cal_a"]
+        self.cal_b = arrays["cal_b"]
+        self.n_features = len(self.meta["features"])
+        self.nbytes = sum(a.nbytes for a in arrays.values())
+
+        if self.kind == "linear":
+            self.coef      = arrays["lr_coef"]            # (folds, features), already unscaled
+            self.intercept = arrays["lr_intercept"]       # (folds,)
+        elif self.kind == "svc_rbf":
+            self.sv        = arrays["svc_sv"]             # (total_sv, features), raw units
+            self.sv_weight = arrays["svc_weight"]         # (features,) = 1 / scale²
+            self.sv_norm   = arrays["svc_sv_norm"]        # (total_sv,) = Σ w·sv²
+            self.dual      = arrays["svc_dual"]           # (total_sv,)
+            self.gamma_sv  = arrays["svc_gamma_sv"]       # (total_sv,) gamma of each sv's fold
+            self.sv_fold   = arrays["svc_sv_fold"]        # (total_sv,) fold index
+            self.intercept = arrays["svc_intercept"]      # (folds,)
+            self.fold_matrix = _one_hot(self.sv_fold, len(self.cal_a))
+        elif self.kind == "forest":
+            self.mean      = arrays["scaler_mean"]
+            self.scale     = arrays["scaler_scale"]
+            self.feature   = arrays["tree_feature"].astype(np.intp)   # (nodes,) leaves point at feature 0
+            self.threshold = arrays["tree_threshold"]                  # (nodes,) float32, leaves are -inf
+            self.right     = arrays["tree_right"].astype(np.intp)     # (nodes,) leaves loop to themselves
+            self.value     = arrays["tree_value"]                      # (nodes,) P(class 1) at the node
+            self.roots     = arrays["tree_roots"].astype(np.intp)     # (trees,)
+            self.tree_fold = arrays["tree_fold"]          # (trees,) fold index
+            self.max_depth = int(self.meta["max_depth"])
+            # Column f averages the trees of fold f
+            self.fold_matrix = _one_hot(self.tree_fold, len(self.cal_a))
+            self.fold_matrix /= self.fold_matrix.sum(axis=0)
+        else:
+            raise ValueError(f"{path}: unknown compiled model kind '{self.kind}'")
+
+    # ── Per-fold uncalibrated scores, shape (rows, folds) ────────────────────
+    def _linear_scores(self, X: np.ndarray) -> np.ndarray:
+        return X @ self.coef.T + self.intercept
+
+    def _svc_scores(self, X: np.ndarray) -> np.ndarray:
+        # ||(x - sv) / scale||² expanded so it's one matrix product
+        d2 = (X * X) @ self.sv_weight
+        d2 = d2[:, None] - 2.0 * (X * self.sv_weight) @ self.sv.T + self.sv_norm
+        k = np.exp(-self.gamma_sv * np.maximum(d2, 0.0)) * self.dual
+        return k @ self.fold_matrix + self.intercept
+
+    def _forest_scores(self, X: np.ndarray) -> np.ndarray:
+        # Same inputs sklearn's trees see: scaled, then cast to float32
+        Xs = ((X - self.mean) / self.scale).astype(np.float32).ravel()
+        row_base = np.arange(X.shape[0]) * self.n_features
+        # (trees, rows): neighbouring cells walk the same tree, which keeps
+        # the node lookups cache-local. Every tree advances one level per
+        # step; the left child is node + 1 and leaves loop onto themselves.
+        node = np.repeat(self.roots[:, None], X.shape[0], axis=1)
+        for _ in range(self.max_depth):
+            go_left = Xs[row_base + self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, node + 1, self.right[node])
+        return self.value[node].T @ self.fold_matrix
+
+    # ── Public API (mirrors sklearn) ─────────────────────────────────────────
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=float)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"X has shape {X.shape}, expected (n, {self.n_features})")
+        if not np.isfinite(X).all():
+            raise ValueError("Input X contains NaN or infinity.")
+
+        if self.kind == "linear":
+            scores = self._linear_scores(X)
+        elif self.kind == "svc_rbf":
+            scores = self._svc_scores(X)
+        else:
+            scores = self._forest_scores(X)
+
+        # Sigmoid calibration per fold, then the fold average
+        with np.errstate(over="ignore"):
+            calibrated = 1.0 / (1.0 + np.exp(self.cal_a * scores + self.cal_b))
+        p1 = calibrated.mean(axis=1)
+        p1[(p1 > 1.0) & (p1 <= 1.0 + 1e-5)] = 1.0
+        return np.column_stack([1.0 - p1, p1])
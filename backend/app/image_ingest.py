@@ -0,0 +1,179 @@
+# File: image_ingest.py
+
+import io
+import os
+import time
+import uuid
+from fastapi import HTTPException, UploadFile
+from starlette.formparsers import MultiPartParser
+
+from app.log import get_logger
+
+log = get_logger(__name__)
+
+# ── Config ────────────────────────────────────────────────────────────────────
+UPLOAD_MAX_BYTES   = int(os.getenv("UPLOAD_MAX_BYTES", str(15 * 1024 * 1024)))
+UPLOAD_DEBUG_DIR   = os.getenv("UPLOAD_DEBUG_DIR")                  # set to keep a copy of each upload on disk
+
+OCR_IMAGE_MAX_SIDE = int(os.getenv("OCR_IMAGE_MAX_SIDE", "1600"))   # px, longest edge sent to the vision model
+OCR_IMAGE_QUALITY  = int(os.getenv("OCR_IMAGE_QUALITY", "80"))      # JPEG quality of the re-encode
+OCR_IMAGE_MAX_PIXELS = int(os.getenv("OCR_IMAGE_MAX_PIXELS", str(60_000_000)))
+
+# Starlette spools multipart file parts above 1 MB to a temp file on disk.
+# Keep anything up to the upload cap in memory instead.
+MultiPartParser.spool_max_size = max(MultiPartParser.spool_max_size, UPLOAD_MAX_BYTES)
+
+# Changing these changes what the vision model sees (part of the OCR cache version)
+OCR_IMAGE_SETTINGS = f"{OCR_IMAGE_MAX_SIDE}px-q{OCR_IMAGE_QUALITY}"
+
+
+# ── Request body cap (before multipart parsing) ──────────────────────────────
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware: answers 413 for requests to `paths` whose body is larger
+    than `max_bytes`, using Content-Length when present and counting streamed
+    chunks otherwise, so an oversized upload is never buffered in full.
+    """
+
+    def __init__(self, app, max_bytes: int = UPLOAD_MAX_BYTES, paths: tuple = ("/upload-image/",)):
+        self.app       = app
+        self.max_bytes = max_bytes
+        self.paths     = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            return await self.app(scope, receive, send)
+
+        # Multipart framing adds a little on top of the file itself
+        limit = self.max_bytes + 64 * 1024
+        headers = dict(scope.get("headers") or [])
+        try:
+            declared = int(headers.get(b"content-length", b"0"))
+        except ValueError:
+            declared = 0
+        if declared > limit:
+            return await self._reject(send)
+
+        received = 0
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit and not rejected:
+                    # Answer now and make the app see a disconnect so parsing stops
+                    rejected = True
+                    await self._reject(send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            # Whatever the app sends after we rejected the body is dropped
+            if not rejected:
+                await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
+
+    async def _reject(self, send):
+        body = f'{{"detail":"Upload exceeds the {self.max_bytes // (1024 * 1024)} MB limit."}}'.encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# ── Reading the upload ───────────────────────────────────────────────────────
+async def read_upload(file: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES) -> bytes:
+    """
+    Read an UploadFile into a single bytes object (413 past max_bytes) and
+    release its spooled buffer, so one copy of the image lives on through OCR.
+    """
+    # The middleware already capped the body and the part is spooled in
+    # memory, so one read() is bounded — no chunk buffer to copy out of again
+    data = await file.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit.",
+        )
+    await file.close()
+
+    if UPLOAD_DEBUG_DIR:
+        os.makedirs(UPLOAD_DEBUG_DIR, exist_ok=True)
+        path = os.path.join(UPLOAD_DEBUG_DIR, f"{uuid.uuid4()}_{os.path.basename(file.filename or 'upload')}")
+        with open(path, "wb") as f:
+            f.write(data)
+        log.info("upload_debug_copy", path=path)
+    return data
+
+
+# ── Downscale / re-encode for the vision model ───────────────────────────────
+def load_pil():
+    """
+    Import Pillow on first use (or from the start-up warm-up) instead of at
+    module import, and refuse decompression bombs before decoding them.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+    Image.MAX_IMAGE_PIXELS = OCR_IMAGE_MAX_PIXELS
+    return Image, ImageOps, UnidentifiedImageError
+
+
+def prepare_for_ocr(image_bytes: bytes, mime_type: str,
+                    max_side: int = OCR_IMAGE_MAX_SIDE, quality: int = OCR_IMAGE_QUALITY):
+    """
+    Apply EXIF orientation, shrink so the longest edge is at most `max_side`
+    and re-encode as JPEG. Returns (bytes, mime_type, info). The original is
+    returned unchanged when it can't be decoded or re-encoding wouldn't help.
+    CPU-bound — call it via asyncio.to_thread.
+    """
+    Image, ImageOps, UnidentifiedImageError = load_pil()
+    start = time.perf_counter()
+    info = {"original_bytes": len(image_bytes), "resized": False}
+
+    try:
+        img = Image.open(io.BytesIO(image_bytes))   # shares the bytes, no copy
+        fmt = img.format
+        info["original_size"] = img.size
+        needs_resize = max(img.size) > max_side
+        rotated = img.getexif().get(0x0112, 1) != 1
+
+        if not needs_resize and not rotated and fmt == "JPEG" and mime_type == "image/jpeg":
+            info["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            info["output_bytes"] = len(image_bytes)
+            return image_bytes, mime_type, info
+
+        # JPEG can decode straight at 1/2, 1/4 or 1/8 scale — far less memory
+        scale = min(1.0, max_side / max(img.size))
+        img.draft(img.mode if img.mode in ("RGB", "L") else "RGB",
+                  (int(img.width * scale) + 1, int(img.height * scale) + 1))
+        info["decoded_size"] = img.size
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        if needs_resize:
+            img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            info["resized"] = True
+
+        out = io.BytesIO()
+        img.save(out, format="JPEG", quality=quality, optimize=True)
+        data = out.getvalue()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        log.warning("image_not_reencoded", error=str(e))
+        info["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        info["output_bytes"] = len(image_bytes)
+        return image_bytes, mime_type, info
+
+    # A tiny, already-compressed upload can come out larger — keep whichever is smaller
+    if len(data) >= len(image_bytes) and not rotated and not needs_resize:
+        data, out_mime = image_bytes, mime_type
+    else:
+        out_mime = "image/jpeg"
+
+    info["output_size"]  = img.size
+    info["output_bytes"] = len(data)
+    info["elapsed_ms"]   = round((time.perf_counter() - start) * 1000, 2)
+    return data, out_mime, info
@@ -0,0 +1,153 @@
+# File: inference_pool.py
+
+import os
+import time
+import asyncio
+import contextvars
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor
+import multiprocessing
+from typing import Callable, TypeVar
+
+from app.log import get_logger
+from app.metrics import STAGE_SECONDS, INFERENCE_REJECTED
+
+log = get_logger(__name__)
+
+T = TypeVar("T")
+
+# --- 1. CONFIGURATION ---
+# "thread":  a ThreadPoolExecutor — NumPy releases the GIL in the model maths,
+#            the loop only competes for it during normalization
+# "process": a ProcessPoolExecutor (spawned workers load their own models) —
+#            nothing CPU-bound runs in the server process at all
+# "inline":  run on the event loop, as before; for benchmarks and debugging
+INFERENCE_EXECUTOR    = os.getenv("INFERENCE_EXECUTOR", "thread")
+INFERENCE_WORKERS     = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+INFERENCE_QUEUE_DEPTH = int(os.getenv("INFERENCE_QUEUE_DEPTH", "32"))   # waiting tasks before 503
+INFERENCE_TIMEOUT     = float(os.getenv("INFERENCE_TIMEOUT", "10"))      # seconds per task, queueing included
+
+
+class InferenceSaturated(Exception):
+    """Raised by run() when every worker is busy and the queue is full."""
+
+
+class InferenceTimeout(Exception):
+    """Raised by run() when a task didn't finish within its timeout."""
+
+
+def _warm_process_worker():
+    # Spawned worker: load the disease models before the first task arrives
+    from app.model_registry import registry
+    registry.ensure_loaded()
+
+
+# --- 2. BOUNDED EXECUTOR ---
+
+class InferencePool:
+    """
+    Runs CPU-bound functions off the event loop on a fixed-size executor.
+    At most `workers` tasks run and `depth` wait; run() raises
+    InferenceSaturated beyond that (or, with wait=True, waits for a slot).
+    A task that times out is abandoned, not interrupted — its slot stays
+    taken until it really finishes, so the bound holds either way. Tasks
+    still queued when they time out are dropped before they start.
+    """
+
+    def __init__(self, kind: str = INFERENCE_EXECUTOR, workers: int = INFERENCE_WORKERS,
+                 depth: int = INFERENCE_QUEUE_DEPTH, timeout: float = INFERENCE_TIMEOUT):
+        if kind not in ("thread", "process", "inline"):
+            raise ValueError(f"Unknown INFERENCE_EXECUTOR '{kind}' (thread, process or inline)")
+        self.kind    = kind
+        self.workers = workers
+        self.depth   = depth
+        self.timeout = timeout
+
+        # Created on first use, so a pre-fork master never starts threads
+        self._executor: Executor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self.in_flight = 0
+        self.completed = 0
+        self.failed    = 0
+        self.rejected  = 0
+        self.timed_out = 0
+
+    def _ensure_started(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers + self.depth)
+        if self._executor is None and self.kind == "thread":
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="inference")
+        elif self._executor is None and self.kind == "process":
+            # spawn, not fork: the server process has threads (log writer, to_thread)
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                                 initializer=_warm_process_worker)
+
+    async def run(self, fn: Callable[..., T], *args, stage: str = "inference_task",
+                  wait: bool = False, timeout: float | None = None) -> T:
+        """
+        fn(*args) on the pool. `stage` names the queue-wait + run time in
+        STAGE_SECONDS. wait=True queues for a slot instead of raising
+        InferenceSaturated (background jobs, which are bounded already).
+        """
+        self._ensure_started()
+        if self.kind == "inline":
+            with STAGE_SECONDS.time(stage):
+                return fn(*args)
+
+        if self._slots.locked() and not wait:
+            self.rejected += 1
+            INFERENCE_REJECTED.inc("saturated")
+            raise InferenceSaturated(f"{self.in_flight} inference tasks in flight")
+        await self._slots.acquire()
+        self.in_flight += 1
+
+        loop = asyncio.get_running_loop()
+
+        def release(_: Future):
+            loop.call_soon_threadsafe(self._release)
+
+        if self.kind == "thread":
+            # Keeps the request's correlation ID on log lines from the worker
+            future = self._executor.submit(contextvars.copy_context().run, fn, *args)
+        else:
+            future = self._executor.submit(fn, *args)
+        future.add_done_callback(release)
+
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+            self.completed += 1
+            return result
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            INFERENCE_REJECTED.inc("timeout")
+            log.warning("inference_timeout", fn=fn.__name__, timeout_s=timeout or self.timeout)
+            raise InferenceTimeout(f"{fn.__name__} took longer than {timeout or self.timeout:.0f}s")
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - start, stage)
+
+    def _release(self):
+        self.in_flight -= 1
+        self._slots.release()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "executor":  self.kind,
+            "workers":   self.workers,
+            "in_flight": self.in_flight,
+            "max_queue": self.depth,
+            "completed": self.completed,
+            "failed":    self.failed,
+            "rejected":  self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+inference = InferencePool()
@@ -0,0 +1,205 @@
+# File: job_queue.py
+
+import os
+import time
+import uuid
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from app.log import get_logger, request_id_var
+
+log = get_logger(__name__)
+
+# --- 1. CONFIGURATION ---
+JOB_WORKERS      = int(os.getenv("JOB_WORKERS", "4"))              # pipelines running at once
+JOB_QUEUE_DEPTH  = int(os.getenv("JOB_QUEUE_DEPTH", "100"))        # waiting jobs before 429
+JOB_RESULT_TTL   = float(os.getenv("JOB_RESULT_TTL", "3600"))      # finished jobs kept this long
+JOB_MAX_STORED   = int(os.getenv("JOB_MAX_STORED", "10000"))
+
+# Job lifecycle: queued → ocr → predicting → done | failed
+TERMINAL_STATUSES = {"done", "failed"}
+
+
+class JobQueueFull(Exception):
+    """Raised by submit() when JOB_QUEUE_DEPTH jobs are already waiting."""
+
+
+# --- 2. IN-PROCESS JOB STORE ---
+
+class InMemoryJobStore:
+    """
+    Job records by ID, plus per-job subscriber queues for progress events.
+    Anything with the same async methods (create / get / update / subscribe /
+    unsubscribe) and owns() can stand in for it, e.g. a Redis- or
+    SQLite-backed store.
+
+    Records live in this worker process only. Job IDs start with the
+    worker's pid so a lookup that lands on another worker (several workers
+    without sticky routing) can be told apart from an expired job.
+    """
+
+    def __init__(self, ttl: float = JOB_RESULT_TTL, max_jobs: int = JOB_MAX_STORED):
+        self.ttl      = ttl
+        self.max_jobs = max_jobs
+        self._jobs: OrderedDict[str, dict] = OrderedDict()
+        self._subscribers: dict[str, list[asyncio.Queue]] = {}
+
+    def _prune(self):
+        now = time.time()
+        for job_id in list(self._jobs):
+            job = self._jobs[job_id]
+            if job["status"] in TERMINAL_STATUSES and now - job["updated_at"] > self.ttl:
+                del self._jobs[job_id]
+        # Oldest finished jobs go first once the store is over capacity
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id]["status"] in TERMINAL_STATUSES:
+                del self._jobs[job_id]
+
+    async def create(self, meta: dict) -> dict:
+        self._prune()
+        now = time.time()
+        job = {
+            "job_id":     f"{os.getpid():x}-{uuid.uuid4()}",
+            "status":     "queued",
+            "created_at": now,
+            "updated_at": now,
+            "meta":       meta,
+            "result":     None,
+            "error":      None,
+        }
+        self._jobs[job["job_id"]] = job
+        return dict(job)
+
+    def owns(self, job_id: str) -> bool:
+        """Could this store have created job_id? (A shared store: always.)"""
+        return job_id.startswith(f"{os.getpid():x}-")
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    async def update(self, job_id: str, **fields) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        job.update(fields, updated_at=time.time())
+        snapshot = dict(job)
+        for q in self._subscribers.get(job_id, []):
+            q.put_nowait(snapshot)
+        return snapshot
+
+    async def subscribe(self, job_id: str) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(q)
+        return q
+
+    async def unsubscribe(self, job_id: str, q: asyncio.Queue):
+        subs = self._subscribers.get(job_id, [])
+        if q in subs:
+            subs.remove(q)
+        if not subs:
+            self._subscribers.pop(job_id, None)
+
+    def stats(self) -> dict:
+        counts: dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"stored": len(self._jobs), "by_status": counts}
+
+
+# --- 3. BOUNDED WORKER POOL ---
+
+class JobQueue:
+    """
+    Runs `handler(job_id, payload, set_status)` on a fixed pool of worker
+    tasks. At most `depth` jobs may wait; beyond that submit() raises
+    JobQueueFull so the route can answer 429 instead of piling up work.
+    """
+
+    def __init__(self, handler: Callable[..., Awaitable[dict]], store=None,
+                 workers: int = JOB_WORKERS, depth: int = JOB_QUEUE_DEPTH):
+        self.handler = handler
+        self.store   = store if store is not None else InMemoryJobStore()
+        self.workers = workers
+        self.depth   = depth
+
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._reserved = 0   # slots held by submits still awaiting store.create()
+        self.running   = 0
+        self.completed = 0
+        self.failed    = 0
+        self.cancelled = 0   # cut off mid-run by stop()
+        self.rejected  = 0
+
+    def _ensure_started(self):
+        if self._queue is None or not self._tasks or all(t.done() for t in self._tasks):
+            self._queue = asyncio.Queue(maxsize=self.depth)
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, payload, meta: dict | None = None) -> dict:
+        self._ensure_started()
+        # Take the slot before awaiting the store, so concurrent submits
+        # can't all pass the check and then overflow the queue
+        if self._queue.qsize() + self._reserved >= self.depth:
+            self.rejected += 1
+            raise JobQueueFull(f"{self._queue.qsize() + self._reserved} jobs already waiting")
+        self._reserved += 1
+        try:
+            job = await self.store.create(meta or {})
+            # Workers are long-lived tasks; the submitting request's correlation
+            # ID travels with the job so its log lines still line up
+            self._queue.put_nowait((job["job_id"], payload, request_id_var.get()))
+        finally:
+            self._reserved -= 1
+        return job
+
+    async def _worker(self):
+        while True:
+            job_id, payload, request_id = await self._queue.get()
+            request_id_var.set(request_id)
+            self.running += 1
+
+            async def set_status(status: str, **fields):
+                await self.store.update(job_id, status=status, **fields)
+
+            try:
+                result = await self.handler(job_id, payload, set_status)
+                await self.store.update(job_id, status="done", result=result)
+                self.completed += 1
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                await self.store.update(job_id, status="failed", error="Server shutting down")
+                raise
+            except Exception as e:
+                log.warning("job_failed", job_id=job_id, error=str(e))
+                detail = getattr(e, "detail", None) or str(e)
+                await self.store.update(job_id, status="failed", error=detail)
+                self.failed += 1
+            finally:
+                self.running -= 1
+                self._queue.task_done()
+
+    async def stop(self):
+        """Cancel the workers; jobs still running are marked failed."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def stats(self) -> dict:
+        return {
+            "workers":   self.workers,
+            "running":   self.running,
+            "queued":    self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.depth,
+            "completed": self.completed,
+            "failed":    self.failed,
+            "cancelled": self.cancelled,
+            "rejected":  self.rejected,
+            **self.store.stats(),
+        }
@@ -0,0 +1,255 @@
+# File: log.py
+
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import random
+import logging
+import threading
+import contextvars
+from logging.handlers import QueueHandler, QueueListener
+
+# ── Config ────────────────────────────────────────────────────────────────────
+LOG_LEVEL        = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT       = os.getenv("LOG_FORMAT", "text")            # "text" or "json" (one object per line)
+LOG_QUEUE_SIZE   = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # records waiting for the writer thread
+LOG_DEBUG_SAMPLE = float(os.getenv("LOG_DEBUG_SAMPLE", "0.01"))  # share of debug_sampled() events kept
+# Report values, chat text and profile fields are replaced by a type/size
+# summary unless LOG_PHI=1 (local debugging only)
+LOG_PHI          = os.getenv("LOG_PHI", "0") in ("1", "true", "True")
+
+# Field names whose values can carry patient data
+PHI_FIELDS = frozenset({
+    "extracted_data", "features", "normalized", "predictions", "values",
+    "message", "user_message", "response", "content", "text",
+    "full_name", "email", "filename",
+})
+
+# Correlation ID of the request (or job) being handled — set by
+# RequestContextMiddleware, copied into to_thread workers automatically
+request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+
+
+# ── Formatting (runs on the writer thread) ───────────────────────────────────
+def _redact(value) -> str:
+    if isinstance(value, dict):
+        return f"<redacted dict, {len(value)} keys>"
+    if isinstance(value, (list, tuple)):
+        return f"<redacted list, {len(value)} items>"
+    if isinstance(value, str):
+        return f"<redacted str, {len(value)} chars>"
+    return "<redacted>"
+
+
+def _fields(record: logging.LogRecord) -> dict:
+    out = {}
+    for key, value in getattr(record, "fields", {}).items():
+        # Lazy fields: pass a callable and it's only evaluated if the record is written
+        if callable(value):
+            try:
+                value = value()
+            except Exception as e:
+                value = f"<field error: {e}>"
+        if key in PHI_FIELDS and not LOG_PHI:
+            value = _redact(value)
+        out[key] = value
+    return out
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts":         time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level":      record.levelname,
+            "logger":     record.name,
+            "event":      record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+            **_fields(record),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        ts = time.strftime("%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}"
+        fields = " ".join(f"{k}={v!r}" if isinstance(v, str) and " " in v else f"{k}={v}"
+                          for k, v in _fields(record).items())
+        line = f"{ts} {record.levelname:<7} [{getattr(record, 'request_id', '-')}] {record.name}: {record.getMessage()}"
+        if fields:
+            line += "  " + fields
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+# ── Non-blocking queue handler ────────────────────────────────────────────────
+class _DroppingQueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread without formatting them. When the
+    queue is full the record is dropped (and counted) instead of blocking
+    the event loop on a slow stderr.
+    """
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens on the writer thread — callers must not mutate
+        # objects they passed as fields
+        record.request_id = request_id_var.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler: _DroppingQueueHandler | None = None
+_listener: QueueListener | None = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging():
+    """Route the app's loggers through one queue to a writer thread on stderr (idempotent)."""
+    global _handler, _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        stream = logging.StreamHandler(sys.stderr)
+        stream.setFormatter(JSONFormatter() if LOG_FORMAT == "json" else TextFormatter())
+
+        _handler = _DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+        root = logging.getLogger("app")
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(_handler)
+        root.propagate = False
+
+        _listener = QueueListener(_handler.queue, stream)
+        _listener.start()
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread (called at shutdown / exit)."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+            logging.getLogger("app").removeHandler(_handler)
+
+
+def _restart_after_fork():
+    # A forked worker (gunicorn preload_app) inherits the parent's handler
+    # but not its writer thread — give it a queue and thread of its own
+    global _handler, _listener, _setup_lock
+    _setup_lock = threading.Lock()
+    if _listener is None:
+        return
+    logging.getLogger("app").removeHandler(_handler)
+    _handler = _listener = None
+    setup_logging()
+
+
+atexit.register(shutdown_logging)
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def dropped_records() -> int:
+    return _handler.dropped if _handler is not None else 0
+
+
+# ── Logger ────────────────────────────────────────────────────────────────────
+class EventLogger:
+    """
+    Structured logger: log.info("ocr_model_failed", model=m, status=429).
+    Every method checks the level first, so a disabled debug call costs one
+    cached level lookup — no formatting, no serialization. Pass expensive
+    fields as callables (features=lambda: ...) and they are only evaluated
+    on the writer thread, and only if the record is emitted.
+    """
+
+    __slots__ = ("_logger",)
+
+    def __init__(self, name: str):
+        self._logger = logging.getLogger(name)
+
+    def _log(self, level: int, event: str, fields: dict, exc_info=None):
+        self._logger.log(level, event, exc_info=exc_info, extra={"fields": fields})
+
+    def debug(self, event: str, **fields):
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._log(logging.DEBUG, event, fields)
+
+    def debug_sampled(self, event: str, **fields):
+        """debug() for per-item events — only LOG_DEBUG_SAMPLE of them are kept."""
+        if self._logger.isEnabledFor(logging.DEBUG) and random.random() < LOG_DEBUG_SAMPLE:
+            self._log(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields):
+        if self._logger.isEnabledFor(logging.INFO):
+            self._log(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields):
+        if self._logger.isEnabledFor(logging.WARNING):
+            self._log(logging.WARNING, event, fields)
+
+    def error(self, event: str, **fields):
+        if self._logger.isEnabledFor(logging.ERROR):
+            self._log(logging.ERROR, event, fields)
+
+    def exception(self, event: str, **fields):
+        """error() with the active exception's traceback."""
+        if self._logger.isEnabledFor(logging.ERROR):
+            self._log(logging.ERROR, event, fields, exc_info=True)
+
+    def is_debug(self) -> bool:
+        return self._logger.isEnabledFor(logging.DEBUG)
+
+
+def get_logger(name: str) -> EventLogger:
+    setup_logging()
+    return EventLogger(name)
+
+
+# ── Correlation IDs ───────────────────────────────────────────────────────────
+class RequestContextMiddleware:
+    """
+    Pure ASGI middleware: takes the caller's X-Request-ID (or makes one),
+    exposes it to every log record of the request through request_id_var,
+    and echoes it on the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        if not request_id:
+            request_id = os.urandom(8).hex()
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
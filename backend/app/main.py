@@ -1,19 +1,37 @@
 import os
-import uuid
+import json
 import base64
-import httpx
-from jose import jwt
+import asyncio
+import hashlib
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Header, Request
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
-from dotenv import load_dotenv
+from fastapi.responses import Response, JSONResponse, StreamingResponse
 
-from app.ai_companion_api import router as ai_router
+from app.ai_companion_api import (
+    router as ai_router, chat_writer, history_cache, get_supabase, load_supabase_package,
+)
 from app.symptom import router as symptom_router, load_artifacts
-from app.prediction_api1 import router as prediction_router, process_report_data
+from app.prediction_api1 import (
+    router as prediction_router, score_report, run_inference, normalization_cache_stats, explain_cache_stats,
+)
+from app.report_sessions import report_sessions
+from app.model_registry import load_models
+from app import openrouter_client
+from app.ocr_cache import OCRCache, OCR_CACHE_PATH
+from app.job_queue import JobQueue, JobQueueFull, TERMINAL_STATUSES
+from app.image_ingest import (
+    UploadSizeLimitMiddleware, read_upload, prepare_for_ocr, load_pil, OCR_IMAGE_SETTINGS,
+)
+from app.auth import load_jwt_backend
+from app.warmup import warmup, STARTUP_MODE
+from app.inference_pool import inference
+from app.memory import memory_summary
+from app import metrics
+from app.log import get_logger, RequestContextMiddleware, shutdown_logging, dropped_records
+from app.metrics import STAGE_SECONDS, LLM_ATTEMPT_FAILURES, LLM_RESPONSES, LLM_EXHAUSTED
 
-load_dotenv()
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.05"))  # seconds between event-loop lag probes
 
 SUPABASE_PROJECT_ID = os.getenv("SUPABASE_PROJECT_ID")
 SUPABASE_JWT_ISSUER = os.getenv("SUPABASE_JWT_ISSUER")
@@ -24,11 +42,23 @@ if not SUPABASE_PROJECT_ID or not SUPABASE_JWT_ISSUER:
 if not OPENROUTER_API_KEY:
     raise RuntimeError("❌ OPENROUTER_API_KEY missing from .env")
 
-print("✅ Env loaded")
+log = get_logger(__name__)
+log.info("env_loaded")
+
+# OCR mode: "race" starts the preferred model and hedges to the next ones
+# after OCR_HEDGE_DELAY seconds; "sequential" tries them one by one in rounds
+OCR_MODE          = os.getenv("OCR_MODE", "race")
+OCR_HEDGE_DELAY   = float(os.getenv("OCR_HEDGE_DELAY", "5"))
+OCR_MODEL_TIMEOUT = float(os.getenv("OCR_MODEL_TIMEOUT", "60"))
 
 # ── App ───────────────────────────────────────────────────────────────────────
 app = FastAPI()
 
+# Oversized uploads get a 413 before the multipart body is buffered. Added
+# first (innermost) so CORS wraps it and the 413 carries the CORS headers —
+# otherwise the browser reports an opaque CORS failure, not "file too large"
+app.add_middleware(UploadSizeLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "https://my-healthmate-ai.netlify.app"],
@@ -37,37 +67,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Correlation ID for every log line of a request (X-Request-ID in and out)
+app.add_middleware(RequestContextMiddleware)
+
+# Outermost, so route latency includes the other middleware
+app.add_middleware(metrics.MetricsMiddleware)
+
 @app.options("/{path:path}")
 async def options_handler(path: str, request: Request):
     return Response(status_code=200)
 
-# ── Auth ──────────────────────────────────────────────────────────────────────
-async def get_current_user_id(authorization: str = Header(None)):
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Missing Authorization header")
-    try:
-        scheme, token = authorization.split(" ")
-        if scheme.lower() != "bearer":
-            raise HTTPException(status_code=401, detail="Invalid auth scheme")
-        payload = jwt.decode(
-            token,
-            key=None,
-            options={"verify_signature": False, "verify_aud": False, "verify_iss": False},
-        )
-        user_id = payload.get("sub")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token payload")
-        return user_id
-    except Exception as e:
-        print("JWT PARSE ERROR:", e)
-        raise HTTPException(status_code=401, detail="Invalid token")
-
 # ── Startup ───────────────────────────────────────────────────────────────────
+# Heavy imports (sklearn via joblib, the supabase stack, Pillow) happen in these
+# steps rather than at module import. Required steps gate /ready; the others
+# only move first-use cost off the request path. Blocking steps can also run
+# once in a pre-fork master (gunicorn.conf.py) and be shared by every worker.
+warmup.step("disease_models", load_models)
+warmup.step("symptom_model", load_artifacts)
+warmup.step("supabase_package", load_supabase_package, required=False)
+warmup.step("supabase_client", get_supabase, required=False)
+warmup.step("jwt_backend", load_jwt_backend, required=False)
+warmup.step("image_codec", load_pil, required=False)
+
+_loop_watcher: asyncio.Task | None = None
+
 @app.on_event("startup")
-def startup_event():
-    print("🚀 Loading ML artifacts...")
-    load_artifacts()
-    print("✅ ML models loaded. Server ready.")
+async def startup_event():
+    global _loop_watcher
+    _loop_watcher = asyncio.create_task(metrics.watch_event_loop(LOOP_LAG_INTERVAL))
+    if STARTUP_MODE == "background":
+        # Accept traffic now; routes that need a step wait for it
+        warmup.start()
+        log.info("startup_warming_in_background")
+        return
+    log.info("startup_loading_models")
+    await warmup.run()
+    if not warmup.ready:
+        failed = [name for name, s in warmup.status()["steps"].items() if s["status"] == "failed" and s["required"]]
+        raise RuntimeError(f"Startup failed: {', '.join(failed)} did not load")
+    log.info("startup_ready")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await warmup.stop()
+    if _loop_watcher is not None:
+        _loop_watcher.cancel()
+    # Drain queued chat_history rows before the process exits
+    await chat_writer.stop()
+    await report_jobs.stop()
+    await openrouter_client.close_client()
+    inference.shutdown()
+    shutdown_logging()
 
 # ── Routers ───────────────────────────────────────────────────────────────────
 app.include_router(symptom_router, prefix="/api")
@@ -77,137 +127,379 @@ app.include_router(prediction_router, prefix="/api1")
 # ── Health ────────────────────────────────────────────────────────────────────
 @app.get("/")
 def root():
-    return {"status": "HealthMate backend running"}
+    return {"status": "HealthMate backend running", "warmup": warmup.status()}
+
+
+@app.get("/ready")
+def ready():
+    """Readiness probe: 200 once every required warm-up step has loaded, 503 before."""
+    status = warmup.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+# ── Metrics (Prometheus text format) ─────────────────────────────────────────
+def _cache_families():
+    caches = {
+        "normalize_key":   normalization_cache_stats()["key_resolution"],
+        "normalize_value": normalization_cache_stats()["value_cleaning"],
+        "ocr":             ocr_cache.stats(),
+        "explain":         explain_cache_stats(),
+        "chat_history":    history_cache.stats(),
+    }
+    yield ("healthmate_cache_hits_total", "counter", "Cache hits",
+           [({"cache": name}, s["hits"]) for name, s in caches.items()])
+    yield ("healthmate_cache_misses_total", "counter", "Cache misses",
+           [({"cache": name}, s["misses"]) for name, s in caches.items()])
+    yield ("healthmate_cache_hit_ratio", "gauge", "Cache hit ratio since startup",
+           [({"cache": name}, s["hit_rate"]) for name, s in caches.items()])
+
+
+def _log_families():
+    yield ("healthmate_log_dropped_total", "counter", "Log records dropped because the log queue was full",
+           [({}, dropped_records())])
+
+
+def _memory_families():
+    # Per worker: a scrape reports whichever worker answered it
+    summary = memory_summary()
+    if summary is not None:
+        yield ("healthmate_process_memory_bytes", "gauge",
+               "Worker memory: rss, pss, uss (private) and shared (copy-on-write, libraries) bytes",
+               [({"kind": kind}, value) for kind, value in summary.items()])
+
+
+def _inference_families():
+    stats = inference.stats()
+    yield ("healthmate_inference_in_flight", "gauge", "Inference tasks running or queued on the pool",
+           [({"executor": stats["executor"]}, stats["in_flight"])])
+    yield ("healthmate_inference_capacity", "gauge", "Inference tasks the pool accepts before answering 503",
+           [({"executor": stats["executor"]}, stats["workers"] + stats["max_queue"])])
+
+
+metrics.register_collector(_cache_families)
+metrics.register_collector(_log_families)
+metrics.register_collector(_memory_families)
+metrics.register_collector(_inference_families)
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+# ── OCR via OpenRouter Vision (hedged race or sequential retry) ──────────────
+OCR_MODELS = [
+    "google/gemma-3-4b-it:free",
+    "google/gemma-3-12b-it:free",
+    "google/gemma-3-27b-it:free",
+    "mistralai/mistral-small-3.1-24b-instruct:free",
+]
+
+OCR_PROMPT = (
+    "You are a medical OCR assistant. "
+    "Look at this medical report image and extract every test name and its value. "
+    "Return ONLY a valid JSON object — no explanation, no markdown, no code fences. "
+    "Keys should be test names exactly as written (e.g. 'Hemoglobin', 'RBC Count'). "
+    "Values should be the raw value string including units "
+    "(e.g. '13.5 g/dL', '5.2 million/cumm', 'Male'). "
+    "Also extract Age and Sex if present. "
+    "Example: {\"Hemoglobin\": \"13.5 g/dL\", \"Age\": \"45\", \"Sex\": \"Male\"}"
+)
 
-# ── OCR via OpenRouter Vision (with retry + delay) ────────────────────────────
-async def extract_medical_values_via_llm(image_bytes: bytes, mime_type: str) -> dict:
-    import json
-    import asyncio
 
-    MODELS = [
-        "google/gemma-3-4b-it:free",
-        "google/gemma-3-12b-it:free",
-        "google/gemma-3-27b-it:free",
-        "mistralai/mistral-small-3.1-24b-instruct:free",
-    ]
+class OCRModelError(Exception):
+    """One vision model failed to return usable JSON."""
 
-    b64 = base64.b64encode(image_bytes).decode("utf-8")
-    prompt = (
-        "You are a medical OCR assistant. "
-        "Look at this medical report image and extract every test name and its value. "
-        "Return ONLY a valid JSON object — no explanation, no markdown, no code fences. "
-        "Keys should be test names exactly as written (e.g. 'Hemoglobin', 'RBC Count'). "
-        "Values should be the raw value string including units "
-        "(e.g. '13.5 g/dL', '5.2 million/cumm', 'Male'). "
-        "Also extract Age and Sex if present. "
-        "Example: {\"Hemoglobin\": \"13.5 g/dL\", \"Age\": \"45\", \"Sex\": \"Male\"}"
-    )
 
-    # Try each model up to 3 rounds with delay between rounds
+async def _ocr_with_model(model: str, messages: list[dict]) -> dict:
+    """Single OCR attempt. Returns the parsed JSON dict or raises OCRModelError."""
+    breaker = openrouter_client.breaker(model)
+    if not breaker.allow():
+        raise OCRModelError(f"{model}: circuit open")
+    log.debug_sampled("ocr_attempt", model=model)
+    try:
+        # Success is only recorded below, once the output parses
+        response = await openrouter_client.chat_completion(
+            model, messages, max_tokens=1000, timeout=OCR_MODEL_TIMEOUT, record_success=False
+        )
+    except asyncio.CancelledError:
+        # Lost the race — no outcome either way
+        breaker.abandon()
+        raise
+    except Exception as e:
+        LLM_ATTEMPT_FAILURES.inc("ocr", model)
+        raise OCRModelError(f"{model}: {e}") from e
+
+    if response.status_code != 200:
+        try:
+            err = response.json().get("error", {})
+        except ValueError:
+            err = {}
+        LLM_ATTEMPT_FAILURES.inc("ocr", model)
+        raise OCRModelError(f"{model} failed: {str(err.get('message', response.status_code))[:80]}")
+
+    try:
+        content = openrouter_client.completion_text(response).strip()
+
+        if content.startswith("```"):
+            parts = content.split("```")
+            content = parts[1] if len(parts) > 1 else parts[0]
+            if content.startswith("json"):
+                content = content[4:]
+            content = content.strip()
+
+        extracted = json.loads(content)
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+        # Model is up but its output is unusable — counts against its breaker
+        # like an error status would (JSONDecodeError is a ValueError)
+        breaker.record_failure()
+        LLM_ATTEMPT_FAILURES.inc("ocr", model)
+        raise OCRModelError(f"JSON error from {model}: {e}") from e
+    if not isinstance(extracted, dict):
+        breaker.record_failure()
+        LLM_ATTEMPT_FAILURES.inc("ocr", model)
+        raise OCRModelError(f"{model} returned JSON that is not an object")
+
+    breaker.record_success()
+    log.info("ocr_extracted", model=model, fields=len(extracted))
+    LLM_RESPONSES.inc("ocr", model)
+    return extracted
+
+
+async def _race_ocr(models: list[str], messages: list[dict]) -> dict | None:
+    """
+    Start the preferred model, launch the next one every OCR_HEDGE_DELAY
+    seconds (or as soon as an in-flight attempt fails), return the first
+    valid JSON and cancel the rest.
+    """
+    queue   = list(models)
+    pending = {asyncio.create_task(_ocr_with_model(queue.pop(0), messages))}
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=OCR_HEDGE_DELAY if queue else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                log.warning("ocr_attempt_failed", error=str(task.exception()))
+
+            if queue:
+                if not done:
+                    log.info("ocr_hedge", after_s=OCR_HEDGE_DELAY, model=queue[0])
+                pending.add(asyncio.create_task(_ocr_with_model(queue.pop(0), messages)))
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _sequential_ocr(models: list[str], messages: list[dict]) -> dict | None:
+    """Try each model up to 3 rounds with delay between rounds."""
     for round in range(3):
         if round > 0:
             wait = round * 30  # wait 30s, then 60s
-            print(f"⏳ Round {round+1}: waiting {wait}s before retry...")
+            log.info("ocr_retry_round", round=round + 1, wait_s=wait)
             await asyncio.sleep(wait)
 
-        for model in MODELS:
+        for model in models:
+            if not openrouter_client.breaker(model).available():
+                log.debug_sampled("ocr_skip_open_circuit", model=model)
+                continue
             try:
-                print(f"🔄 Trying {model}...")
-                payload = {
-                    "model": model,
-                    "messages": [{
-                        "role": "user",
-                        "content": [
-                            {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{b64}"}},
-                            {"type": "text", "text": prompt},
-                        ],
-                    }],
-                    "max_tokens": 1000,
-                }
-
-                async with httpx.AsyncClient(timeout=60) as client:
-                    response = await client.post(
-                        "https://openrouter.ai/api/v1/chat/completions",
-                        headers={
-                            "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                            "Content-Type": "application/json",
-                            "HTTP-Referer": "http://localhost:5173",
-                            "X-Title": "HealthMate AI",
-                        },
-                        json=payload,
-                    )
-
-                if response.status_code != 200:
-                    err = response.json().get("error", {})
-                    print(f"⚠️ {model} failed: {err.get('message', '')[:80]}")
-                    continue
-
-                content = response.json()["choices"][0]["message"]["content"].strip()
-                print(f"✅ Got response from {model}")
-
-                if content.startswith("```"):
-                    parts = content.split("```")
-                    content = parts[1] if len(parts) > 1 else parts[0]
-                    if content.startswith("json"):
-                        content = content[4:]
-                    content = content.strip()
+                return await _ocr_with_model(model, messages)
+            except OCRModelError as e:
+                log.warning("ocr_attempt_failed", error=str(e))
+    return None
 
-                extracted = json.loads(content)
-                print(f"✅ Extracted {len(extracted)} fields")
-                return extracted
-
-            except json.JSONDecodeError as e:
-                print(f"❌ JSON error from {model}: {e}")
-                continue
-            except Exception as e:
-                print(f"❌ Error with {model}: {e}")
-                continue
 
+async def extract_medical_values_via_llm(image_bytes: bytes, mime_type: str) -> dict:
+    b64 = base64.b64encode(image_bytes).decode("utf-8")
+    messages = [{
+        "role": "user",
+        "content": [
+            {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{b64}"}},
+            {"type": "text", "text": OCR_PROMPT},
+        ],
+    }]
+
+    if OCR_MODE == "sequential":
+        extracted = await _sequential_ocr(OCR_MODELS, messages)
+    else:
+        # Models whose breaker is open are skipped without an attempt
+        available = [m for m in OCR_MODELS if openrouter_client.breaker(m).available()]
+        extracted = await _race_ocr(available, messages) if available else None
+
+    if extracted is not None:
+        return extracted
+
+    LLM_EXHAUSTED.inc("ocr")
     raise HTTPException(
         status_code=502,
         detail="All OCR models are rate-limited. Please try again in 2-3 minutes."
     )
 
 
+# ── OCR Result Cache (content-addressed) ──────────────────────────────────────
+# Re-uploads of the same image skip the vision model. Changing the prompt or
+# model list changes the version, so stale extractions are never served.
+OCR_CACHE_VERSION = hashlib.sha256(
+    (OCR_PROMPT + "|" + ",".join(OCR_MODELS) + "|" + OCR_IMAGE_SETTINGS).encode("utf-8")
+).hexdigest()[:12]
+
+ocr_cache = OCRCache(OCR_CACHE_PATH, version=OCR_CACHE_VERSION)
+
+
+async def extract_medical_values_cached(image_bytes: bytes, mime_type: str) -> dict:
+    with STAGE_SECONDS.time("ocr_cache"):
+        cached = await ocr_cache.get(image_bytes)
+    if cached is not None:
+        log.debug_sampled("ocr_cache_hit")
+        return cached
+    log.debug_sampled("ocr_cache_miss")
+
+    # Orient, downscale and re-encode before base64 — multi-MB phone photos
+    # go out as ~100 KB JPEGs
+    with STAGE_SECONDS.time("image_prepare"):
+        ocr_bytes, ocr_mime, info = await asyncio.to_thread(prepare_for_ocr, image_bytes, mime_type)
+    if ocr_bytes is not image_bytes:
+        log.info("ocr_image_prepared", original_kb=info["original_bytes"] // 1024,
+                 output_kb=info["output_bytes"] // 1024, elapsed_ms=info["elapsed_ms"])
+
+    with STAGE_SECONDS.time("ocr_llm"):
+        extracted = await extract_medical_values_via_llm(ocr_bytes, ocr_mime)
+    del ocr_bytes
+    await ocr_cache.put(image_bytes, extracted)
+    return extracted
+
+
+@app.get("/inference/stats")
+def inference_stats():
+    return inference.stats()
+
+
+@app.get("/ocr/cache-stats")
+def ocr_cache_stats():
+    return ocr_cache.stats()
+
+
 # ── Upload + Full Pipeline ────────────────────────────────────────────────────
-@app.post("/upload-image/")
-async def upload_image(file: UploadFile = File(...)):
-    upload_dir = "uploads"
-    os.makedirs(upload_dir, exist_ok=True)
-    file_id   = str(uuid.uuid4())
-    file_path = os.path.join(upload_dir, f"{file_id}_{file.filename}")
+async def run_report_pipeline(image_bytes: bytes, mime_type: str, set_status=None) -> dict:
+    """OCR the report image, then score it against every disease model."""
+    if set_status:
+        await set_status("ocr")
+    with STAGE_SECONDS.time("ocr"):
+        extracted_data = await extract_medical_values_cached(image_bytes, mime_type)
+    log.debug("ocr_result", extracted_data=extracted_data)
 
-    try:
-        image_bytes = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(image_bytes)
-        print(f"📥 Received: {file.filename}")
-
-        print("🔍 Sending to Gemini OCR...")
-        extracted_data = await extract_medical_values_via_llm(
-            image_bytes, file.content_type or "image/jpeg"
-        )
-        print("✅ OCR extracted:", extracted_data)
+    if set_status:
+        await set_status("predicting")
+    # Jobs are already bounded by the job queue — they wait for a slot; a
+    # sync upload gets a 503 like /predict-risk when the pool is full
+    normalized, predictions = await run_inference(score_report, extracted_data, stage="predict_task",
+                                                  wait=set_status is not None)
+
+    return {
+        "message": "Report processed successfully",
+        "report_id": report_sessions.create(extracted_data, normalized, predictions),
+        "extracted_data": extracted_data,
+        "predictions": predictions,
+    }
+
+
+async def _report_job(job_id: str, payload: tuple, set_status) -> dict:
+    image_bytes, mime_type = payload
+    return await run_report_pipeline(image_bytes, mime_type, set_status)
 
-        print("🤖 Running ML predictions...")
-        predictions = process_report_data(extracted_data)
-        print("📊 Predictions complete")
 
-        return {
-            "message": "Report processed successfully",
-            "extracted_data": extracted_data,
-            "predictions": predictions,
-        }
+report_jobs = JobQueue(_report_job)
+
+
+@app.post("/upload-image/")
+async def upload_image(file: UploadFile = File(...), mode: str = "sync"):
+    # Held in memory only (capped at UPLOAD_MAX_BYTES); UPLOAD_DEBUG_DIR keeps a copy
+    with STAGE_SECONDS.time("upload_read"):
+        image_bytes = await read_upload(file)
+    mime_type   = file.content_type or "image/jpeg"
+    log.info("upload_received", kb=len(image_bytes) // 1024, mime=mime_type, filename=file.filename)
+
+    # mode=job: answer 202 with a job ID now and run the pipeline on the worker pool
+    if mode == "job":
+        try:
+            job = await report_jobs.submit((image_bytes, mime_type), meta={"filename": file.filename})
+        except JobQueueFull:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many reports are being processed. Please try again shortly.",
+                headers={"Retry-After": "30"},
+            )
+        return JSONResponse(status_code=202, content={
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "status_url": f"/jobs/{job['job_id']}",
+            "events_url": f"/jobs/{job['job_id']}/events",
+        })
+
+    try:
+        return await run_report_pipeline(image_bytes, mime_type)
 
     except HTTPException:
         raise
     except Exception as e:
-        print("❌ Pipeline error:", e)
+        log.exception("pipeline_error")
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
+# ── Report jobs ──────────────────────────────────────────────────────────────
+def _public_job(job: dict) -> dict:
+    return {k: job[k] for k in ("job_id", "status", "created_at", "updated_at", "result", "error")}
+
+
+@app.get("/jobs/stats")
+def job_stats():
+    return report_jobs.stats()
+
+
+async def _find_job(job_id: str) -> dict:
+    job = await report_jobs.store.get(job_id)
+    if job is not None:
+        return job
+    if not report_jobs.store.owns(job_id):
+        # Jobs are held by the worker that accepted them — with several
+        # workers, job requests need sticky routing (see gunicorn.conf.py)
+        raise HTTPException(status_code=404, detail="Job is held by another server worker — "
+                                                    "poll through the same worker, or resubmit with mode=sync")
+    raise HTTPException(status_code=404, detail="Unknown or expired job_id — upload the report again")
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    return _public_job(await _find_job(job_id))
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-Sent Events: one `status` event per transition, ending at done/failed."""
+    await _find_job(job_id)
+
+    async def event_stream():
+        updates = await report_jobs.store.subscribe(job_id)
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-        except Exception as cleanup_err:
-            print("⚠️ Cleanup failed:", cleanup_err)
\ No newline at end of file
+            # Re-read after subscribing so a transition in between isn't missed
+            current = await report_jobs.store.get(job_id)
+            yield f"event: status\ndata: {json.dumps(_public_job(current))}\n\n"
+            while current["status"] not in TERMINAL_STATUSES:
+                try:
+                    current = await asyncio.wait_for(updates.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: status\ndata: {json.dumps(_public_job(current))}\n\n"
+        finally:
+            await report_jobs.store.unsubscribe(job_id, updates)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,59 @@
+# File: memory.py
+
+import os
+
+# ── Per-process memory (Linux /proc) ─────────────────────────────────────────
+# RSS counts every resident page, including ones shared with other workers.
+# The split that matters when sizing workers per node:
+#   uss     pages only this process maps (Private_*) — what one more worker costs
+#   shared  pages other processes also map (Shared_*): copy-on-write model
+#           arrays inherited from a preloading master, libraries, mmaps
+#   pss     RSS with shared pages divided among their sharers; summing it
+#           over all workers gives the real footprint
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty", "Swap")
+
+
+def smaps_rollup(pid: int | str = "self") -> dict[str, int] | None:
+    """Byte counts from /proc/<pid>/smaps_rollup, or None where it's unavailable."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    out = {}
+    for line in lines:
+        key, _, rest = line.partition(":")
+        if key in SMAPS_FIELDS:
+            out[key] = int(rest.split()[0]) * 1024  # reported in kB
+    return out
+
+
+def memory_summary(pid: int | str = "self") -> dict[str, int] | None:
+    """rss / pss / uss / shared bytes for one process (see above)."""
+    s = smaps_rollup(pid)
+    if s is None:
+        return None
+    return {
+        "rss":    s.get("Rss", 0),
+        "pss":    s.get("Pss", 0),
+        "uss":    s.get("Private_Clean", 0) + s.get("Private_Dirty", 0),
+        "shared": s.get("Shared_Clean", 0) + s.get("Shared_Dirty", 0),
+    }
+
+
+def child_pids(pid: int) -> list[int]:
+    """Direct children of `pid` (the workers of a gunicorn / uvicorn master)."""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Field 4 is the parent pid; the command name in field 2 may contain spaces
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        if ppid == pid:
+            children.append(int(entry))
+    return sorted(children)
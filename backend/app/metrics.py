@@ -0,0 +1,275 @@
+# File: metrics.py
+
+import time
+import bisect
+import asyncio
+import threading
+from typing import Callable, Iterable
+
+from app.log import get_logger
+
+log = get_logger(__name__)
+
+# ── Config ────────────────────────────────────────────────────────────────────
+# Latency buckets (seconds): sub-millisecond stages up to multi-model OCR races
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry: list["_Metric"] = []
+_collectors: list[Callable[[], Iterable[tuple]]] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+# ── Counters and histograms ───────────────────────────────────────────────────
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, object] = {}
+        # Observations come from the event loop and from to_thread workers
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic count per label set: COUNTER.inc("label", ...)"""
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_label_str(self.labelnames, labels)} {_number(v)}" for labels, v in items
+        ]
+
+
+class _Timer:
+    __slots__ = ("hist", "labels", "start")
+
+    def __init__(self, hist: "Histogram", labels: tuple):
+        self.hist = hist
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        # Failed stages are timed too — a slow failure is still slow
+        self.hist.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket histogram per label set. observe() is a bisect plus three
+    additions under a lock; cumulative bucket counts are only built at
+    scrape time.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # per-bucket counts, +Inf count, sum
+                series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def time(self, *labels) -> _Timer:
+        """with HIST.time("label"): ... — observes the block's wall time."""
+        return _Timer(self, labels)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._values.items()]
+        lines = self._header()
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_label_str(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_str(self.labelnames, labels)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_label_str(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+def register_collector(fn: Callable[[], Iterable[tuple]]):
+    """
+    fn() is called on every scrape and yields (name, kind, help, samples)
+    with samples as [(labels_dict, value)] — for values other modules
+    already track (cache hit/miss counts), read instead of duplicated.
+    """
+    _collectors.append(fn)
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        try:
+            families = list(collector())
+        except Exception as e:
+            log.warning("metrics_collector_failed", error=str(e))
+            continue
+        for name, kind, help, samples in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                names, values = tuple(labels), tuple(labels.values())
+                lines.append(f"{name}{_label_str(names, values)} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ── Application metrics ───────────────────────────────────────────────────────
+REQUEST_SECONDS = Histogram(
+    "healthmate_http_request_duration_seconds",
+    "HTTP request latency by route template (streaming responses: until the last byte)",
+    ("method", "route", "status"),
+)
+STAGE_SECONDS = Histogram(
+    "healthmate_stage_duration_seconds",
+    "Time spent in one stage of the report or chat pipeline",
+    ("stage",),
+)
+MODEL_SECONDS = Histogram(
+    "healthmate_model_inference_seconds",
+    "Disease model inference time per call (one call scores a whole batch)",
+    ("disease",),
+)
+OPENROUTER_SECONDS = Histogram(
+    "healthmate_openrouter_request_duration_seconds",
+    "OpenRouter chat-completions latency per model (streaming: until response headers)",
+    ("model", "status"),
+)
+SUPABASE_SECONDS = Histogram(
+    "healthmate_supabase_request_duration_seconds",
+    "Supabase PostgREST call latency",
+    ("table", "op"),
+)
+SUPABASE_ERRORS = Counter(
+    "healthmate_supabase_errors_total",
+    "Supabase PostgREST calls that raised",
+    ("table", "op"),
+)
+LLM_ATTEMPT_FAILURES = Counter(
+    "healthmate_llm_attempt_failures_total",
+    "Model attempts that failed; the caller falls back to its next model if one is left",
+    ("caller", "model"),
+)
+LLM_RESPONSES = Counter(
+    "healthmate_llm_responses_total",
+    "Requests answered, by the model that answered (non-primary = fallback)",
+    ("caller", "model"),
+)
+LLM_EXHAUSTED = Counter(
+    "healthmate_llm_exhausted_total",
+    "Requests where every model failed",
+    ("caller",),
+)
+INFERENCE_REJECTED = Counter(
+    "healthmate_inference_rejected_total",
+    "Inference tasks refused because the pool was saturated, or abandoned after their timeout",
+    ("reason",),
+)
+EVENT_LOOP_LAG = Histogram(
+    "healthmate_event_loop_lag_seconds",
+    "How late the event loop woke a sleeping task — time some callback held the loop",
+)
+
+
+# ── Event-loop lag ────────────────────────────────────────────────────────────
+async def watch_event_loop(interval: float = 0.05):
+    """
+    Sleeps `interval` seconds at a time and observes how much later than
+    that it woke up. Anything running on the loop without awaiting (CPU
+    work in a coroutine, blocking I/O) shows up here.
+    """
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, time.perf_counter() - start - interval))
+
+
+# ── Route latency middleware ─────────────────────────────────────────────────
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request into REQUEST_SECONDS,
+    labelled by route template (/jobs/{job_id}, not the raw path) so
+    cardinality stays bounded. Unrouted paths share route="unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: dict = {}
+
+    def _route_label(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        label = self._routes.get(endpoint)
+        if label is None:
+            app = scope.get("app")
+            for route in getattr(app, "routes", ()):
+                if getattr(route, "endpoint", None) is endpoint:
+                    label = route.path
+                    break
+            else:
+                label = getattr(endpoint, "__name__", "unmatched")
+            self._routes[endpoint] = label
+        return label
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - start, scope["method"],
+                                    self._route_label(scope), str(status))
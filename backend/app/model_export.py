@@ -0,0 +1,168 @@
+# File: model_export.py
+#
+# Compiles each <disease>_scaler.pkl + <disease>_model_calibrated.pkl pair in
+# models/ into <disease>_compiled.npz for the NumPy runtime (compiled_models.py).
+# Re-run after retraining:
+#
+#   cd backend
+#   python -m app.model_export              # all diseases
+#   python -m app.model_export heart liver  # some of them
+#
+# Then check parity with: python -m benchmarks.check_compiled_parity
+
+import os
+import sys
+import json
+import joblib
+import numpy as np
+import sklearn
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.svm import SVC
+
+from app.model_registry import MODEL_DIR, META_SUFFIX, MODEL_SUFFIX, SCALER_SUFFIX
+from app.compiled_models import COMPILED_SUFFIX, FORMAT_VERSION, source_fingerprint
+
+
+# ── Per-estimator exporters ───────────────────────────────────────────────────
+def _export_linear(estimators, mean, scale) -> dict:
+    coef = np.vstack([e.coef_[0] for e in estimators])
+    intercept = np.array([e.intercept_[0] for e in estimators])
+    # w·((x - m) / s) + b  ==  (w / s)·x + (b - Σ w·m / s)
+    return {
+        "lr_coef":      coef / scale,
+        "lr_intercept": intercept - (coef * mean / scale).sum(axis=1),
+    }
+
+
+def _export_svc(estimators, mean, scale) -> dict:
+    sv, dual, gamma, fold = [], [], [], []
+    for i, e in enumerate(estimators):
+        if e.kernel != "rbf":
+            raise ValueError(f"SVC kernel '{e.kernel}' is not supported (rbf only)")
+        # Support vectors back in raw units: x_scaled - sv == (x - (m + s·sv)) / s
+        sv.append(mean + scale * e.support_vectors_)
+        dual.append(e.dual_coef_[0])
+        gamma.append(np.full(len(e.support_vectors_), e._gamma))
+        fold.append(np.full(len(e.support_vectors_), i))
+    sv = np.vstack(sv)
+    weight = 1.0 / scale ** 2
+    return {
+        "svc_sv":        sv,
+        "svc_weight":    weight,
+        "svc_sv_norm":   (sv * sv) @ weight,
+        "svc_dual":      np.concatenate(dual),
+        "svc_gamma_sv":  np.concatenate(gamma),
+        "svc_sv_fold":   np.concatenate(fold).astype(np.int32),
+        "svc_intercept": np.array([e.intercept_[0] for e in estimators]),
+    }
+
+
+def _float32_floor(t: np.ndarray) -> np.ndarray:
+    """Largest float32 <= t, so `x32 <= t32` decides exactly like sklearn's `x32 <= t64`."""
+    t32 = t.astype(np.float32)
+    over = t32.astype(np.float64) > t
+    t32[over] = np.nextafter(t32[over], np.float32(-np.inf))
+    return t32
+
+
+def _export_forest(estimators, mean, scale) -> tuple[dict, int]:
+    feature, threshold, right, value, roots, tree_fold = [], [], [], [], [], []
+    offset, max_depth = 0, 0
+    for i, forest in enumerate(estimators):
+        for tree in forest.estimators_:
+            t = tree.tree_
+            n = t.node_count
+            leaf = t.children_left == -1
+            node_ids = np.arange(n)
+
+            # Depth-first layout: a split's left child is always the next node
+            if not np.array_equal(t.children_left[~leaf], node_ids[~leaf] + 1):
+                raise ValueError("tree is not in depth-first order (left child != node + 1)")
+
+            counts = t.value[:, 0, :]
+            p1 = counts[:, 1] / np.where(counts.sum(axis=1) == 0, 1.0, counts.sum(axis=1))
+
+            # Leaves: threshold -inf sends every row right, onto the leaf itself
+            feature.append(np.where(leaf, 0, t.feature).astype(np.int32))
+            threshold.append(np.where(leaf, np.float32(-np.inf), _float32_floor(t.threshold)))
+            right.append((np.where(leaf, node_ids, t.children_right) + offset).astype(np.int32))
+            value.append(p1)
+            roots.append(offset)
+            tree_fold.append(i)
+
+            offset += n
+            max_depth = max(max_depth, t.max_depth)
+
+    arrays = {
+        "scaler_mean":    mean,
+        "scaler_scale":   scale,
+        "tree_feature":   np.concatenate(feature),
+        "tree_threshold": np.concatenate(threshold).astype(np.float32),
+        "tree_right":     np.concatenate(right),
+        "tree_value":     np.concatenate(value),
+        "tree_roots":     np.array(roots, dtype=np.int32),
+        "tree_fold":      np.array(tree_fold, dtype=np.int32),
+    }
+    return arrays, max_depth
+
+
+# ── Export one disease ────────────────────────────────────────────────────────
+def export_disease(name: str, model_dir: str = MODEL_DIR) -> str:
+    paths = [os.path.join(model_dir, name + s) for s in (META_SUFFIX, MODEL_SUFFIX, SCALER_SUFFIX)]
+    meta, model, scaler = (joblib.load(p) for p in paths)
+
+    if getattr(model, "method", None) != "sigmoid" or list(model.classes_) != [0, 1]:
+        raise ValueError(f"{name}: only binary sigmoid-calibrated models can be compiled")
+
+    folds = model.calibrated_classifiers_
+    estimators = [cc.estimator for cc in folds]
+    calibrators = [cc.calibrators[0] for cc in folds]
+
+    mean  = scaler.mean_ if scaler.with_mean else np.zeros(scaler.n_features_in_)
+    scale = scaler.scale_ if scaler.with_std else np.ones(scaler.n_features_in_)
+
+    max_depth = 0
+    base = type(estimators[0])
+    if base is LogisticRegression:
+        kind, arrays = "linear", _export_linear(estimators, mean, scale)
+    elif base is SVC:
+        kind, arrays = "svc_rbf", _export_svc(estimators, mean, scale)
+    elif base is RandomForestClassifier:
+        kind = "forest"
+        arrays, max_depth = _export_forest(estimators, mean, scale)
+    else:
+        raise ValueError(f"{name}: no exporter for {base.__name__}")
+
+    compiled_meta = {
+        "format_version":  FORMAT_VERSION,
+        "kind":            kind,
+        "max_depth":       max_depth,
+        "features":        list(meta["features"]),
+        "feature_medians": {f: float(meta["feature_medians"][f]) for f in meta["features"]},
+        "disease":         meta.get("disease", name),
+        "best_model":      meta.get("best_model"),
+        "target":          meta.get("target"),
+        "sklearn_version": sklearn.__version__,
+        "source_sha256":   source_fingerprint(paths),
+    }
+
+    arrays["cal_a"] = np.array([c.a_ for c in calibrators], dtype=float)
+    arrays["cal_b"] = np.array([c.b_ for c in calibrators], dtype=float)
+    arrays["meta_json"] = np.array(json.dumps(compiled_meta))
+
+    out_path = os.path.join(model_dir, name + COMPILED_SUFFIX)
+    np.savez_compressed(out_path, **arrays)
+    return out_path
+
+
+def main(names: list[str]):
+    if not names:
+        names = sorted(f[: -len(META_SUFFIX)] for f in os.listdir(MODEL_DIR) if f.endswith(META_SUFFIX))
+    for name in names:
+        path = export_disease(name)
+        print(f"✅ {name}: {os.path.getsize(path) / 1024:.1f} KiB → {os.path.relpath(path)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,179 @@
+# File: model_registry.py
+
+import os
+import time
+import threading
+import numpy as np
+
+from app.compiled_models import CompiledModel, COMPILED_SUFFIX, source_fingerprint
+from app.log import get_logger
+
+log = get_logger(__name__)
+
+# ── Config ────────────────────────────────────────────────────────────────────
+BASE_DIR  = os.path.dirname(os.path.abspath(__file__))
+# models/ sits in backend/, one level up from backend/app/
+MODEL_DIR = os.path.join(BASE_DIR, "..", "models")
+
+META_SUFFIX   = "_metadata.pkl"
+MODEL_SUFFIX  = "_model_calibrated.pkl"
+SCALER_SUFFIX = "_scaler.pkl"
+
+# auto    — compiled NumPy model when an up-to-date <disease>_compiled.npz exists, else sklearn
+# numpy   — same, but warn loudly when a disease has no usable compiled model
+# sklearn — always unpickle the scaler + calibrated model
+MODEL_RUNTIME = os.getenv("MODEL_RUNTIME", "auto")
+
+
+# ── One loaded disease model ──────────────────────────────────────────────────
+class DiseaseModel:
+    """
+    Metadata plus either the sklearn calibrated model + scaler or the compiled
+    NumPy equivalent for one disease, kept in memory.
+    """
+
+    def __init__(self, name: str, meta: dict, model, scaler, load_seconds: float, size_bytes: int,
+                 compiled: CompiledModel | None = None):
+        self.name     = name
+        self.meta     = meta
+        self.model    = model
+        self.scaler   = scaler
+        self.compiled = compiled
+        self.runtime  = "numpy" if compiled is not None else "sklearn"
+
+        # Precomputed once so requests never re-read metadata dicts
+        self.features      = list(meta["features"])
+        self.feature_index = {f: i for i, f in enumerate(self.features)}
+        self.medians       = np.array(
+            [meta["feature_medians"][f] for f in self.features], dtype=float
+        )
+        self.min_matched   = max(1, int(0.4 * len(self.features)))
+
+        self.load_seconds = load_seconds
+        self.size_bytes   = size_bytes
+
+    def predict_risk(self, X: np.ndarray) -> np.ndarray:
+        """P(disease) for each row of raw (unscaled) feature values."""
+        if self.compiled is not None:
+            return self.compiled.predict_proba(X)[:, 1]
+        return self.model.predict_proba(self.scaler.transform(X))[:, 1]
+
+    def stats(self) -> dict:
+        return {
+            "disease":      self.meta.get("disease", self.name),
+            "best_model":   self.meta.get("best_model"),
+            "runtime":      self.runtime,
+            "n_features":   len(self.features),
+            "load_ms":      round(self.load_seconds * 1000, 2),
+            "size_bytes":   self.size_bytes,
+        }
+
+
+# ── Registry ──────────────────────────────────────────────────────────────────
+class ModelRegistry:
+    """
+    Discovers every <disease>_metadata.pkl / _model_calibrated.pkl / _scaler.pkl
+    triple in MODEL_DIR and keeps them in memory, preferring the compiled
+    <disease>_compiled.npz when MODEL_RUNTIME allows. Loaded once at startup;
+    request handlers only read from it.
+    """
+
+    def __init__(self, model_dir: str = MODEL_DIR):
+        self.model_dir = model_dir
+        self._models: dict[str, DiseaseModel] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self):
+        """(Re)load all model triples from disk."""
+        if not os.path.exists(self.model_dir):
+            raise FileNotFoundError(f"Model directory not found: {self.model_dir}")
+
+        models: dict[str, DiseaseModel] = {}
+        for meta_file in sorted(os.listdir(self.model_dir)):
+            if not meta_file.endswith(META_SUFFIX):
+                continue
+
+            disease_name = meta_file[: -len(META_SUFFIX)]
+            paths = [
+                os.path.join(self.model_dir, disease_name + suffix)
+                for suffix in (META_SUFFIX, MODEL_SUFFIX, SCALER_SUFFIX)
+            ]
+
+            start = time.perf_counter()
+            entry = self._load_compiled(disease_name, paths) if MODEL_RUNTIME != "sklearn" else None
+            if entry is None:
+                entry = self._load_pickled(disease_name, paths)
+            if entry is None:
+                continue
+            entry.load_seconds = time.perf_counter() - start
+
+            models[disease_name] = entry
+            log.info("model_loaded", disease=disease_name, runtime=entry.runtime,
+                     ms=round(entry.load_seconds * 1000, 1), kib=round(entry.size_bytes / 1024, 1))
+
+        self._models = models
+        self._loaded = True
+
+    def _load_compiled(self, disease_name: str, paths: list[str]) -> DiseaseModel | None:
+        compiled_path = os.path.join(self.model_dir, disease_name + COMPILED_SUFFIX)
+        if not os.path.exists(compiled_path):
+            if MODEL_RUNTIME == "numpy":
+                log.warning("compiled_model_missing", disease=disease_name, fix="python -m app.model_export")
+            return None
+        try:
+            compiled = CompiledModel(compiled_path)
+            # Retrained pickles make the export stale — never serve an outdated model
+            if all(os.path.exists(p) for p in paths):
+                if compiled.meta.get("source_sha256") != source_fingerprint(paths):
+                    log.warning("compiled_model_stale", disease=disease_name, fix="python -m app.model_export")
+                    return None
+        except Exception as e:
+            log.warning("compiled_model_error", disease=disease_name, error=str(e))
+            return None
+        return DiseaseModel(disease_name, compiled.meta, None, None, 0.0,
+                            os.path.getsize(compiled_path), compiled=compiled)
+
+    def _load_pickled(self, disease_name: str, paths: list[str]) -> DiseaseModel | None:
+        import joblib  # only needed (and pulls in sklearn) on this path
+        try:
+            meta, model, scaler = (joblib.load(p) for p in paths)
+        except FileNotFoundError:
+            log.warning("model_files_missing", disease=disease_name)
+            return None
+        except Exception as e:
+            log.warning("model_load_error", disease=disease_name, error=str(e))
+            return None
+        size = sum(os.path.getsize(p) for p in paths)
+        return DiseaseModel(disease_name, meta, model, scaler, 0.0, size)
+
+    def ensure_loaded(self):
+        """Load on first use when startup was skipped (scripts, notebooks)."""
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self.load()
+
+    def items(self):
+        self.ensure_loaded()
+        return self._models.items()
+
+    def get(self, disease_name: str) -> DiseaseModel | None:
+        self.ensure_loaded()
+        return self._models.get(disease_name)
+
+    def stats(self) -> dict:
+        return {name: m.stats() for name, m in self._models.items()}
+
+
+registry = ModelRegistry()
+
+
+def load_models():
+    """Loads all disease risk models into the shared registry (called at startup)."""
+    registry.load()
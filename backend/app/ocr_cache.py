@@ -0,0 +1,147 @@
+# File: ocr_cache.py
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import asyncio
+import threading
+
+from app.log import get_logger
+
+log = get_logger(__name__)
+
+# ── Config ────────────────────────────────────────────────────────────────────
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+OCR_CACHE_ENABLED     = os.getenv("OCR_CACHE_ENABLED", "1") not in ("0", "false", "False")
+OCR_CACHE_PATH        = os.getenv("OCR_CACHE_PATH", os.path.join(BASE_DIR, "..", "cache", "ocr_cache.sqlite3"))
+OCR_CACHE_TTL         = float(os.getenv("OCR_CACHE_TTL", str(7 * 24 * 3600)))
+OCR_CACHE_MAX_ENTRIES = int(os.getenv("OCR_CACHE_MAX_ENTRIES", "10000"))
+
+
+# ── Content-addressed OCR result cache ───────────────────────────────────────
+class OCRCache:
+    """
+    Extracted OCR JSON keyed by SHA-256 of the uploaded image bytes plus a
+    version string (prompt + model list), stored in a local SQLite file.
+    Entries expire after `ttl` seconds; past `max_entries` the least recently
+    used rows are evicted.
+    """
+
+    def __init__(self, path: str, version: str, ttl: float = OCR_CACHE_TTL,
+                 max_entries: int = OCR_CACHE_MAX_ENTRIES, enabled: bool = OCR_CACHE_ENABLED):
+        self.path        = path
+        self.version     = version
+        self.ttl         = ttl
+        self.max_entries = max_entries
+        self.enabled     = enabled
+
+        self.hits        = 0
+        self.misses      = 0
+        self.bytes_saved = 0
+
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache ("
+                " key TEXT PRIMARY KEY,"
+                " result TEXT NOT NULL,"
+                " image_bytes INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ocr_cache_lru ON ocr_cache(last_access)")
+            self._conn = conn
+        return self._conn
+
+    def key_for(self, image_bytes: bytes) -> str:
+        return f"{self.version}:{hashlib.sha256(image_bytes).hexdigest()}"
+
+    # ── Blocking operations (run in a worker thread) ─────────────────────────
+    def _get(self, key: str) -> dict | None:
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT result, created_at FROM ocr_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                db.execute("DELETE FROM ocr_cache WHERE key = ?", (key,))
+                db.commit()
+                return None
+            db.execute("UPDATE ocr_cache SET last_access = ? WHERE key = ?", (now, key))
+            db.commit()
+        return json.loads(row[0])
+
+    def _put(self, key: str, result: dict, image_size: int):
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO ocr_cache (key, result, image_bytes, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(result), image_size, now, now),
+            )
+            # Size-bounded LRU: drop expired rows, then the least recently used overflow
+            db.execute("DELETE FROM ocr_cache WHERE created_at < ?", (now - self.ttl,))
+            db.execute(
+                "DELETE FROM ocr_cache WHERE key IN ("
+                " SELECT key FROM ocr_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            db.commit()
+
+    # ── Async API ────────────────────────────────────────────────────────────
+    async def get(self, image_bytes: bytes) -> dict | None:
+        if not self.enabled:
+            return None
+        try:
+            result = await asyncio.to_thread(self._get, self.key_for(image_bytes))
+        except Exception as e:
+            log.warning("ocr_cache_read_failed", error=str(e))
+            result = None
+
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.bytes_saved += len(image_bytes)
+        return result
+
+    async def put(self, image_bytes: bytes, result: dict):
+        if not self.enabled:
+            return
+        try:
+            await asyncio.to_thread(self._put, self.key_for(image_bytes), result, len(image_bytes))
+        except Exception as e:
+            log.warning("ocr_cache_write_failed", error=str(e))
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        entries = None
+        if self.enabled:
+            try:
+                with self._lock:
+                    entries = self._db().execute("SELECT COUNT(*) FROM ocr_cache").fetchone()[0]
+            except Exception:
+                pass
+        return {
+            "enabled":     self.enabled,
+            "hits":        self.hits,
+            "misses":      self.misses,
+            "hit_rate":    round(self.hits / total, 4) if total else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "entries":     entries,
+            "max_entries": self.max_entries,
+            "ttl_s":       self.ttl,
+        }
@@ -0,0 +1,261 @@
+# File: openrouter_client.py
+
+import os
+import json
+import time
+import asyncio
+import httpx
+
+from app.metrics import OPENROUTER_SECONDS
+
+# --- 1. SETUP AND CONFIGURATION ---
+# Point this at a local stub (e.g. http://127.0.0.1:9100/api/v1) for tests
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1").rstrip("/")
+OPENROUTER_HTTP2    = os.getenv("OPENROUTER_HTTP2", "1") not in ("0", "false", "False")
+
+MAX_CONNECTIONS     = int(os.getenv("OPENROUTER_MAX_CONNECTIONS", "50"))
+MAX_KEEPALIVE       = int(os.getenv("OPENROUTER_MAX_KEEPALIVE", "20"))
+KEEPALIVE_EXPIRY    = float(os.getenv("OPENROUTER_KEEPALIVE_EXPIRY", "60"))
+DEFAULT_TIMEOUT     = float(os.getenv("OPENROUTER_TIMEOUT", "30"))
+CONNECT_TIMEOUT     = float(os.getenv("OPENROUTER_CONNECT_TIMEOUT", "10"))
+
+# Per-model circuit breakers: skip a model known to be failing
+BREAKER_THRESHOLD   = int(os.getenv("OPENROUTER_BREAKER_THRESHOLD", "3"))
+BREAKER_COOLDOWN    = float(os.getenv("OPENROUTER_BREAKER_COOLDOWN", "60"))
+RATE_LIMIT_COOLDOWN = float(os.getenv("OPENROUTER_RATE_LIMIT_COOLDOWN", "60"))
+
+# Application-scoped client — created on first use, closed on shutdown
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+# --- 2. CLIENT LIFECYCLE ---
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared keep-alive client, creating it on first use."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    # Pooled connections belong to one event loop — rebuild if a script
+    # or test harness starts a fresh loop
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client_loop = loop
+        _client = httpx.AsyncClient(
+            base_url=OPENROUTER_BASE_URL,
+            http2=OPENROUTER_HTTP2,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(DEFAULT_TIMEOUT, connect=CONNECT_TIMEOUT),
+        )
+    return _client
+
+
+async def close_client():
+    """Close the shared client and its pooled connections (called at shutdown)."""
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        _client_loop = None
+
+
+def _headers() -> dict:
+    return {
+        "Authorization": f"Bearer {os.getenv('OPENROUTER_API_KEY')}",
+        "Content-Type": "application/json",
+        "HTTP-Referer": "http://localhost:5173",
+        "X-Title": "HealthMate AI",
+    }
+
+
+# --- 3. PER-MODEL CIRCUIT BREAKERS ---
+
+class CircuitBreaker:
+    """
+    Opens after BREAKER_THRESHOLD consecutive failures, or immediately on a
+    429, and stays open for a cooldown. After the cooldown allow() lets one
+    trial call through (half-open) and refuses the rest until that call is
+    recorded: a success closes the breaker, a failure reopens it. A trial
+    that is never recorded (cancelled, lost) frees its slot after another
+    cooldown.
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold  = threshold
+        self.cooldown   = cooldown
+        self.failures   = 0
+        self.open_until = 0.0   # 0 = closed
+        self.probe_at   = 0.0   # when the half-open trial call was let through
+
+    def available(self) -> bool:
+        """Would allow() let a call through? Doesn't take the half-open trial slot."""
+        now = time.monotonic()
+        if now < self.open_until:
+            return False
+        return not self.open_until or now - self.probe_at >= self.cooldown
+
+    def allow(self) -> bool:
+        """Call right before the request — in half-open state this takes the trial slot."""
+        if not self.available():
+            return False
+        if self.open_until:
+            self.probe_at = time.monotonic()
+        return True
+
+    def abandon(self):
+        """The allowed call never ran to an outcome — free the trial slot."""
+        self.probe_at = 0.0
+
+    def record_success(self):
+        self.failures   = 0
+        self.open_until = 0.0
+        self.probe_at   = 0.0
+
+    def record_failure(self, cooldown: float | None = None):
+        self.failures += 1
+        if cooldown is not None or self.failures >= self.threshold:
+            self.open_until = time.monotonic() + (cooldown if cooldown is not None else self.cooldown)
+            self.probe_at   = 0.0
+
+    def state(self) -> dict:
+        now = time.monotonic()
+        remaining = max(0.0, self.open_until - now)
+        return {
+            "open": remaining > 0,
+            "half_open": bool(self.open_until) and remaining == 0,
+            "failures": self.failures,
+            "retry_in_s": round(remaining, 1),
+        }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def breaker(model: str) -> CircuitBreaker:
+    if model not in _breakers:
+        _breakers[model] = CircuitBreaker()
+    return _breakers[model]
+
+
+def breaker_states() -> dict:
+    return {model: b.state() for model, b in _breakers.items()}
+
+
+def _record_outcome(model: str, response: httpx.Response, record_success: bool = True):
+    if response.status_code == 200:
+        if record_success:
+            breaker(model).record_success()
+    elif response.status_code == 429:
+        try:
+            cooldown = float(response.headers.get("Retry-After", RATE_LIMIT_COOLDOWN))
+        except ValueError:
+            cooldown = RATE_LIMIT_COOLDOWN
+        breaker(model).record_failure(cooldown=cooldown)
+    else:
+        breaker(model).record_failure()
+
+
+# --- 4. CHAT COMPLETIONS ---
+
+async def chat_completion(
+    model: str,
+    messages: list[dict],
+    max_tokens: int | None = None,
+    timeout: float | None = None,
+    record_success: bool = True,
+    **extra,
+) -> httpx.Response:
+    """
+    POST /chat/completions over the pooled connection.
+    Returns the raw response so callers keep their own status/fallback handling;
+    the outcome is recorded on the model's circuit breaker. With
+    record_success=False a 200 isn't counted as a success — the caller does
+    that once it has validated the body, and records a failure otherwise.
+    """
+    payload = {"model": model, "messages": messages, **extra}
+    if max_tokens is not None:
+        payload["max_tokens"] = max_tokens
+
+    start = time.perf_counter()
+    try:
+        response = await get_client().post(
+            "/chat/completions",
+            headers=_headers(),
+            json=payload,
+            timeout=timeout if timeout is not None else DEFAULT_TIMEOUT,
+        )
+    except httpx.HTTPError as e:
+        OPENROUTER_SECONDS.observe(time.perf_counter() - start, model, type(e).__name__)
+        breaker(model).record_failure()
+        raise
+
+    OPENROUTER_SECONDS.observe(time.perf_counter() - start, model, str(response.status_code))
+    _record_outcome(model, response, record_success)
+    return response
+
+
+async def stream_chat_completion(
+    model: str,
+    messages: list[dict],
+    max_tokens: int | None = None,
+    timeout: float | None = None,
+    **extra,
+):
+    """
+    Streaming POST /chat/completions — yields content deltas as they arrive.
+    Raises httpx.HTTPStatusError before the first token if the model refuses,
+    RuntimeError / json.JSONDecodeError if the stream breaks off mid-reply.
+    """
+    payload = {"model": model, "messages": messages, "stream": True, **extra}
+    if max_tokens is not None:
+        payload["max_tokens"] = max_tokens
+
+    start, answered = time.perf_counter(), False
+    try:
+        async with get_client().stream(
+            "POST",
+            "/chat/completions",
+            headers=_headers(),
+            json=payload,
+            timeout=timeout if timeout is not None else DEFAULT_TIMEOUT,
+        ) as response:
+            OPENROUTER_SECONDS.observe(time.perf_counter() - start, model, str(response.status_code))
+            answered = True
+            _record_outcome(model, response, record_success=False)
+            if response.status_code != 200:
+                await response.aread()
+                response.raise_for_status()
+
+            async for line in response.aiter_lines():
+                # SSE comments (": OPENROUTER PROCESSING") and blank lines are keep-alives
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                if "error" in chunk:
+                    raise RuntimeError(f"{model} stream error: {chunk['error'].get('message', '')}")
+                choices = chunk.get("choices") or [{}]
+                delta = (choices[0].get("delta") or {}).get("content")
+                if delta:
+                    yield delta
+        # Success only once the stream has run to the end — a 200 that fails
+        # mid-reply every time must still be able to open the breaker
+        breaker(model).record_success()
+    except httpx.TransportError as e:
+        if not answered:
+            OPENROUTER_SECONDS.observe(time.perf_counter() - start, model, type(e).__name__)
+        breaker(model).record_failure()
+        raise
+    except (RuntimeError, json.JSONDecodeError):
+        # {"error": ...} chunk or a malformed SSE line
+        breaker(model).record_failure()
+        raise
+
+
+def completion_text(response: httpx.Response) -> str:
+    """Pull the assistant message text out of a chat-completions response."""
+    return response.json()["choices"][0]["message"]["content"]
@@ -2,19 +2,31 @@
 
 import os
 import json
-import joblib
+import time
+import asyncio
 import numpy as np
 import re
-from fastapi import APIRouter, HTTPException
+from collections import OrderedDict
+from functools import lru_cache
+from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Any
 
-# ── Config ────────────────────────────────────────────────────────────────────
-BASE_DIR  = os.path.dirname(os.path.abspath(__file__))
-# models/ sits in backend/, one level up from backend/app/
-MODEL_DIR = os.path.join(BASE_DIR, "..", "models")
+from app.model_registry import registry
+from app import openrouter_client
+from app.log import get_logger
+from app.warmup import warmup
+from app.inference_pool import inference, InferenceSaturated, InferenceTimeout
+from app.report_sessions import report_sessions
+from app.metrics import STAGE_SECONDS, MODEL_SECONDS, LLM_ATTEMPT_FAILURES, LLM_RESPONSES, LLM_EXHAUSTED
 
 router = APIRouter()
+log = get_logger(__name__)
+
+# Bounded LRU sizes for OCR key resolution / value cleaning (same report
+# layouts arrive over and over, so most lookups are hits)
+KEY_CACHE_SIZE   = int(os.getenv("NORMALIZE_KEY_CACHE_SIZE", "4096"))
+VALUE_CACHE_SIZE = int(os.getenv("NORMALIZE_VALUE_CACHE_SIZE", "16384"))
 
 # ── Alias Table ───────────────────────────────────────────────────────────────
 # Maps standard feature names → all OCR variants we might see
@@ -116,39 +128,130 @@ def clean_numeric(value):
     return None
 
 
+# ── Precompiled Alias Matcher ─────────────────────────────────────────────────
+# Built once at import time. Standard keys are ranked by their longest alias
+# (so MCHC is tried before MCH) and a raw key may resolve to several standard
+# keys, exactly as the alias table is written.
+def _trie_regex(words) -> str:
+    """Compile a word list into a trie-shaped regex that prefers longer words."""
+    trie: dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in node.items() if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+def _build_alias_index():
+    rank = {
+        std_key: i
+        for i, (std_key, _) in enumerate(
+            sorted(ALIASES.items(), key=lambda x: max(len(a) for a in x[1]), reverse=True)
+        )
+    }
+
+    targets: dict[str, set] = {}
+    for std_key, variants in ALIASES.items():
+        for alias in variants:
+            targets.setdefault(alias.strip(), set()).add(std_key)
+
+    # Zero-width lookahead so overlapping aliases at different offsets are all
+    # found; at each offset the regex yields the longest alias with a word boundary.
+    pattern = re.compile(r"(?<![a-z])(?=(" + _trie_regex(targets) + r")(?![a-z]))")
+
+    # A shorter alias that prefixes a longer one and is followed by a non-letter
+    # always matches wherever the longer one does — fold it in ahead of time.
+    hits = {}
+    for alias, std_keys in targets.items():
+        merged = set(std_keys)
+        for other, other_keys in targets.items():
+            if (len(other) < len(alias) and alias.startswith(other)
+                    and not ("a" <= alias[len(other)] <= "z")):
+                merged |= other_keys
+        hits[alias] = tuple(merged)
+
+    return rank, pattern, hits
+
+
+_STD_KEY_RANK, _ALIAS_PATTERN, _ALIAS_HITS = _build_alias_index()
+_IGNORE_PATTERN = re.compile("|".join(re.escape(kw) for kw in IGNORE_KEYWORDS))
+
+
+def match_standard_keys(key_clean: str) -> tuple:
+    """All standard feature names whose aliases appear in a cleaned OCR key, by priority."""
+    hits = set()
+    for m in _ALIAS_PATTERN.finditer(key_clean):
+        hits.update(_ALIAS_HITS[m.group(1)])
+    return tuple(sorted(hits, key=_STD_KEY_RANK.__getitem__))
+
+
+# ── Memoized Key / Value Resolution ───────────────────────────────────────────
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def resolve_key(key_raw: str) -> tuple:
+    """Standard feature names for a raw OCR key — () when ignored or unmatched."""
+    key_clean = key_raw.lower().strip()
+    if _IGNORE_PATTERN.search(key_clean):
+        return ()
+    return match_standard_keys(key_clean)
+
+
+@lru_cache(maxsize=VALUE_CACHE_SIZE, typed=True)
+def _clean_numeric_cached(value):
+    return clean_numeric(value)
+
+
+def clean_value(value):
+    """clean_numeric with a bounded LRU in front of it."""
+    try:
+        return _clean_numeric_cached(value)
+    except TypeError:
+        # Unhashable value (list/dict from a malformed OCR payload)
+        return clean_numeric(value)
+
+
+def _cache_stats(fn) -> dict:
+    info = fn.cache_info()
+    total = info.hits + info.misses
+    return {
+        "hits":     info.hits,
+        "misses":   info.misses,
+        "hit_rate": round(info.hits / total, 4) if total else 0.0,
+        "size":     info.currsize,
+        "max_size": info.maxsize,
+    }
+
+
+def normalization_cache_stats() -> dict:
+    return {
+        "key_resolution": _cache_stats(resolve_key),
+        "value_cleaning": _cache_stats(_clean_numeric_cached),
+    }
+
+
 # ── Normalize OCR output → ML-ready features ─────────────────────────────────
 def normalize_input_data(raw_json: dict) -> dict:
     normalized = {}
 
-    # Sort aliases by specificity (longest alias first) to match MCHC before MCH etc.
-    sorted_aliases = sorted(ALIASES.items(), key=lambda x: max(len(a) for a in x[1]), reverse=True)
-
     for key_raw, value in raw_json.items():
-        key_clean = key_raw.lower().strip()
-
-        if any(kw in key_clean for kw in IGNORE_KEYWORDS):
+        # First match wins per standard key
+        std_keys = [k for k in resolve_key(key_raw) if k not in normalized]
+        if not std_keys:
             continue
 
-        for std_key, variants in sorted_aliases:
-            if std_key in normalized:
-                continue
-
-            matched = False
-            for alias in sorted(variants, key=len, reverse=True):
-                alias_clean = alias.strip()
-                # Exact match OR alias is fully contained in key as whole word
-                if key_clean == alias_clean:
-                    matched = True
-                    break
-                # alias contained in key with word boundaries
-                if re.search(r'(?<![a-z])' + re.escape(alias_clean) + r'(?![a-z])', key_clean):
-                    matched = True
-                    break
-
-            if matched:
-                cleaned = clean_numeric(value)
-                if cleaned is not None:
-                    normalized[std_key] = cleaned
+        cleaned = clean_value(value)
+        if cleaned is None:
+            continue
+        for std_key in std_keys:
+            normalized[std_key] = cleaned
 
     return normalized
 
@@ -161,90 +264,206 @@ def encode_categorical(feature, value):
     return value
 
 
-# ── Run All Models ────────────────────────────────────────────────────────────
-def run_prediction_for_all_models(normalized_data: dict) -> dict:
-    results = {}
+# ── Score One Disease Over Many Reports ─────────────────────────────────────
+def _result(ran: bool, matched: list, missing: list, prob: float = None, reason: str = None) -> dict:
+    if ran:
+        return {
+            "ran":              True,
+            "risk_probability": prob,
+            "risk_percent":     f"{prob * 100:.1f}%",
+            "matched_features": matched,
+            "missing_features": missing,
+        }
+    return {
+        "ran":    False,
+        "reason": reason,
+        "matched_features": matched,
+        "missing_features": missing,
+    }
+
+
+def predict_disease_batch(entry, normalized_rows: list[dict]) -> list[dict]:
+    """
+    Scores one disease model over many normalized reports with a single
+    model call (compiled NumPy, or scaler.transform + predict_proba).
+    Missing features are imputed with the training medians; rows with too
+    few features are skipped.
+    """
+    required = entry.features
+    n = len(normalized_rows)
 
-    if not os.path.exists(MODEL_DIR):
-        raise FileNotFoundError(f"Model directory not found: {MODEL_DIR}")
+    out      = [None] * n
+    coverage = []
+    runnable = []
+    X = np.full((n, len(required)), np.nan)
 
-    for meta_file in sorted(os.listdir(MODEL_DIR)):
-        if not meta_file.endswith("_metadata.pkl"):
-            continue
+    for i, row in enumerate(normalized_rows):
+        matched = [f for f in required if f in row]
+        missing = [f for f in required if f not in row]
+        coverage.append((matched, missing))
 
-        disease_name = meta_file.replace("_metadata.pkl", "")
+        # Need at least 40% of features to run
+        if len(matched) < entry.min_matched:
+            out[i] = _result(False, matched, missing,
+                             reason=f"Not enough data — matched {len(matched)}/{len(required)} features")
+            continue
 
         try:
-            meta   = joblib.load(os.path.join(MODEL_DIR, f"{disease_name}_metadata.pkl"))
-            model  = joblib.load(os.path.join(MODEL_DIR, f"{disease_name}_model_calibrated.pkl"))
-            scaler = joblib.load(os.path.join(MODEL_DIR, f"{disease_name}_scaler.pkl"))
-        except FileNotFoundError:
-            print(f"⚠ Missing model files for: {disease_name}")
-            continue
-        except Exception as e:
-            print(f"⚠ Error loading {disease_name}: {e}")
+            for feat in matched:
+                X[i, entry.feature_index[feat]] = encode_categorical(feat, row[feat])
+        except (TypeError, ValueError) as e:
+            out[i] = _result(False, matched, missing, reason=f"Prediction error: {str(e)}")
             continue
+        runnable.append(i)
 
-        required = meta["features"]
-        medians  = meta["feature_medians"]
+    if not runnable:
+        return out
 
-        matched = [f for f in required if f in normalized_data]
-        missing = [f for f in required if f not in normalized_data]
+    # Median imputation for every missing cell in one pass
+    X_run = X[runnable]
+    X_run = np.where(np.isnan(X_run), entry.medians, X_run)
 
-        # Need at least 40% of features to run
-        if len(matched) < max(1, int(0.4 * len(required))):
-            results[disease_name] = {
-                "ran": False,
-                "reason": f"Not enough data — matched {len(matched)}/{len(required)} features",
-                "matched_features": matched,
-                "missing_features": missing,
-            }
+    try:
+        with MODEL_SECONDS.time(entry.name):
+            probs = entry.predict_risk(X_run)
+    except Exception:
+        # One bad row must not fail the whole batch — fall back to row-by-row
+        probs = None
+
+    for pos, i in enumerate(runnable):
+        matched, missing = coverage[i]
+        if probs is not None:
+            out[i] = _result(True, matched, missing, prob=float(probs[pos]))
             continue
-
-        # Build feature vector (use median for missing features)
-        feature_vec = []
-        for feat in required:
-            val = normalized_data.get(feat, medians[feat])
-            val = encode_categorical(feat, val)
-            feature_vec.append(val)
-
         try:
-            X        = np.array(feature_vec).reshape(1, -1)
-            X_scaled = scaler.transform(X)
-            prob     = float(model.predict_proba(X_scaled)[0][1])
-
-            results[disease_name] = {
-                "ran":              True,
-                "risk_probability": prob,
-                "risk_percent":     f"{prob * 100:.1f}%",
-                "matched_features": matched,
-                "missing_features": missing,
-            }
+            prob = float(entry.predict_risk(X_run[pos:pos + 1])[0])
+            out[i] = _result(True, matched, missing, prob=prob)
         except Exception as e:
-            results[disease_name] = {
-                "ran":    False,
-                "reason": f"Prediction error: {str(e)}",
-                "matched_features": matched,
-                "missing_features": missing,
-            }
+            out[i] = _result(False, matched, missing, reason=f"Prediction error: {str(e)}")
+
+    return out
+
+
+# ── Run All Models ────────────────────────────────────────────────────────────
+def run_prediction_batch(normalized_rows: list[dict]) -> list[dict]:
+    """Runs every disease model over a list of normalized reports."""
+    results = [{} for _ in normalized_rows]
+
+    for disease_name, entry in registry.items():
+        for row_results, res in zip(results, predict_disease_batch(entry, normalized_rows)):
+            row_results[disease_name] = res
 
     return results
 
 
+def run_prediction_for_all_models(normalized_data: dict) -> dict:
+    return run_prediction_batch([normalized_data])[0]
+
+
 # ── Main Pipeline Function (called by main.py) ────────────────────────────────
+def _risk_summary(predictions: dict) -> dict:
+    return {k: v.get("risk_percent", v.get("reason", "?")) for k, v in predictions.items()}
+
+
+def score_report(raw_json_data: dict) -> tuple[dict, dict]:
+    """Normalize + every disease model; returns (normalized, predictions)."""
+    with STAGE_SECONDS.time("normalize"):
+        normalized = normalize_input_data(raw_json_data)
+    log.debug("normalized_features", count=len(normalized), normalized=normalized)
+
+    with STAGE_SECONDS.time("inference"):
+        predictions = run_prediction_for_all_models(normalized)
+    # Summary is only built if a debug record is actually written
+    log.debug("predictions", predictions=lambda: _risk_summary(predictions))
+
+    return normalized, predictions
+
+
 def process_report_data(raw_json_data: dict) -> dict:
-    print("\n🔄 Normalizing raw OCR data...")
-    normalized = normalize_input_data(raw_json_data)
-    print("📦 Normalized features:", json.dumps(normalized, indent=2))
+    return score_report(raw_json_data)[1]
+
+
+def process_report_batch(raw_reports: list[dict]) -> list[dict]:
+    """Batch version of process_report_data — one result dict per report, same shape."""
+    with STAGE_SECONDS.time("normalize"):
+        normalized_rows = [normalize_input_data(r) for r in raw_reports]
+    log.debug("predict_batch", reports=len(normalized_rows))
+    with STAGE_SECONDS.time("inference"):
+        return run_prediction_batch(normalized_rows)
 
-    print("\n🤖 Running prediction models...")
-    predictions = run_prediction_for_all_models(normalized)
-    print("📊 Results:", json.dumps(
-        {k: v.get("risk_percent", v.get("reason", "?")) for k, v in predictions.items()},
-        indent=2
-    ))
 
-    return predictions
+# ── Incremental Re-scoring (edited reports) ──────────────────────────────────
+_ABSENT = object()
+
+
+def normalize_keys(raw_json: dict, std_keys) -> dict:
+    """
+    normalize_input_data restricted to `std_keys`. Each standard key takes
+    the first raw field (in order) that resolves to it and has a usable
+    value, independently of the others — so recomputing only the keys an
+    edit touched gives exactly what a full normalization would.
+    """
+    wanted = set(std_keys)
+    out = {}
+    for key_raw, value in raw_json.items():
+        targets = [k for k in resolve_key(key_raw) if k in wanted and k not in out]
+        if not targets:
+            continue
+        cleaned = clean_value(value)
+        if cleaned is None:
+            continue
+        for std_key in targets:
+            out[std_key] = cleaned
+        if len(out) == len(wanted):
+            break
+    return out
+
+
+def apply_report_delta(raw: dict, normalized: dict, predictions: dict, changes: dict) -> dict:
+    """
+    Applies edited raw fields (None removes a field) to a scored report and
+    re-runs only the disease models whose features changed. Same result as
+    score_report on the edited report, at the cost of the affected models.
+    """
+    raw = dict(raw)
+    touched = set()
+    for key_raw, value in changes.items():
+        if value is None:
+            raw.pop(key_raw, None)
+        else:
+            raw[key_raw] = value
+        touched.update(resolve_key(key_raw))
+
+    with STAGE_SECONDS.time("normalize"):
+        recomputed = normalize_keys(raw, touched)
+    normalized = dict(normalized)
+    changed = set()
+    for std_key in touched:
+        new = recomputed.get(std_key, _ABSENT)
+        if new != normalized.get(std_key, _ABSENT):
+            changed.add(std_key)
+            if new is _ABSENT:
+                del normalized[std_key]
+            else:
+                normalized[std_key] = new
+
+    predictions = dict(predictions)
+    rescored = []
+    with STAGE_SECONDS.time("inference"):
+        for disease_name, entry in registry.items():
+            if changed.isdisjoint(entry.features):
+                continue
+            predictions[disease_name] = predict_disease_batch(entry, [normalized])[0]
+            rescored.append(disease_name)
+    log.debug("report_delta", fields=len(changes), changed_features=sorted(changed), rescored=rescored)
+
+    return {
+        "raw":              raw,
+        "normalized":       normalized,
+        "predictions":      predictions,
+        "changed_features": sorted(changed),
+        "rescored":         rescored,
+    }
 
 
 # ── API Route: /predict-risk ──────────────────────────────────────────────────
@@ -253,37 +472,239 @@ def process_report_data(raw_json_data: dict) -> dict:
 class PredictRequest(BaseModel):
     features: dict[str, Any]
 
-@router.post("/predict-risk")
+
+async def run_inference(fn, *args, stage: str, wait: bool = False):
+    """
+    fn(*args) on the inference pool, with its backpressure mapped to HTTP:
+    503 + Retry-After when the pool is saturated, 504 when the task times out.
+    """
+    try:
+        return await inference.run(fn, *args, stage=stage, wait=wait)
+    except InferenceSaturated:
+        raise HTTPException(status_code=503, detail="Inference queue is full, try again shortly",
+                            headers={"Retry-After": "1"})
+    except InferenceTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+@router.post("/predict-risk", dependencies=[Depends(warmup.requires("disease_models"))])
 async def predict_risk(body: PredictRequest):
     """
     Accepts the (optionally edited) extracted_data from the frontend,
-    runs all disease models, returns predictions.
+    runs all disease models, returns predictions and a report_id for
+    later edits through /predict-risk/delta.
     """
     if not body.features:
         raise HTTPException(status_code=400, detail="No features provided")
 
     try:
-        predictions = process_report_data(body.features)
+        normalized, predictions = await run_inference(score_report, body.features, stage="predict_task")
+        report_id = report_sessions.create(body.features, normalized, predictions)
+        return {"report_id": report_id, "predictions": predictions}
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.exception("predict_risk_error")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ── API Route: /predict-risk/delta ────────────────────────────────────────────
+# ReportResult.tsx after the user corrects a few OCR values: only the changed
+# fields are sent, only the diseases using them are re-scored
+
+class PredictDeltaRequest(BaseModel):
+    report_id: str
+    changes: dict[str, Any]   # raw field → new value; null removes the field
+
+@router.post("/predict-risk/delta", dependencies=[Depends(warmup.requires("disease_models"))])
+async def predict_risk_delta(body: PredictDeltaRequest):
+    """
+    Applies `changes` to a report scored earlier (by /predict-risk or
+    /upload-image/) and returns the merged predictions. 404 when the
+    report_id is unknown here — resubmit the whole report.
+    """
+    session = report_sessions.get(body.report_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired report_id — resubmit to /predict-risk")
+
+    try:
+        async with session["lock"]:
+            result = await run_inference(apply_report_delta, session["raw"], session["normalized"],
+                                         session["predictions"], body.changes, stage="predict_delta_task")
+            report_sessions.update(body.report_id, result["raw"], result["normalized"], result["predictions"])
+        return {
+            "report_id":        body.report_id,
+            "predictions":      result["predictions"],
+            "changed_features": result["changed_features"],
+            "rescored":         result["rescored"],
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.exception("predict_risk_delta_error")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ── API Route: /predict-risk/batch ────────────────────────────────────────────
+# Back-office uploads: many reports scored in one vectorized pass per disease
+
+MAX_BATCH_SIZE = int(os.getenv("PREDICT_BATCH_MAX_SIZE", "1000"))
+
+class BatchPredictRequest(BaseModel):
+    reports: list[dict[str, Any]]
+
+@router.post("/predict-risk/batch", dependencies=[Depends(warmup.requires("disease_models"))])
+async def predict_risk_batch(body: BatchPredictRequest):
+    """
+    Accepts a list of feature dicts (same format as /predict-risk) and
+    returns one predictions dict per report, in the same order.
+    """
+    if not body.reports:
+        raise HTTPException(status_code=400, detail="No reports provided")
+    if len(body.reports) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch too large — max {MAX_BATCH_SIZE} reports")
+
+    try:
+        predictions = await run_inference(process_report_batch, body.reports, stage="predict_batch_task")
         return {"predictions": predictions}
+    except HTTPException:
+        raise
     except Exception as e:
-        print("❌ predict-risk error:", e)
+        log.exception("predict_risk_batch_error")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ── API Route: /models ────────────────────────────────────────────────────────
+# Load time and on-disk size of every model held in the registry
+
+@router.get("/models")
+def list_models():
+    return {"loaded": registry.loaded, "models": registry.stats()}
+
+
+# ── API Route: /cache-stats ───────────────────────────────────────────────────
+# Hit/miss counters for the OCR normalization caches, used to size them
+
+@router.get("/cache-stats")
+def cache_stats():
+    return {
+        "normalization":   normalization_cache_stats(),
+        "explanations":    explain_cache_stats(),
+        "report_sessions": report_sessions.stats(),
+    }
+
+
 # ── API Route: /explain ───────────────────────────────────────────────────────
 # Called when user clicks "Get AI Explanation & Precautions"
 
-import httpx
-import os
-
 class ExplainRequest(BaseModel):
     disease: str
     risk_percent: str
     matched_features: list[str]
     extracted_data: dict[str, Any]
 
+# ── Explanation Cache + Request Coalescing ────────────────────────────────────
+# Identical (disease, risk bucket, values) requests share one upstream call
+# while in flight and are served from memory afterwards.
+EXPLAIN_CACHE_SIZE  = int(os.getenv("EXPLAIN_CACHE_SIZE", "2048"))
+EXPLAIN_CACHE_TTL   = float(os.getenv("EXPLAIN_CACHE_TTL", str(24 * 3600)))
+EXPLAIN_RISK_BUCKET = float(os.getenv("EXPLAIN_RISK_BUCKET", "1"))   # percentage points
+
+_explain_cache: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+_explain_inflight: dict[str, asyncio.Future] = {}
+_explain_stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+
+def _canonical_value(value):
+    cleaned = clean_value(value)
+    if isinstance(cleaned, float):
+        return round(cleaned, 2)
+    if cleaned is not None:
+        return cleaned
+    return str(value).strip().lower()
+
+
+def explain_cache_key(body: ExplainRequest) -> str:
+    """Canonical form of an ExplainRequest: risk bucketed, values normalized."""
+    try:
+        risk = float(body.risk_percent.strip().rstrip("%"))
+        risk = round(round(risk / EXPLAIN_RISK_BUCKET) * EXPLAIN_RISK_BUCKET, 2)
+    except ValueError:
+        risk = body.risk_percent.strip().lower()
+
+    values = sorted(
+        (k, _canonical_value(v)) for k, v in body.extracted_data.items()
+        if k in body.matched_features
+    )
+    return json.dumps([body.disease.strip().lower(), risk, values], default=str)
+
+
+def _explain_cache_get(key: str) -> dict | None:
+    entry = _explain_cache.get(key)
+    if entry is None:
+        return None
+    stored_at, result = entry
+    if time.monotonic() - stored_at > EXPLAIN_CACHE_TTL:
+        del _explain_cache[key]
+        return None
+    _explain_cache.move_to_end(key)
+    return result
+
+
+def _explain_cache_put(key: str, result: dict):
+    _explain_cache[key] = (time.monotonic(), result)
+    _explain_cache.move_to_end(key)
+    while len(_explain_cache) > EXPLAIN_CACHE_SIZE:
+        _explain_cache.popitem(last=False)
+
+
+def explain_cache_stats() -> dict:
+    total = _explain_stats["hits"] + _explain_stats["misses"]
+    return {
+        **_explain_stats,
+        "hit_rate": round(_explain_stats["hits"] / total, 4) if total else 0.0,
+        "size":     len(_explain_cache),
+        "max_size": EXPLAIN_CACHE_SIZE,
+        "in_flight": len(_explain_inflight),
+    }
+
+
 @router.post("/explain")
 async def explain_risk(body: ExplainRequest):
+    """
+    Cached, single-flight front for generate_explanation — repeat and
+    concurrent duplicate clicks cost one upstream call.
+    """
+    key = explain_cache_key(body)
+
+    cached = _explain_cache_get(key)
+    if cached is not None:
+        _explain_stats["hits"] += 1
+        return cached
+
+    task = _explain_inflight.get(key)
+    if task is not None:
+        _explain_stats["coalesced"] += 1
+    else:
+        _explain_stats["misses"] += 1
+        task = asyncio.ensure_future(generate_explanation(body))
+        _explain_inflight[key] = task
+
+        def _done(t: asyncio.Future):
+            _explain_inflight.pop(key, None)
+            if t.cancelled() or t.exception() is not None:
+                return
+            result = t.result()
+            # Only complete explanations are cached — not the raw-text fallback
+            if result.get("explanation") and result.get("precautions"):
+                _explain_cache_put(key, result)
+
+        task.add_done_callback(_done)
+
+    # Shielded so one client disconnecting doesn't cancel the shared call
+    return await asyncio.shield(task)
+
+
+async def generate_explanation(body: ExplainRequest) -> dict:
     """
     Uses a free OpenRouter text model to generate:
     - Plain-language explanation of the risk
@@ -332,30 +753,23 @@ Return ONLY this exact JSON (no markdown, no extra text):
     last_error = None
     for model in TEXT_MODELS:
         try:
-            print(f"🤖 Explain: trying {model}...")
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                        "Content-Type": "application/json",
-                        "HTTP-Referer": "http://localhost:5173",
-                        "X-Title": "HealthMate AI",
-                    },
-                    json={
-                        "model": model,
-                        "messages": [{"role": "user", "content": prompt}],
-                        "max_tokens": 600,
-                    },
-                )
+            log.debug_sampled("explain_attempt", model=model)
+            response = await openrouter_client.chat_completion(
+                model,
+                [{"role": "user", "content": prompt}],
+                max_tokens=600,
+                timeout=30,
+            )
 
             if response.status_code != 200:
                 err = response.json().get("error", {})
-                print(f"⚠️ {model} failed: {err.get('message','')[:80]}")
+                log.warning("explain_model_failed", model=model, status=response.status_code,
+                            error=str(err.get("message", ""))[:80])
+                LLM_ATTEMPT_FAILURES.inc("explain", model)
                 last_error = str(err)
                 continue
 
-            content = response.json()["choices"][0]["message"]["content"].strip()
+            content = openrouter_client.completion_text(response).strip()
 
             # Strip markdown fences
             if content.startswith("```"):
@@ -366,7 +780,8 @@ Return ONLY this exact JSON (no markdown, no extra text):
                 content = content.strip()
 
             parsed = json.loads(content)
-            print(f"✅ Explanation generated by {model}")
+            log.info("explain_generated", model=model)
+            LLM_RESPONSES.inc("explain", model)
             return {
                 "explanation": parsed.get("explanation", ""),
                 "precautions": parsed.get("precautions", []),
@@ -374,16 +789,19 @@ Return ONLY this exact JSON (no markdown, no extra text):
 
         except json.JSONDecodeError:
             # Model returned text not JSON — extract what we can
-            print(f"⚠️ {model} returned non-JSON, using raw text")
+            log.warning("explain_non_json", model=model)
+            LLM_RESPONSES.inc("explain", model)
             return {
                 "explanation": content[:500] if 'content' in dir() else "Unable to generate explanation.",
                 "precautions": [],
             }
         except Exception as e:
-            print(f"❌ Error with {model}: {e}")
+            log.warning("explain_model_failed", model=model, error=str(e))
+            LLM_ATTEMPT_FAILURES.inc("explain", model)
             last_error = str(e)
             continue
 
+    LLM_EXHAUSTED.inc("explain")
     raise HTTPException(
         status_code=502,
         detail=f"Could not generate explanation. Try again in a moment. Last error: {last_error}"
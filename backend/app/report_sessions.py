@@ -0,0 +1,82 @@
+# File: report_sessions.py
+
+import os
+import time
+import asyncio
+import secrets
+from collections import OrderedDict
+from typing import Optional
+
+# --- 1. CONFIGURATION ---
+REPORT_SESSION_MAX = int(os.getenv("REPORT_SESSION_MAX", "5000"))     # sessions kept in memory, LRU-evicted
+REPORT_SESSION_TTL = float(os.getenv("REPORT_SESSION_TTL", "1800"))   # seconds since last use
+
+
+# --- 2. REPORT SESSIONS ---
+
+class ReportSessionStore:
+    """
+    Bounded LRU of report_id → the last scored state of one report: the
+    raw fields as submitted, their normalized features and the predictions.
+    Lets an edit send only the changed fields (/predict-risk/delta) and
+    re-score only the diseases that use them.
+
+    Held in this worker's memory only. A report_id that is unknown here —
+    expired, evicted, or created by another worker — answers 404 and the
+    client resubmits the full report.
+    """
+
+    def __init__(self, max_sessions: int = REPORT_SESSION_MAX, ttl: float = REPORT_SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl          = ttl
+        self._sessions: OrderedDict[str, dict] = OrderedDict()
+        self.created = 0
+        self.hits    = 0
+        self.misses  = 0
+
+    def create(self, raw: dict, normalized: dict, predictions: dict) -> str:
+        report_id = secrets.token_urlsafe(16)   # unguessable: the ID is the only key to the values
+        self._sessions[report_id] = {
+            "raw":         dict(raw),
+            "normalized":  normalized,
+            "predictions": predictions,
+            "used_at":     time.monotonic(),
+            # Serializes edits to one report so two quick deltas can't both
+            # start from the same state and drop one another's change
+            "lock":        asyncio.Lock(),
+        }
+        self.created += 1
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return report_id
+
+    def get(self, report_id: str) -> Optional[dict]:
+        session = self._sessions.get(report_id)
+        if session is None or time.monotonic() - session["used_at"] > self.ttl:
+            self._sessions.pop(report_id, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        session["used_at"] = time.monotonic()
+        self._sessions.move_to_end(report_id)
+        return session
+
+    def update(self, report_id: str, raw: dict, normalized: dict, predictions: dict):
+        session = self._sessions.get(report_id)
+        if session is None:
+            return
+        session.update(raw=raw, normalized=normalized, predictions=predictions, used_at=time.monotonic())
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size":     len(self._sessions),
+            "max_size": self.max_sessions,
+            "created":  self.created,
+            "hits":     self.hits,
+            "misses":   self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+report_sessions = ReportSessionStore()
@@ -1,19 +1,21 @@
 # File: support_chat_api.py
 
 import os
-import requests
+import httpx
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from dotenv import load_dotenv
+
+from app import openrouter_client
+from app.log import get_logger
 
 # --- 1. SETUP AND CONFIGURATION ---
-load_dotenv()
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 
 if not OPENROUTER_API_KEY:
     raise Exception("❌ ERROR: OPENROUTER_API_KEY missing in .env file!")
 
 router = APIRouter()
+log = get_logger(__name__)
 
 # --- 2. PYDANTIC MODELS (Data Shapes) ---
 
@@ -32,54 +34,42 @@ async def handle_support_query(payload: SupportChatIn):
     and returns the AI's reply.
     """
     user_message = payload.message
-    print(f"💬 Received support query: '{user_message}'")
-
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-    }
+    log.info("support_query", chars=len(user_message))
+    log.debug("support_query_text", message=user_message)
 
-    # The payload for the OpenRouter API
-    json_payload = {
-        "model": "nvidia/nemotron-nano-12b-v2-vl:free",
-        "messages": [
-            {
-                "role": "system",
-                "content": (
-                    "You are a friendly and helpful customer support assistant for a web application called 'HealthMate AI'. "
-                    "Your primary role is to answer questions about the app's features and how to use them. "
-                    "The app has the following features: Dashboard, Risk Predictor (for uploading medical reports), "
-                    "Medication Planner, Symptom Decoder, and an AI Health Companion chat. "
-                    "You MUST NOT provide any medical advice or health information. "
-                    "If a user asks a health-related question, you must politely redirect them to use the 'AI Health Companion' feature or consult a real doctor. "
-                    "Keep your answers concise and focused on helping the user navigate the app."
-                )
-            },
-            {
-                "role": "user",
-                "content": user_message
-            }
-        ]
-    }
+    # The conversation sent to the OpenRouter API
+    model = "nvidia/nemotron-nano-12b-v2-vl:free"
+    messages = [
+        {
+            "role": "system",
+            "content": (
+                "You are a friendly and helpful customer support assistant for a web application called 'HealthMate AI'. "
+                "Your primary role is to answer questions about the app's features and how to use them. "
+                "The app has the following features: Dashboard, Risk Predictor (for uploading medical reports), "
+                "Medication Planner, Symptom Decoder, and an AI Health Companion chat. "
+                "You MUST NOT provide any medical advice or health information. "
+                "If a user asks a health-related question, you must politely redirect them to use the 'AI Health Companion' feature or consult a real doctor. "
+                "Keep your answers concise and focused on helping the user navigate the app."
+            )
+        },
+        {
+            "role": "user",
+            "content": user_message
+        }
+    ]
 
     try:
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers=headers,
-            json=json_payload,
-            timeout=30
-        )
+        response = await openrouter_client.chat_completion(model, messages, timeout=30)
         response.raise_for_status()
 
-        result = response.json()
-        ai_response_text = result["choices"][0]["message"]["content"]
+        ai_response_text = openrouter_client.completion_text(response)
         
-        print(f"🤖 Support Bot Response: '{ai_response_text}'")
+        log.debug("support_response", response=ai_response_text)
         return SupportChatOut(response=ai_response_text)
 
-    except requests.exceptions.RequestException as e:
-        print(f"❌ API Request Error: {e}")
+    except httpx.HTTPError as e:
+        log.warning("support_upstream_error", error=str(e))
         raise HTTPException(status_code=503, detail="The support service is currently unavailable.")
     except Exception as e:
-        print(f"❌ An unexpected error occurred: {e}")
+        log.exception("support_error")
         raise HTTPException(status_code=500, detail="An internal error occurred.")
\ No newline at end of file
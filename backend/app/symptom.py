@@ -1,69 +1,192 @@
 # File: symptom.py
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Depends
 from pydantic import BaseModel
-from typing import List
-import joblib
+from typing import List, Optional, TYPE_CHECKING
 import os
 import numpy as np
 
+from app.symptom_index import SymptomIndex
+from app.log import get_logger
+from app.warmup import warmup
+
+# joblib and scipy (and sklearn, through unpickling) are imported by
+# load_artifacts(), so importing this module stays cheap
+if TYPE_CHECKING:
+    from scipy import sparse
+
 # 1. Create an APIRouter instead of a FastAPI app
 # This router will be imported and included by main.py
 router = APIRouter()
+log = get_logger(__name__)
 
 # --- Pydantic Model for this specific API ---
 class SymptomsIn(BaseModel):
     symptoms: List[str]
 
 
+class SymptomsBatchIn(BaseModel):
+    items: List[List[str]]
+
+
 # --- Globals and paths specific to the prediction logic ---
 MODEL_PATH = os.path.join("models", "symbipredict_model.joblib")
 MLB_PATH = os.path.join("models", "mlb.joblib")
 FEATURE_NAMES_PATH = os.path.join("models", "feature_names.joblib")
 
+MAX_BATCH_SIZE = int(os.getenv("SYMPTOM_BATCH_MAX_SIZE", "1000"))
+
 # These will be populated at startup by the main app
 model = None
 mlb = None
 feature_names = None
 
+# Cleaned symptom -> model input column(s), built once in load_artifacts()
+feature_index = None
+n_features = None
+
+# Fuzzy/synonym resolution + autocomplete over the same feature keys
+symptom_index = None
+
 
 # --- The loading function (without the @app.on_event decorator) ---
 def load_artifacts():
     """Loads ML artifacts from disk into this module's global variables."""
     global model, mlb, feature_names
-    
-    print("Attempting to load ML model artifacts from symptom.py...")
+    import joblib
+
     if not os.path.exists(MODEL_PATH):
         raise RuntimeError(f"Model not found at {MODEL_PATH}. Run training script first.")
     
     model = joblib.load(MODEL_PATH)
-    print(f"Model loaded successfully from {MODEL_PATH}")
+    log.info("symptom_model_loaded", path=MODEL_PATH)
 
     if os.path.exists(MLB_PATH):
         mlb = joblib.load(MLB_PATH)
-        print(f"MultiLabelBinarizer (mlb) loaded from {MLB_PATH}")
+        log.info("symptom_mlb_loaded", path=MLB_PATH)
     elif os.path.exists(FEATURE_NAMES_PATH):
         feature_names = joblib.load(FEATURE_NAMES_PATH)
-        print(f"Feature names loaded from {FEATURE_NAMES_PATH}")
+        log.info("symptom_feature_names_loaded", path=FEATURE_NAMES_PATH)
     else:
-        print("Warning: Neither mlb.joblib nor feature_names.joblib found.")
+        log.warning("symptom_feature_names_missing", looked_for=[MLB_PATH, FEATURE_NAMES_PATH])
 
+    build_feature_index()
 
-# --- Helper function for vectorizing input ---
-def vectorize_input(symptoms: List[str]) -> np.ndarray:
-    """Convert incoming symptom list to model input vector."""
-    cleaned = [s.strip().lower() for s in (symptoms or [])]
+
+def build_feature_index():
+    """Precompute symptom -> column lookups so vectorizing is one dict hit per symptom."""
+    global feature_index, n_features, symptom_index
+    index = {}
     if mlb is not None:
-        return np.asarray(mlb.transform([cleaned])[0])
+        # mlb.transform matches the cleaned symptom exactly
+        for i, cls in enumerate(mlb.classes_):
+            index.setdefault(str(cls), []).append(i)
+        n_features = len(mlb.classes_)
     elif feature_names is not None:
-        sset = set(cleaned)
-        return np.array([1 if fn.lower() in sset else 0 for fn in feature_names])
+        # Several names may lower-case to the same symptom; all of them get set
+        for i, fn in enumerate(feature_names):
+            index.setdefault(fn.lower(), []).append(i)
+        n_features = len(feature_names)
     else:
-        try:
-            n = model.n_features_in_
-            return np.zeros(n, dtype=int)
-        except AttributeError:
-            raise HTTPException(status_code=500, detail="Model is loaded, but no vectorizer (mlb/feature_names) is available.")
+        n_features = getattr(model, "n_features_in_", None)
+    feature_index = {k: tuple(v) for k, v in index.items()}
+    symptom_index = SymptomIndex(feature_index)
+    log.info("symptom_index_built", phrases=len(symptom_index.phrases), prefixes=len(symptom_index.prefixes))
+
+
+# --- Helper functions for vectorizing input ---
+def _columns_for(symptoms: List[str], unrecognized: Optional[List[str]] = None) -> List[int]:
+    """Columns for a symptom list; misspellings and synonyms go through symptom_index."""
+    cols = set()
+    for s in symptoms or []:
+        hit = feature_index.get(s.strip().lower())
+        if hit is None and symptom_index is not None:
+            resolved = symptom_index.resolve(s)
+            hit = feature_index[resolved[0]] if resolved else None
+        if hit is None:
+            if unrecognized is not None:
+                unrecognized.append(s)
+            continue
+        cols.update(hit)
+    return sorted(cols)
+
+
+def vectorize_input(symptoms: List[str], unrecognized: Optional[List[str]] = None) -> np.ndarray:
+    """Convert incoming symptom list to model input vector."""
+    if n_features is None:
+        raise HTTPException(status_code=500, detail="Model is loaded, but no vectorizer (mlb/feature_names) is available.")
+    vec = np.zeros(n_features, dtype=int)
+    vec[_columns_for(symptoms, unrecognized)] = 1
+    return vec
+
+
+def vectorize_batch(batch: List[List[str]], unrecognized: Optional[List[List[str]]] = None) -> "sparse.csr_matrix":
+    """One sparse row per symptom list — only the set columns are stored."""
+    from scipy import sparse
+    if n_features is None:
+        raise HTTPException(status_code=500, detail="Model is loaded, but no vectorizer (mlb/feature_names) is available.")
+    indptr, indices = [0], []
+    for i, symptoms in enumerate(batch):
+        indices.extend(_columns_for(symptoms, unrecognized[i] if unrecognized is not None else None))
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.float32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(batch), n_features))
+
+
+def top_k_indices(proba: np.ndarray, k: int) -> np.ndarray:
+    """
+    Column indices of the k most probable classes per row, highest first.
+    argpartition picks the k in O(n); rows with a tie at the cut-off fall back
+    to a stable sort so the result matches sorting the full (class, p) list.
+    """
+    n = proba.shape[1]
+    k = min(k, n)
+    if k == n:
+        return np.argsort(-proba, axis=1, kind="stable")
+
+    part = np.argpartition(-proba, k - 1, axis=1)[:, :k]
+    vals = np.take_along_axis(proba, part, axis=1)
+    order = np.lexsort((part, -vals), axis=-1)
+    top = np.take_along_axis(part, order, axis=1)
+
+    cutoff = vals.min(axis=1, keepdims=True)
+    tied = (proba >= cutoff).sum(axis=1) > k
+    if tied.any():
+        top[tied] = np.argsort(-proba[tied], axis=1, kind="stable")[:, :k]
+    return top
+
+
+def predict_proba_batch(X: "sparse.csr_matrix") -> np.ndarray:
+    try:
+        return model.predict_proba(X)
+    except (TypeError, ValueError):
+        # Estimator without sparse support
+        return model.predict_proba(X.toarray())
+
+
+def predict_batch(batch: List[List[str]], top_k: int) -> List[dict]:
+    """Top-k predictions for many symptom lists with a single model call."""
+    unrecognized = [[] for _ in batch]
+    X = vectorize_batch(batch, unrecognized)
+    if hasattr(model, 'predict_proba') and hasattr(model, 'classes_'):
+        proba = predict_proba_batch(X)
+        classes = model.classes_
+        top = top_k_indices(proba, top_k)
+        return [
+            {"predictions": [{"class": str(classes[j]), "probability": float(row[j])} for j in cols],
+             "unrecognized": unknown}
+            for row, cols, unknown in zip(proba, top, unrecognized)
+        ]
+
+    # Fallback for models without predict_proba
+    try:
+        preds = model.predict(X)
+    except (TypeError, ValueError):
+        preds = model.predict(X.toarray())
+    return [
+        {"predictions": [{"class": str(p), "probability": None}], "unrecognized": unknown}
+        for p, unknown in zip(preds, unrecognized)
+    ]
 
 
 # --- Endpoints attached to the router ---
@@ -73,7 +196,18 @@ def health():
     return {"status": "ok", "service": "symptom-predictor"}
 
 
-@router.post("/predict", tags=["Predictions"])
+@router.get("/symptoms/suggest", tags=["Predictions"], dependencies=[Depends(warmup.requires("symptom_model"))])
+def suggest_symptoms(q: str = Query("", max_length=100), limit: int = Query(10, ge=1, le=20)):
+    """
+    Autocomplete for the Symptom Decoder: canonical symptoms matching what's
+    been typed so far (prefix of any word, synonyms, or a close misspelling).
+    """
+    if symptom_index is None:
+        raise HTTPException(status_code=503, detail="Symptom index not loaded. Check server startup logs.")
+    return {"query": q, "suggestions": symptom_index.suggest(q, limit)}
+
+
+@router.post("/predict", tags=["Predictions"], dependencies=[Depends(warmup.requires("symptom_model"))])
 def predict(payload: SymptomsIn, top_k: int = Query(3, ge=1, le=20)):
     """
     Return top-k class predictions with probabilities based on symptoms.
@@ -81,23 +215,44 @@ def predict(payload: SymptomsIn, top_k: int = Query(3, ge=1, le=20)):
     if model is None:
         raise HTTPException(status_code=500, detail="Model not loaded. Check server startup logs.")
 
-    vec = vectorize_input(payload.symptoms)
+    unrecognized = []
+    vec = vectorize_input(payload.symptoms, unrecognized)
     X = np.asarray(vec).reshape(1, -1)
     
     try:
         if hasattr(model, 'predict_proba') and hasattr(model, 'classes_'):
             proba = model.predict_proba(X)[0]
             classes = model.classes_
-            
-            paired = sorted(zip(classes.tolist(), proba.tolist()), key=lambda x: x[1], reverse=True)
-            top = paired[:top_k]
-            preds = [{"class": str(c), "probability": float(p)} for c, p in top]
-            
-            return {"predictions": preds}
+
+            top = top_k_indices(proba.reshape(1, -1), top_k)[0]
+            preds = [{"class": str(classes[j]), "probability": float(proba[j])} for j in top]
+
+            return {"predictions": preds, "unrecognized": unrecognized}
         else:
             # Fallback for models without predict_proba
             pred = model.predict(X)[0]
-            return {"predictions": [{"class": str(pred), "probability": None}]}
+            return {"predictions": [{"class": str(pred), "probability": None}], "unrecognized": unrecognized}
             
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Prediction failed: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {e}")
+
+
+@router.post("/predict/batch", tags=["Predictions"], dependencies=[Depends(warmup.requires("symptom_model"))])
+def predict_batch_route(payload: SymptomsBatchIn, top_k: int = Query(3, ge=1, le=20)):
+    """
+    Top-k predictions for many symptom lists at once.
+    Results are returned in the same order as `items`.
+    """
+    if model is None:
+        raise HTTPException(status_code=500, detail="Model not loaded. Check server startup logs.")
+    if len(payload.items) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch too large — max {MAX_BATCH_SIZE} items per request.")
+    if not payload.items:
+        return {"results": []}
+
+    try:
+        return {"results": predict_batch(payload.items, top_k)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {e}")
@@ -0,0 +1,233 @@
+# File: symptom_index.py
+
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SUGGEST_MAX       = int(os.getenv("SYMPTOM_SUGGEST_MAX", "20"))      # results kept per prefix
+RESOLVE_CACHE_SIZE = int(os.getenv("SYMPTOM_RESOLVE_CACHE_SIZE", "8192"))
+
+# Everyday wording -> feature name. Entries whose target isn't a model feature are ignored.
+SYNONYMS = {
+    "fever":                "high_fever",
+    "temperature":          "high_fever",
+    "low grade fever":      "mild_fever",
+    "shortness of breath":  "breathlessness",
+    "short of breath":      "breathlessness",
+    "difficulty breathing": "breathlessness",
+    "sore throat":          "throat_irritation",
+    "body aches":           "muscle_pain",
+    "body ache":            "muscle_pain",
+    "muscle ache":          "muscle_pain",
+    "stomach ache":         "stomach_pain",
+    "tummy ache":           "belly_pain",
+    "diarrhea":             "diarrhoea",
+    "loose motions":        "diarrhoea",
+    "throwing up":          "vomiting",
+    "puking":               "vomiting",
+    "tired":                "fatigue",
+    "tiredness":            "fatigue",
+    "weakness":             "muscle_weakness",
+    "rash":                 "skin_rash",
+    "itchy skin":           "itching",
+    "sneezing":             "continuous_sneezing",
+    "stuffy nose":          "congestion",
+    "blocked nose":         "congestion",
+    "heart racing":         "fast_heart_rate",
+    "racing heart":         "fast_heart_rate",
+    "jaundice":             "yellowish_skin",
+    "blurred vision":       "blurred_and_distorted_vision",
+    "blurry vision":        "blurred_and_distorted_vision",
+    "frequent urination":   "polyuria",
+    "burning urination":    "burning_micturition",
+    "painful urination":    "burning_micturition",
+    "vertigo":              "spinning_movements",
+    "light headed":         "dizziness",
+    "lightheaded":          "dizziness",
+    "heartburn":            "acidity",
+    "acid reflux":          "acidity",
+    "no appetite":          "loss_of_appetite",
+    "swollen glands":       "swelled_lymph_nodes",
+    "chest tightness":      "chest_pain",
+    "stiff joints":         "movement_stiffness",
+    "joint swelling":       "swelling_joints",
+    "pimples":              "pus_filled_pimples",
+    "acne":                 "pus_filled_pimples",
+}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """'Spotting_ urination' -> 'spotting urination'."""
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def display_label(feature: str) -> str:
+    return normalize(feature).title()
+
+
+def _trigrams(compact: str) -> set:
+    padded = f"  {compact} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Damerau-Levenshtein (adjacent swaps), giving up once every path exceeds `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cost = 0 if ca == cb else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if prev2 is not None and i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def _max_edits(length: int) -> int:
+    # "vomitting" (9) -> 2, "cough" (5) -> 1, "coma" (4) -> 0
+    if length <= 4:
+        return 0
+    if length <= 8:
+        return 1
+    return 2
+
+
+class SymptomIndex:
+    """
+    Free-text symptom -> canonical feature key, built once over the model's
+    feature names. Lookups try, in order: exact normalized text, the same
+    with spaces removed ("head ache"), a synonym table, then trigram
+    candidates ranked by edit distance. Autocomplete prefixes are
+    precomputed, so a keystroke is one dictionary lookup.
+    """
+
+    def __init__(self, features: Iterable[str], synonyms: Optional[Dict[str, str]] = None):
+        self.features = list(features)
+        self.labels = {f: display_label(f) for f in self.features}
+
+        # phrase (normalized) -> feature; canonical names win over synonyms
+        self.phrases: Dict[str, str] = {}
+        for f in self.features:
+            self.phrases.setdefault(normalize(f), f)
+        by_norm = {normalize(f): f for f in self.features}
+        for phrase, target in (synonyms if synonyms is not None else SYNONYMS).items():
+            target = by_norm.get(normalize(target))
+            if target is not None:
+                self.phrases.setdefault(normalize(phrase), target)
+
+        self.compact: Dict[str, str] = {}
+        for phrase, f in self.phrases.items():
+            self.compact.setdefault(phrase.replace(" ", ""), f)
+
+        # Trigram postings over the compact phrases, for fuzzy candidates
+        self.postings: Dict[str, List[str]] = {}
+        for c in self.compact:
+            for g in _trigrams(c):
+                self.postings.setdefault(g, []).append(c)
+
+        self.prefixes = self._build_prefixes()
+        self.resolve = lru_cache(maxsize=RESOLVE_CACHE_SIZE)(self._resolve)
+        self._fuzzy_prefix = lru_cache(maxsize=RESOLVE_CACHE_SIZE)(self._fuzzy_prefix_uncached)
+
+    # ── Autocomplete ─────────────────────────────────────────────────────────
+    def _build_prefixes(self) -> Dict[str, Tuple[Tuple[str, str], ...]]:
+        """
+        Every prefix of every phrase, and of each word inside it ("pain" ->
+        chest_pain), mapped to its best features. Matches at the start of a
+        phrase rank first, then canonical names, then shorter labels.
+        """
+        ranked: Dict[str, Dict[str, tuple]] = {}
+        canonical = {normalize(f) for f in self.features}
+        for phrase, f in self.phrases.items():
+            via = "name" if phrase in canonical else "synonym"
+            starts = [0] + [m.end() for m in re.finditer(r" ", phrase)]
+            for pos, start in enumerate(starts):
+                tail = phrase[start:]
+                for n in range(1, len(tail) + 1):
+                    for key in {tail[:n], tail[:n].replace(" ", "")}:
+                        rank = (pos > 0, via != "name", len(self.labels[f]), self.labels[f])
+                        best = ranked.setdefault(key, {})
+                        if f not in best or rank < best[f][0]:
+                            best[f] = (rank, via)
+        return {
+            key: tuple((f, via) for f, (rank, via) in sorted(best.items(), key=lambda x: x[1][0])[:SUGGEST_MAX])
+            for key, best in ranked.items()
+        }
+
+    def suggest(self, q: str, limit: int = 10) -> List[dict]:
+        key = normalize(q)
+        if not key:
+            return []
+        hits = self.prefixes.get(key)
+        if hits is not None:
+            return [{"symptom": f, "label": self.labels[f], "match": via} for f, via in hits[:limit]]
+
+        # Nothing starts with it — a typo part-way through a word
+        return [{"symptom": f, "label": self.labels[f], "match": "fuzzy"} for f in self._fuzzy_prefix(key)[:limit]]
+
+    def _fuzzy_prefix_uncached(self, key: str) -> Tuple[str, ...]:
+        """Features whose phrase starts with something within a typo or two of `key`."""
+        compact = key.replace(" ", "")
+        limit = _max_edits(len(compact))
+        if limit == 0:
+            return ()
+        # q-gram filter: each edit destroys at most 3 of the query's trigrams
+        grams = _trigrams(compact) - {compact[-2:] + " "}
+        need = len(grams) - 3 * limit
+        overlap: Dict[str, int] = {}
+        for g in grams:
+            for c in self.postings.get(g, ()):
+                overlap[c] = overlap.get(c, 0) + 1
+
+        scored = {}
+        for c, hits in overlap.items():
+            if hits < need:
+                continue
+            f = self.compact[c]
+            d = min(_edit_distance(compact, c[:len(compact) + delta], limit) for delta in (-1, 0, 1))
+            if d <= limit and (f not in scored or d < scored[f]):
+                scored[f] = d
+        ranked = sorted(scored, key=lambda f: (scored[f], len(self.labels[f]), self.labels[f]))
+        return tuple(ranked[:SUGGEST_MAX])
+
+    # ── Resolution ───────────────────────────────────────────────────────────
+    def _resolve(self, text: str) -> Optional[Tuple[str, float, str]]:
+        """Returns (feature, score 0-1, how) or None if nothing is close enough."""
+        phrase = normalize(text)
+        if not phrase:
+            return None
+        f = self.phrases.get(phrase)
+        if f is not None:
+            return f, 1.0, "name" if normalize(f) == phrase else "synonym"
+
+        compact = phrase.replace(" ", "")
+        f = self.compact.get(compact)
+        if f is not None:
+            return f, 1.0, "name" if normalize(f).replace(" ", "") == compact else "synonym"
+
+        limit = _max_edits(len(compact))
+        if limit == 0:
+            return None
+
+        # Candidates share trigrams with the input; check the most overlapping first
+        overlap: Dict[str, int] = {}
+        for g in _trigrams(compact):
+            for c in self.postings.get(g, ()):
+                overlap[c] = overlap.get(c, 0) + 1
+        best, best_dist = None, limit + 1
+        for c, _ in sorted(overlap.items(), key=lambda x: -x[1])[:25]:
+            d = _edit_distance(compact, c, min(limit, best_dist))
+            if d < best_dist or (d == best_dist and best is not None and len(c) < len(best)):
+                best, best_dist = c, d
+        if best is None or best_dist > limit:
+            return None
+        return self.compact[best], round(1 - best_dist / max(len(compact), len(best)), 3), "fuzzy"
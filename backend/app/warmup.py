@@ -0,0 +1,173 @@
+# File: warmup.py
+
+import os
+import time
+import asyncio
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException
+
+from app.log import get_logger
+
+log = get_logger(__name__)
+
+# ── Config ────────────────────────────────────────────────────────────────────
+# "eager": startup blocks until every step has run (no request is served cold).
+# "background": the server accepts requests at once and warms up in a task;
+# routes that need a step wait for it (up to WARMUP_WAIT_TIMEOUT) or get a 503.
+STARTUP_MODE        = os.getenv("STARTUP_MODE", "eager")
+WARMUP_WAIT_TIMEOUT = float(os.getenv("WARMUP_WAIT_TIMEOUT", "30"))
+
+
+class _Step:
+    """One warm-up step. Lifecycle: pending → running → ready | failed"""
+
+    __slots__ = ("name", "fn", "required", "status", "seconds", "error", "done")
+
+    def __init__(self, name: str, fn: Callable, required: bool):
+        self.name     = name
+        self.fn       = fn
+        self.required = required
+        self.status   = "pending"
+        self.seconds  = None
+        self.error    = None
+        self.done     = asyncio.Event()
+
+
+class Warmup:
+    """
+    Ordered start-up steps (model loading, heavy imports, client construction).
+    Blocking steps run with asyncio.to_thread so the event loop keeps serving
+    while they load; coroutine functions are awaited directly. A failed step
+    is logged and recorded — later steps still run. Only required steps
+    decide readiness.
+    """
+
+    def __init__(self):
+        self._steps: dict[str, _Step] = {}
+        self._task: asyncio.Task | None = None
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+
+    def step(self, name: str, fn: Callable[[], object] | Callable[[], Awaitable], required: bool = True):
+        """Register a step; steps run in registration order."""
+        self._steps[name] = _Step(name, fn, required)
+
+    def _finish(self, s: _Step, start: float, error: Exception | None):
+        s.seconds = time.perf_counter() - start
+        if error is None:
+            s.status = "ready"
+        else:
+            s.status = "failed"
+            s.error = str(error)
+            (log.error if s.required else log.warning)("warmup_step_failed", step=s.name, error=str(error))
+        s.done.set()
+        log.info("warmup_step", step=s.name, status=s.status, ms=round(s.seconds * 1000, 1))
+
+    async def run(self):
+        """Run every pending step once (eager mode awaits this from startup)."""
+        self.started_at = self.started_at or time.monotonic()
+        for s in self._steps.values():
+            if s.status != "pending":
+                continue
+            s.status = "running"
+            start, error = time.perf_counter(), None
+            try:
+                if asyncio.iscoroutinefunction(s.fn):
+                    await s.fn()
+                else:
+                    await asyncio.to_thread(s.fn)
+            except Exception as e:
+                error = e
+            self._finish(s, start, error)
+        self.finished_at = time.monotonic()
+        log.info("warmup_done", ready=self.ready, ms=round((self.finished_at - self.started_at) * 1000, 1))
+
+    def preload(self):
+        """
+        Run the blocking steps in this process, without an event loop — for
+        a pre-fork master (gunicorn preload_app). Forked workers inherit the
+        loaded models copy-on-write and their own run() skips these steps.
+        Coroutine steps (clients holding connections) stay pending so every
+        worker builds its own.
+        """
+        for s in self._steps.values():
+            if s.status != "pending" or asyncio.iscoroutinefunction(s.fn):
+                continue
+            s.status = "running"
+            start, error = time.perf_counter(), None
+            try:
+                s.fn()
+            except Exception as e:
+                error = e
+            self._finish(s, start, error)
+
+    def start(self):
+        """Run the steps in a background task (background mode)."""
+        if self._task is None:
+            self.started_at = time.monotonic()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    @property
+    def ready(self) -> bool:
+        return all(s.status == "ready" for s in self._steps.values() if s.required)
+
+    async def wait(self, name: str, timeout: float = WARMUP_WAIT_TIMEOUT) -> bool:
+        """True once the step is ready; False if it failed or didn't finish in time."""
+        s = self._steps.get(name)
+        if s is None:
+            return True
+        if not s.done.is_set():
+            try:
+                await asyncio.wait_for(s.done.wait(), timeout)
+            except asyncio.TimeoutError:
+                return False
+        return s.status == "ready"
+
+    def requires(self, *names: str):
+        """
+        Route dependency: Depends(warmup.requires("symptom_model")). Requests
+        arriving mid-warm-up wait for the step instead of failing; a step that
+        failed or is still loading after WARMUP_WAIT_TIMEOUT answers 503.
+        """
+        async def dependency():
+            for name in names:
+                if await self.wait(name):
+                    continue
+                if self._steps[name].status == "failed":
+                    raise HTTPException(status_code=503, detail=f"{name} failed to load. Check server startup logs.")
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"Service is warming up ({name}). Please retry shortly.",
+                    headers={"Retry-After": "5"},
+                )
+        return dependency
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        return {
+            "mode":  STARTUP_MODE,
+            "ready": self.ready,
+            "elapsed_ms": round(((self.finished_at or now) - self.started_at) * 1000, 1)
+                          if self.started_at is not None else None,
+            "steps": {
+                s.name: {
+                    "status":   s.status,
+                    "required": s.required,
+                    "ms":       round(s.seconds * 1000, 1) if s.seconds is not None else None,
+                    **({"error": s.error} if s.error else {}),
+                }
+                for s in self._steps.values()
+            },
+        }
+
+
+warmup = Warmup()
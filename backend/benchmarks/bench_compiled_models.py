@@ -0,0 +1,83 @@
+# File: bench_compiled_models.py
+#
+# Compiled NumPy models vs sklearn (scaler.transform + predict_proba):
+#   - cold start: fresh interpreter importing + loading every disease model
+#   - single-row latency (what /predict-risk pays per disease)
+#   - per-row cost at batch sizes 10-1000
+#
+#   cd backend
+#   python -m benchmarks.bench_compiled_models
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+import joblib
+import numpy as np
+
+from app.model_registry import MODEL_DIR, META_SUFFIX, MODEL_SUFFIX, SCALER_SUFFIX
+from app.compiled_models import CompiledModel, COMPILED_SUFFIX
+from benchmarks.check_compiled_parity import dataset_matrix, stress_rows
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BATCH_SIZES = [10, 100, 1000]
+
+COLD_START = """
+import time
+t = time.perf_counter()
+from app.model_registry import ModelRegistry
+r = ModelRegistry(); r.load()
+print(time.perf_counter() - t)
+"""
+
+
+def cold_start_seconds(runtime: str) -> float:
+    env = dict(os.environ, MODEL_RUNTIME=runtime, PYTHONPATH=BACKEND_DIR, PYTHONWARNINGS="ignore")
+    out = subprocess.run([sys.executable, "-c", COLD_START], env=env, cwd=BACKEND_DIR,
+                         capture_output=True, text=True, check=True).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def median_us(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return float(np.median(times)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled vs sklearn model benchmark")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--cold-runs", type=int, default=3)
+    args = parser.parse_args()
+
+    names = sorted(f[: -len(COMPILED_SUFFIX)] for f in os.listdir(MODEL_DIR) if f.endswith(COMPILED_SUFFIX))
+    if not names:
+        sys.exit("❌ No compiled models found — run `python -m app.model_export` first")
+
+    print("Cold start (fresh interpreter, import + load all models):")
+    for runtime in ("sklearn", "numpy"):
+        best = min(cold_start_seconds(runtime) for _ in range(args.cold_runs))
+        print(f"  {runtime:<8} {best * 1000:8.0f} ms")
+
+    print(f"\n{'model':<10}{'kind':<9}{'rows':>6}{'sklearn µs/row':>16}{'numpy µs/row':>14}{'speed-up':>10}")
+    for name in names:
+        paths = [os.path.join(MODEL_DIR, name + s) for s in (META_SUFFIX, MODEL_SUFFIX, SCALER_SUFFIX)]
+        meta, model, scaler = (joblib.load(p) for p in paths)
+        compiled = CompiledModel(os.path.join(MODEL_DIR, name + COMPILED_SUFFIX))
+        X_all = stress_rows(dataset_matrix(name, meta))
+
+        for n in [1] + BATCH_SIZES:
+            X = X_all[np.arange(n) % len(X_all)]
+            repeat = max(3, args.repeat // max(1, n // 10))
+            sk = median_us(lambda: model.predict_proba(scaler.transform(X)), repeat) / n
+            npy = median_us(lambda: compiled.predict_proba(X), repeat) / n
+            print(f"{name:<10}{compiled.kind:<9}{n:>6}{sk:>16.1f}{npy:>14.1f}{sk / npy:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# File: bench_image_ingest.py
+#
+# Upload ingestion benchmark: bytes sent to the vision model, re-encode time
+# and decoded pixel memory, before (raw base64 of the upload) vs after
+# prepare_for_ocr. "decode" is the RGB buffer a full decode of the upload
+# needs vs what the draft-mode decode actually allocates.
+#
+#   cd backend
+#   python -m benchmarks.bench_image_ingest                  # sample report + synthetic phone photos
+#   python -m benchmarks.bench_image_ingest path/to/*.jpg    # your own images
+#
+# With OPENROUTER_BASE_URL pointing at a vision endpoint (or the load-test
+# stub), --llm also times one OCR request per image for each payload.
+
+import io
+import os
+import sys
+import glob
+import time
+import base64
+import asyncio
+import argparse
+
+from PIL import Image, ImageDraw
+
+from app.image_ingest import prepare_for_ocr, OCR_IMAGE_MAX_SIDE, OCR_IMAGE_QUALITY
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_GLOB = os.path.join(BACKEND_DIR, "uploads", "*.jpg")
+
+
+# ── Sample images ─────────────────────────────────────────────────────────────
+def synthetic_phone_photo(width: int, height: int, orientation: int = 6) -> bytes:
+    """A report-like page shot at phone resolution, JPEG q95 with an EXIF rotation tag."""
+    img = Image.new("RGB", (width, height), (236, 232, 222))
+    draw = ImageDraw.Draw(img)
+    line_h = max(12, height // 90)
+    for i, y in enumerate(range(line_h * 4, height - line_h * 4, line_h * 2)):
+        draw.text((width // 12, y), f"Test {i:02d}  Hemoglobin  13.{i % 10} g/dL   Ref 12.0-15.5", fill=(30, 30, 30))
+        draw.line((width // 12, y + line_h, width - width // 12, y + line_h), fill=(180, 180, 180))
+    # Sensor noise is what makes real photos large
+    noise = Image.effect_noise((width, height), 24).convert("RGB")
+    img = Image.blend(img, noise, 0.12)
+
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=95, exif=exif)
+    return out.getvalue()
+
+
+def load_samples(paths: list[str]) -> list[tuple[str, bytes, str]]:
+    samples = []
+    for path in paths or sorted(glob.glob(SAMPLE_GLOB)):
+        with open(path, "rb") as f:
+            data = f.read()
+        mime = "image/png" if path.lower().endswith(".png") else "image/jpeg"
+        samples.append((os.path.basename(path)[:40], data, mime))
+    if not paths:
+        for w, h in [(3024, 4032), (4000, 3000), (4624, 3468)]:
+            samples.append((f"synthetic {w}x{h} q95", synthetic_phone_photo(w, h), "image/jpeg"))
+    return samples
+
+
+# ── Measurements ──────────────────────────────────────────────────────────────
+def measure(data: bytes, mime: str, repeat: int):
+    out, out_mime, info = prepare_for_ocr(data, mime)
+
+    timings = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        prepare_for_ocr(data, mime)
+        timings.append((time.perf_counter() - t) * 1000)
+    timings.sort()
+    return out, out_mime, info, timings[len(timings) // 2]
+
+
+async def time_llm(data: bytes, mime: str) -> float:
+    from app import main
+    t = time.perf_counter()
+    try:
+        await main.extract_medical_values_via_llm(data, mime)
+    except Exception as e:
+        print(f"   LLM call failed: {e}")
+    return time.perf_counter() - t
+
+
+def fmt_kb(n: int) -> str:
+    return f"{n / 1024:,.0f} KB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload ingestion benchmark")
+    parser.add_argument("images", nargs="*", help="image files (default: backend/uploads/*.jpg + synthetic)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--llm", action="store_true", help="also time one OCR call per payload")
+    args = parser.parse_args()
+
+    print(f"prepare_for_ocr: max side {OCR_IMAGE_MAX_SIDE}px, JPEG q{OCR_IMAGE_QUALITY}\n")
+    header = f"{'image':<42}{'upload':>10}{'b64 before':>12}{'b64 after':>12}{'ratio':>8}{'p50 ms':>9}{'decode MB':>16}"
+    print(header)
+    print("-" * len(header))
+
+    totals = [0, 0]
+    for name, data, mime in load_samples(args.images):
+        out, out_mime, info, p50 = measure(data, mime, args.repeat)
+        w, h = info.get("original_size", (0, 0))
+        dw, dh = info.get("decoded_size", (w, h))
+        decode = f"{w * h * 3 / 2**20:.0f} → {dw * dh * 3 / 2**20:.0f}"
+        before = len(base64.b64encode(data))
+        after  = len(base64.b64encode(out))
+        totals[0] += before
+        totals[1] += after
+        print(f"{name:<42}{fmt_kb(len(data)):>10}{fmt_kb(before):>12}{fmt_kb(after):>12}"
+              f"{before / after:>7.1f}x{p50:>9.1f}{decode:>16}")
+
+        if args.llm:
+            raw_s = asyncio.run(time_llm(data, mime))
+            new_s = asyncio.run(time_llm(out, out_mime))
+            print(f"   LLM latency: original {raw_s:.2f}s → prepared {new_s:.2f}s")
+
+    print("-" * len(header))
+    print(f"{'total':<42}{'':>10}{fmt_kb(totals[0]):>12}{fmt_kb(totals[1]):>12}{totals[0] / totals[1]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+# File: bench_symptom_batch.py
+#
+# Per-item cost of symptom prediction: the original one-request-per-list path
+# (Python loop over feature names, full sort of (class, p) pairs) vs
+# /predict for one list vs predict_batch at batch sizes 1-1000.
+#
+#   cd backend
+#   python -m benchmarks.bench_symptom_batch
+#
+# Needs the trained symptom model at models/symbipredict_model.joblib
+# (paths are relative to the working directory, as in the app).
+
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+from app import symptom
+
+BATCH_SIZES = [1, 10, 100, 1000]
+
+
+def random_symptom_lists(n: int, seed: int = 0) -> list[list[str]]:
+    rng = random.Random(seed)
+    names = list(symptom.feature_index)
+    return [rng.sample(names, rng.randint(2, 8)) for _ in range(n)]
+
+
+# ── Original implementation (kept here for comparison) ───────────────────────
+def legacy_predict(symptoms: list[str], top_k: int) -> list[dict]:
+    cleaned = [s.strip().lower() for s in symptoms]
+    sset = set(cleaned)
+    vec = np.array([1 if fn.lower() in sset else 0 for fn in symptom.feature_names])
+    proba = symptom.model.predict_proba(vec.reshape(1, -1))[0]
+    paired = sorted(zip(symptom.model.classes_.tolist(), proba.tolist()), key=lambda x: x[1], reverse=True)
+    return [{"class": str(c), "probability": float(p)} for c, p in paired[:top_k]]
+
+
+def per_item_us(fn, items: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn(items)
+        best = min(best, time.perf_counter() - t)
+    return best / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Symptom batch prediction benchmark")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    try:
+        symptom.load_artifacts()
+    except RuntimeError as e:
+        sys.exit(f"❌ {e}")
+    if symptom.feature_names is None:
+        sys.exit("❌ feature_names.joblib is required for the legacy comparison")
+
+    items = random_symptom_lists(max(BATCH_SIZES))
+    k = args.top_k
+
+    # Parity: batch results equal the legacy one-at-a-time results
+    batch = symptom.predict_batch(items[:200], k)
+    legacy = [legacy_predict(s, k) for s in items[:200]]
+    assert [r["predictions"] for r in batch] == legacy, "batch results differ from legacy path"
+    print(f"✅ Parity OK on 200 lists (top_k={k})\n")
+
+    print(f"{'batch size':>10}{'legacy µs/item':>17}{'/predict µs/item':>19}{'batch µs/item':>16}{'speed-up':>10}")
+    for n in BATCH_SIZES:
+        chunk = items[:n]
+        legacy_us = per_item_us(lambda xs: [legacy_predict(s, k) for s in xs], chunk, args.repeat)
+        single_us = per_item_us(
+            lambda xs: [symptom.predict(symptom.SymptomsIn(symptoms=s), top_k=k) for s in xs], chunk, args.repeat
+        )
+        batch_us = per_item_us(lambda xs: symptom.predict_batch(xs, k), chunk, args.repeat)
+        print(f"{n:>10}{legacy_us:>17.1f}{single_us:>19.1f}{batch_us:>16.1f}{legacy_us / batch_us:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# File: check_compiled_parity.py
+#
+# Parity check: compiled NumPy models vs the sklearn scaler + calibrated model
+# they were exported from, over backend/datasets/*.csv plus jittered and
+# out-of-range copies of every row. Exits non-zero if any probability differs
+# by more than --tol.
+#
+#   cd backend
+#   python -m benchmarks.check_compiled_parity
+#   python -m benchmarks.check_compiled_parity --tol 1e-6 heart
+
+import os
+import sys
+import glob
+import argparse
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.model_registry import MODEL_DIR, META_SUFFIX, MODEL_SUFFIX, SCALER_SUFFIX
+from app.compiled_models import CompiledModel, COMPILED_SUFFIX
+from app.prediction_api1 import encode_categorical
+
+DATASET_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datasets")
+
+
+def dataset_matrix(name: str, meta: dict) -> np.ndarray:
+    """Feature matrix for a disease from its bundled CSV, encoded the way the API encodes it."""
+    matches = glob.glob(os.path.join(DATASET_DIR, f"*{name}*.csv"))
+    if not matches:
+        raise FileNotFoundError(f"No dataset for {name} in {DATASET_DIR}")
+    df = pd.read_csv(matches[0], encoding="utf-8-sig")
+
+    features = meta["features"]
+    X = np.empty((len(df), len(features)))
+    for j, f in enumerate(features):
+        col = df[f].map(lambda v: encode_categorical(f, v.lower()) if isinstance(v, str) else v)
+        X[:, j] = pd.to_numeric(col, errors="coerce").fillna(meta["feature_medians"][f]).to_numpy()
+    return X
+
+
+def stress_rows(X: np.ndarray, seed: int = 0) -> np.ndarray:
+    """Dataset rows, the same rows jittered by ±5%, and rows pushed beyond the training range."""
+    rng = np.random.default_rng(seed)
+    jitter = X * rng.uniform(0.95, 1.05, size=X.shape)
+    lo, hi = X.min(axis=0), X.max(axis=0)
+    span = np.where(hi > lo, hi - lo, 1.0)
+    wide = rng.uniform(lo - span, hi + span, size=X.shape)
+    return np.vstack([X, jitter, wide])
+
+
+def check(name: str, tol: float) -> bool:
+    paths = [os.path.join(MODEL_DIR, name + s) for s in (META_SUFFIX, MODEL_SUFFIX, SCALER_SUFFIX)]
+    meta, model, scaler = (joblib.load(p) for p in paths)
+    compiled = CompiledModel(os.path.join(MODEL_DIR, name + COMPILED_SUFFIX))
+
+    X = stress_rows(dataset_matrix(name, meta))
+    expected = model.predict_proba(scaler.transform(X))[:, 1]
+    got = compiled.predict_proba(X)[:, 1]
+
+    diff = np.abs(expected - got)
+    ok = bool(diff.max() <= tol)
+    print(f"{'✅' if ok else '❌'} {name:<10} {compiled.kind:<8} rows={len(X):<6} "
+          f"max|Δp|={diff.max():.2e}  mean|Δp|={diff.mean():.2e}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled model parity check")
+    parser.add_argument("names", nargs="*")
+    parser.add_argument("--tol", type=float, default=1e-9)
+    args = parser.parse_args()
+
+    names = args.names or sorted(
+        f[: -len(COMPILED_SUFFIX)] for f in os.listdir(MODEL_DIR) if f.endswith(COMPILED_SUFFIX)
+    )
+    if not names:
+        sys.exit("❌ No compiled models found — run `python -m app.model_export` first")
+
+    results = [check(name, args.tol) for name in names]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
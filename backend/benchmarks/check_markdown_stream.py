@@ -0,0 +1,104 @@
+# File: check_markdown_stream.py
+#
+# Parity check: MarkdownStreamStripper (what /api2/chat/stream sends) vs
+# strip_markdown on the whole reply (what /api2/chat returns). Every reply is
+# fed in random 1-6 character chunks, --streams times:
+#
+#   typical replies (lists, emphasis, headers, code, emoji) — the "token"
+#     events alone must join to exactly strip_markdown(full)
+#   seeded random soups of the same constructs — a "replace" correction is
+#     allowed, but the client's text after applying the events must match
+#
+# Exits non-zero on any mismatch.
+#
+#   cd backend
+#   python -m benchmarks.check_markdown_stream
+#   python -m benchmarks.check_markdown_stream --streams 1000 --random 500 -v
+
+import sys
+import random
+import argparse
+
+from app.ai_companion_api import MarkdownStreamStripper, strip_markdown
+
+REPLIES = [
+    "Here are some tips:\n\n* item *one* is key\n* item two\n\n**Note:** drink _water_ daily.",
+    "### Summary\nYour **hemoglobin** is low.\n1. Eat iron-rich food\n2. See a doctor 😊\n\nUse `ferritin` tests.",
+    "- Sleep *well*\n- Walk __daily__\n\n#### Why\nIt helps ***a lot***.",
+    "Your results look fine. Keep it up!\n\n* Hydrate\n* Rest",
+    "## Diet\n\n1. **Breakfast**: oats with *berries*\n2. **Lunch**: lentils\n\n\n\n3. **Dinner**: fish 🐟\n",
+    "Glucose of 148 mg/dL is *above* the 70-99 range.\nCheck `HbA1c` and:\n```\nfasting glucose\n```\nThen talk to a doctor.",
+    "• Iron: 18 mg/day\n• Vitamin C helps absorption\n\n_Not medical advice._",
+    "A ratio of 2 * 3 is not markdown, nor is snake_case_name.\n\n# Next steps\n- ask",
+]
+
+FRAGMENTS = [
+    "word", "two words", "**bold**", "*italic*", "***both***", "__under__", "_under_",
+    "`code`", "```\nblock\n```", "# ", "## ", "### Title", "1. ", "12. ", "- ", "* ", "• ",
+    "\n", "\n\n", "\n\n\n", " ", "😊", "é", "2 * 3", "a_b", "x.", "#tag", "-", "*",
+]
+
+
+def random_replies(n: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    return ["".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(5, 40))) for _ in range(n)]
+
+
+def stream(full: str, rng: random.Random) -> tuple[str, int]:
+    """The client's text after every event, and how many were "replace"."""
+    stripper = MarkdownStreamStripper()
+    events = []
+    i = 0
+    while i < len(full):
+        n = rng.randint(1, 6)
+        events.append(stripper.feed(full[i:i + n]))
+        i += n
+    events.append(stripper.flush())
+
+    text, replaced = "", 0
+    for event in filter(None, events):
+        if "replace" in event:
+            text, replaced = event["replace"], replaced + 1
+        else:
+            text += event["token"]
+    return text, replaced
+
+
+def check(replies: list[str], streams: int, rng: random.Random, allow_replace: bool, verbose: bool) -> tuple[int, int]:
+    """(replies that diverged, streams that needed a "replace")."""
+    failures = corrected = 0
+    for full in replies:
+        expected = strip_markdown(full)
+        for _ in range(streams):
+            got, replaced = stream(full, rng)
+            corrected += bool(replaced)
+            if got != expected or (replaced and not allow_replace):
+                failures += 1
+                if verbose:
+                    print(f"❌ {full!r}\n   streamed {got!r} ({replaced} replace)\n   expected {expected!r}")
+                break
+    return failures, corrected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming markdown stripper parity check")
+    parser.add_argument("--streams", type=int, default=300, help="random chunkings per reply")
+    parser.add_argument("--random", type=int, default=300, help="generated replies on top of the fixed ones")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failed = 0
+    for name, replies, allow_replace in (("typical", REPLIES, False),
+                                         ("random", random_replies(args.random, args.seed), True)):
+        failures, corrected = check(replies, args.streams, rng, allow_replace, args.verbose)
+        failed += failures
+        status = "✅ all match" if not failures else f"❌ {failures} replies diverged"
+        print(f"{name:<8} {len(replies)} replies × {args.streams} chunkings: {status} "
+              f"({corrected} streams needed a replace)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
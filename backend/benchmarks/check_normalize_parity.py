@@ -0,0 +1,126 @@
+# File: check_normalize_parity.py
+#
+# Parity check: normalize_input_data (precompiled trie regex + memoized key /
+# value resolution) vs a frozen copy of the implementation it replaced
+# (per-key scan of every alias with one re.search each). Both read the live
+# ALIASES / IGNORE_KEYWORDS tables, so alias edits don't trip it — only
+# changes to the matching itself do. Inputs:
+#
+#   ocr       seeded OCR-shaped payloads from benchmarks/corpus.py (alias
+#             spellings, units, reference ranges, header noise) at 10/30/100 keys
+#   dataset   backend/datasets/*.csv rows as raw report dicts
+#   aliases   every alias alone, upper-cased and padded, as a one-key payload
+#   cache     with --ocr-cache: every result recorded in an OCR cache database
+#             (real model output from a deployment's cache/ocr_cache.sqlite3)
+#
+# Exits non-zero on any mismatch.
+#
+#   cd backend
+#   python -m benchmarks.check_normalize_parity
+#   python -m benchmarks.check_normalize_parity --payloads 2000 --ocr-cache ../cache/ocr_cache.sqlite3 -v
+
+import re
+import sys
+import json
+import sqlite3
+import argparse
+
+from app import prediction_api1 as p1
+from benchmarks.corpus import ocr_corpus, dataset_payloads
+
+PAYLOAD_SIZES = [10, 30, 100]
+
+
+# ── Reference: normalize_input_data before the trie regex ────────────────────
+def reference_normalize(raw_json: dict) -> dict:
+    normalized = {}
+
+    # Sort aliases by specificity (longest alias first) to match MCHC before MCH etc.
+    sorted_aliases = sorted(p1.ALIASES.items(), key=lambda x: max(len(a) for a in x[1]), reverse=True)
+
+    for key_raw, value in raw_json.items():
+        key_clean = key_raw.lower().strip()
+
+        if any(kw in key_clean for kw in p1.IGNORE_KEYWORDS):
+            continue
+
+        for std_key, variants in sorted_aliases:
+            if std_key in normalized:
+                continue
+
+            matched = False
+            for alias in sorted(variants, key=len, reverse=True):
+                alias_clean = alias.strip()
+                # Exact match OR alias is fully contained in key as whole word
+                if key_clean == alias_clean:
+                    matched = True
+                    break
+                # alias contained in key with word boundaries
+                if re.search(r'(?<![a-z])' + re.escape(alias_clean) + r'(?![a-z])', key_clean):
+                    matched = True
+                    break
+
+            if matched:
+                cleaned = p1.clean_numeric(value)
+                if cleaned is not None:
+                    normalized[std_key] = cleaned
+
+    return normalized
+
+
+# ── Inputs ────────────────────────────────────────────────────────────────────
+def alias_payloads() -> list[dict]:
+    payloads = []
+    for variants in p1.ALIASES.values():
+        for alias in variants:
+            for key in (alias, alias.upper(), f"  {alias.strip().title()} :", f"Serum {alias.strip()} (test)"):
+                payloads.append({key: "12.5"})
+    return payloads
+
+
+def cached_payloads(path: str) -> list[dict]:
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT result FROM ocr_cache").fetchall()
+    finally:
+        conn.close()
+    payloads = [json.loads(r[0]) for r in rows]
+    return [p for p in payloads if isinstance(p, dict)]
+
+
+def check(name: str, payloads: list[dict], verbose: bool) -> int:
+    mismatches = 0
+    for payload in payloads:
+        expected = reference_normalize(payload)
+        got = p1.normalize_input_data(payload)
+        if got != expected:
+            mismatches += 1
+            if verbose and mismatches <= 5:
+                print(f"❌ {name}: {payload!r}\n   got      {got!r}\n   expected {expected!r}")
+    status = "✅" if not mismatches else "❌"
+    print(f"{status} {name:<8} {len(payloads):>6} payloads, {mismatches} mismatches")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="normalize_input_data parity check")
+    parser.add_argument("--payloads", type=int, default=1000, help="OCR-shaped payloads per size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ocr-cache", help="also check every result in this OCR cache database")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    suites = {
+        "ocr":     [p for n in PAYLOAD_SIZES for p in ocr_corpus(args.payloads, n, seed=args.seed)],
+        "dataset": dataset_payloads(),
+        "aliases": alias_payloads(),
+    }
+    if args.ocr_cache:
+        suites["cache"] = cached_payloads(args.ocr_cache)
+
+    mismatches = sum(check(name, payloads, args.verbose) for name, payloads in suites.items())
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# File: corpus.py
+#
+# Benchmark inputs: rows of backend/datasets/*.csv, and synthetic payloads
+# shaped like what the OCR step returns — alias spellings of real tests,
+# values with units and thousands separators, reference-range and unit
+# columns, header noise and tests no model uses. Seeded, so every run
+# benchmarks the same corpus.
+
+import os
+import glob
+import random
+
+import pandas as pd
+
+from app.prediction_api1 import ALIASES
+
+DATASET_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datasets")
+
+UNITS = {
+    "HGB": "g/dL", "RBC": "million/cumm", "MCV": "fL", "MCH": "pg", "MCHC": "g/dL",
+    "RDW": "%", "PCV": "%", "WBC": "/cumm", "TLC": "/cumm", "Platelets": "/cumm",
+    "PLT /mm3": "/cumm", "Glucose": "mg/dL", "BloodPressure": "mmHg", "Insulin": "uU/mL",
+    "BMI": "kg/m2", "trestbps": "mmHg", "chol": "mg/dL", "thalach": "bpm",
+    "Total_Bilirubin": "mg/dL", "Direct_Bilirubin": "mg/dL", "Alkaline_Phosphotase": "U/L",
+    "Alamine_Aminotransferase": "U/L", "Aspartate_Aminotransferase": "U/L",
+    "Total_Protiens": "g/dL", "Albumin": "g/dL", "Age": "years",
+}
+
+NOISE_KEYS = [
+    "Patient ID", "PID", "Sample Type", "Collected On", "Reported On", "Registered On",
+    "Method", "Instrument", "Flag", "Primary Sample", "Referred By", "Lab No",
+    "Report Status", "Page", "Barcode",
+]
+
+UNUSED_TESTS = [
+    "ESR", "Neutrophils", "Lymphocytes", "Eosinophils", "Monocytes", "Basophils",
+    "Serum Creatinine", "Urea", "Uric Acid", "Sodium", "Potassium", "Chloride",
+    "TSH", "T3", "T4", "Vitamin D", "Vitamin B12", "Ferritin", "Iron", "HbA1c",
+    "Triglycerides", "HDL Cholesterol", "LDL Cholesterol", "VLDL", "Calcium",
+]
+
+
+def _spelling(rng: random.Random, alias: str) -> str:
+    alias = alias.strip()
+    style = rng.random()
+    if style < 0.3:
+        return alias.title()
+    if style < 0.5:
+        return alias.upper()
+    if style < 0.65:
+        return alias + ":"
+    if style < 0.75:
+        return "  " + alias + " "
+    return alias
+
+
+def _value(rng: random.Random, std_key: str) -> str:
+    if std_key in ("Sex",):
+        return rng.choice(["Male", "Female", "M", "F", "male"])
+    base = rng.uniform(0.5, 400)
+    number = f"{base:,.2f}" if base > 1000 else f"{base:.1f}"
+    unit = UNITS.get(std_key)
+    style = rng.random()
+    if unit and style < 0.6:
+        return f"{number} {unit}"
+    if style < 0.7:
+        return f"{number} (H)"
+    if style < 0.8:
+        return f"< {number}"
+    return number
+
+
+def ocr_payload(rng: random.Random, n_fields: int) -> dict:
+    """One synthetic OCR result with about n_fields keys."""
+    payload = {}
+    std_keys = list(ALIASES)
+    while len(payload) < n_fields:
+        kind = rng.random()
+        if kind < 0.55:
+            std = rng.choice(std_keys)
+            name = _spelling(rng, rng.choice(ALIASES[std]))
+            payload[name] = _value(rng, std)
+            if rng.random() < 0.3:
+                payload[f"{name} Reference Range"] = f"{rng.uniform(1, 50):.1f}-{rng.uniform(50, 300):.1f}"
+            if rng.random() < 0.2:
+                payload[f"{name} Unit"] = UNITS.get(std, "")
+        elif kind < 0.8:
+            payload[rng.choice(UNUSED_TESTS) + ("" if rng.random() < 0.7 else f" {rng.randint(1, 9)}")] = _value(rng, "")
+        else:
+            payload[rng.choice(NOISE_KEYS) + ("" if rng.random() < 0.6 else f" {rng.randint(1, 99)}")] = \
+                rng.choice(["N/A", "Serum", "12/03/2025 10:42", f"HM{rng.randint(10000, 99999)}", "Auto analyser"])
+    return payload
+
+
+def ocr_corpus(n: int, n_fields: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed * 1000 + n_fields)
+    return [ocr_payload(rng, n_fields) for _ in range(n)]
+
+
+def dataset_payloads(limit_per_dataset: int = 200) -> list[dict]:
+    """Dataset rows as raw report dicts (column name -> value string), all diseases mixed."""
+    rows = []
+    for path in sorted(glob.glob(os.path.join(DATASET_DIR, "*.csv"))):
+        df = pd.read_csv(path, encoding="utf-8-sig").head(limit_per_dataset)
+        for record in df.to_dict(orient="records"):
+            rows.append({k: ("" if pd.isna(v) else str(v)) for k, v in record.items()})
+    return rows
@@ -0,0 +1,416 @@
+# File: loadtest.py
+#
+# End-to-end load test. Starts the OpenRouter and PostgREST stubs
+# (benchmarks/loadtest_stubs.py) and the API under uvicorn, points the API
+# at the stubs through its env config, then drives a weighted traffic mix
+# from --concurrency closed-loop clients and reports p50/p95/p99 latency,
+# throughput and error rate per endpoint.
+#
+#   cd backend
+#   python -m benchmarks.loadtest --duration 30 --concurrency 32
+#   python -m benchmarks.loadtest --mix chat=3,explain=1,upload=1,health=1 --app-workers 2
+#   python -m benchmarks.loadtest --llm-429-rate 0.05 --llm-error-rate 0.02 --json out.json
+#   python -m benchmarks.loadtest --app-dir /srv/healthmate   # where models/ lives
+#   python -m benchmarks.loadtest --app-env INFERENCE_EXECUTOR=process   # extra API env
+#
+# Endpoints in the mix:
+#   health       GET  /                       (no I/O — its latency is event-loop lag)
+#   predict      POST /api1/predict-risk
+#   predict_batch POST /api1/predict-risk/batch  (--batch-size reports; CPU-heavy)
+#   explain      POST /api1/explain           (unique values, so mostly cache misses)
+#   upload       POST /upload-image/          (sync pipeline: OCR stub + prediction)
+#   upload_job   POST /upload-image/?mode=job, then polls /jobs/{id} to completion
+#   chat         POST /api2/chat
+#   chat_stream  POST /api2/chat/stream       (also reports time to first token)
+#   history      GET  /api2/history
+#   symptom      POST /api/predict
+#
+# Requires the ML artifacts in <app-dir>/models (the API won't start without them).
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from collections import defaultdict
+
+import httpx
+import numpy as np
+from jose import jwt
+from PIL import Image, ImageDraw
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MIX = "health=1,predict=4,explain=2,upload=1,chat=3,chat_stream=1,history=1"
+JWT_SECRET  = "loadtest-jwt-secret"
+TERMINAL    = {"done", "failed"}
+
+
+# ── Processes ─────────────────────────────────────────────────────────────────
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _uvicorn(target: str, port: int, env: dict, cwd: str, workers: int, log_path: str) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "uvicorn", target, "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning", "--no-access-log"]
+    log = open(log_path, "w")
+    return subprocess.Popen(cmd, env=env, cwd=cwd, stdout=log, stderr=subprocess.STDOUT)
+
+
+async def _wait_ready(url: str, proc: subprocess.Popen, timeout: float, log_path: str):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(timeout=2) as client:
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                with open(log_path) as f:
+                    tail = f.read()[-2000:]
+                raise RuntimeError(f"{url} exited during startup:\n{tail}")
+            try:
+                # The API's /ready is 503 until its warm-up has finished
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout:.0f}s")
+
+
+# ── Request payloads ──────────────────────────────────────────────────────────
+def make_images(n: int, seed: int = 0) -> list[bytes]:
+    """Distinct report-like JPEGs, so uploads miss the OCR cache until the pool repeats."""
+    rng = random.Random(seed)
+    images = []
+    for i in range(n):
+        img = Image.new("RGB", (1200, 1600), "white")
+        draw = ImageDraw.Draw(img)
+        for row in range(40):
+            y = 80 + row * 36
+            draw.text((80, y), f"Test {row:02d}  {rng.uniform(0, 300):8.2f}  units  ref {i}", fill="black")
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=85)
+        images.append(buf.getvalue())
+    return images
+
+
+def explain_body(rng: random.Random) -> dict:
+    hb, age = round(rng.uniform(7, 17), 1), rng.randint(18, 80)
+    return {
+        "disease": "anemia",
+        "risk_percent": f"{rng.uniform(1, 99):.1f}%",
+        "matched_features": ["HGB", "Age"],
+        "extracted_data": {"HGB": hb, "Age": age},
+    }
+
+
+def predict_body(rng: random.Random) -> dict:
+    return {"features": {
+        "Hemoglobin": f"{rng.uniform(8, 17):.1f} g/dL", "MCV": f"{rng.uniform(70, 100):.1f} fL",
+        "MCH": f"{rng.uniform(22, 34):.1f} pg", "MCHC": "33.1", "Glucose": str(rng.randint(70, 220)),
+        "BMI": f"{rng.uniform(18, 40):.1f}", "Age": str(rng.randint(18, 80)),
+        "Sex": rng.choice(["Male", "Female"]), "Total Bilirubin": f"{rng.uniform(0.3, 6):.1f}",
+    }}
+
+
+def user_tokens(n: int, issuer: str) -> list[str]:
+    now = int(time.time())
+    return [
+        jwt.encode({"sub": f"00000000-0000-4000-8000-{i:012d}", "aud": "authenticated", "iss": issuer,
+                    "iat": now, "exp": now + 24 * 3600, "role": "authenticated"}, JWT_SECRET, algorithm="HS256")
+        for i in range(n)
+    ]
+
+
+# ── Traffic ───────────────────────────────────────────────────────────────────
+class LoadGen:
+    def __init__(self, client: httpx.AsyncClient, tokens: list[str], images: list[bytes], seed: int,
+                 batch_size: int = 100):
+        self.client = client
+        self.batch_size = batch_size
+        self.tokens = tokens
+        self.images = images
+        self.rng = random.Random(seed)
+        self.image_i = 0
+        self.samples = defaultdict(list)   # endpoint -> [(latency_s, status)]
+        self.ttft = defaultdict(list)      # endpoint -> [seconds to first token]
+        self.recording = False
+
+    def _auth(self) -> dict:
+        return {"Authorization": f"Bearer {self.rng.choice(self.tokens)}"}
+
+    def _next_image(self) -> bytes:
+        img = self.images[self.image_i % len(self.images)]
+        self.image_i += 1
+        return img
+
+    async def health(self):
+        return await self.client.get("/")
+
+    async def predict(self):
+        return await self.client.post("/api1/predict-risk", json=predict_body(self.rng))
+
+    async def predict_batch(self):
+        reports = [predict_body(self.rng)["features"] for _ in range(self.batch_size)]
+        return await self.client.post("/api1/predict-risk/batch", json={"reports": reports})
+
+    async def explain(self):
+        return await self.client.post("/api1/explain", json=explain_body(self.rng))
+
+    async def upload(self):
+        files = {"file": ("report.jpg", self._next_image(), "image/jpeg")}
+        return await self.client.post("/upload-image/", files=files)
+
+    async def upload_job(self):
+        files = {"file": ("report.jpg", self._next_image(), "image/jpeg")}
+        r = await self.client.post("/upload-image/", params={"mode": "job"}, files=files)
+        if r.status_code != 202:
+            return r
+        status_url = r.json()["status_url"]
+        while True:
+            await asyncio.sleep(0.25)
+            r = await self.client.get(status_url)
+            if r.status_code != 200 or r.json().get("status") in TERMINAL:
+                return r
+
+    async def chat(self):
+        return await self.client.post("/api2/chat", headers=self._auth(),
+                                      json={"message": "I have had a mild headache since yesterday evening."})
+
+    async def chat_stream(self):
+        t0 = time.perf_counter()
+        first = None
+        async with self.client.stream("POST", "/api2/chat/stream", headers=self._auth(),
+                                      json={"message": "Is it normal to feel tired after lunch?"}) as r:
+            async for line in r.aiter_lines():
+                if first is None and line.startswith("data:"):
+                    first = time.perf_counter() - t0
+        if first is not None and self.recording:
+            self.ttft["chat_stream"].append(first)
+        return r
+
+    async def history(self):
+        return await self.client.get("/api2/history", headers=self._auth())
+
+    async def symptom(self):
+        return await self.client.post("/api/predict", json={"symptoms": ["headache", "high_fever", "fatigue"]})
+
+    async def client_loop(self, endpoints: list[str], weights: list[float], stop_at: float):
+        while time.monotonic() < stop_at:
+            name = self.rng.choices(endpoints, weights)[0]
+            t0 = time.perf_counter()
+            try:
+                status = (await getattr(self, name)()).status_code
+            except httpx.TimeoutException:
+                status = "timeout"
+            except httpx.TransportError as e:
+                status = type(e).__name__
+            if self.recording:
+                self.samples[name].append((time.perf_counter() - t0, status))
+
+
+def _ms(values, q) -> float:
+    return round(float(np.percentile(values, q)) * 1000, 1)
+
+
+def summarize(samples: dict, ttft: dict, elapsed: float) -> dict:
+    report = {}
+    for name in sorted(samples):
+        lat = [s for s, _ in samples[name]]
+        statuses = defaultdict(int)
+        for _, status in samples[name]:
+            statuses[str(status)] += 1
+        errors = sum(n for status, n in statuses.items() if not status.startswith("2"))
+        report[name] = {
+            "requests":   len(lat),
+            "rps":        round(len(lat) / elapsed, 2),
+            "p50_ms":     _ms(lat, 50),
+            "p95_ms":     _ms(lat, 95),
+            "p99_ms":     _ms(lat, 99),
+            "max_ms":     round(max(lat) * 1000, 1),
+            "error_rate": round(errors / len(lat), 4),
+            "status":     dict(statuses),
+        }
+        if ttft.get(name):
+            report[name]["ttft_p50_ms"] = _ms(ttft[name], 50)
+            report[name]["ttft_p95_ms"] = _ms(ttft[name], 95)
+    return report
+
+
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if not hasattr(LoadGen, name.strip()) or name.strip().startswith("_"):
+            raise SystemExit(f"❌ Unknown endpoint in --mix: {name}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+# ── Main ──────────────────────────────────────────────────────────────────────
+async def run(args) -> dict:
+    mix = parse_mix(args.mix)
+    llm_port, db_port, app_port = _free_port(), _free_port(), _free_port()
+    tmp = tempfile.mkdtemp(prefix="healthmate-loadtest-")
+    db_url = f"http://127.0.0.1:{db_port}"
+    issuer = f"{db_url}/auth/v1"
+
+    stub_env = dict(os.environ,
+                    PYTHONPATH=BACKEND_DIR,
+                    STUB_LLM_LATENCY=str(args.llm_latency),
+                    STUB_LLM_JITTER=str(args.llm_jitter),
+                    STUB_LLM_TOKEN_DELAY=str(args.llm_token_delay),
+                    STUB_LLM_ERROR_RATE=str(args.llm_error_rate),
+                    STUB_LLM_429_RATE=str(args.llm_429_rate),
+                    STUB_LLM_RETRY_AFTER=str(args.llm_retry_after),
+                    STUB_DB_LATENCY=str(args.db_latency))
+    # The API's own upstream config, aimed at the stubs
+    app_env = dict(os.environ,
+                   PYTHONPATH=BACKEND_DIR,
+                   OPENROUTER_BASE_URL=f"http://127.0.0.1:{llm_port}/api/v1",
+                   OPENROUTER_API_KEY="loadtest",
+                   SUPABASE_URL=db_url,
+                   SUPABASE_PROJECT_ID="loadtest",
+                   SUPABASE_ANON_KEY="loadtest",
+                   SUPABASE_SERVICE_ROLE_KEY="loadtest",
+                   SUPABASE_JWT_SECRET=JWT_SECRET,
+                   SUPABASE_JWT_ISSUER=issuer,
+                   OCR_CACHE_PATH=os.path.join(tmp, "ocr_cache.sqlite3"))
+    for pair in args.app_env:
+        key, _, value = pair.partition("=")
+        app_env[key] = value
+
+    procs = []
+    try:
+        specs = [
+            ("benchmarks.loadtest_stubs:openrouter_app", llm_port, stub_env, BACKEND_DIR, 1, "openrouter"),
+            ("benchmarks.loadtest_stubs:postgrest_app", db_port, stub_env, BACKEND_DIR, 1, "postgrest"),
+            ("app.main:app", app_port, app_env, args.app_dir, args.app_workers, "app"),
+        ]
+        for target, port, env, cwd, workers, name in specs:
+            log_path = os.path.join(tmp, f"{name}.log")
+            proc = _uvicorn(target, port, env, cwd, workers, log_path)
+            procs.append(proc)
+            await _wait_ready(f"http://127.0.0.1:{port}/_stub/stats" if name != "app"
+                              else f"http://127.0.0.1:{port}/ready", proc, args.startup_timeout, log_path)
+        print(f"🚀 Stubs on :{llm_port} (OpenRouter) and :{db_port} (PostgREST), "
+              f"API on :{app_port} with {args.app_workers} worker(s) — logs in {tmp}")
+
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{app_port}", limits=limits,
+                                     timeout=args.timeout) as client:
+            gen = LoadGen(client, user_tokens(args.users, issuer), make_images(args.images), args.seed,
+                          args.batch_size)
+            endpoints, weights = list(mix), list(mix.values())
+
+            start = time.monotonic()
+            stop_at = start + args.warmup + args.duration
+            loops = [asyncio.create_task(gen.client_loop(endpoints, weights, stop_at))
+                     for _ in range(args.concurrency)]
+            print(f"🔥 Warm-up {args.warmup:.0f}s, then measuring {args.duration:.0f}s "
+                  f"at concurrency {args.concurrency}: {args.mix}")
+            await asyncio.sleep(args.warmup)
+            gen.recording = True
+            measured_from = time.monotonic()
+            await asyncio.gather(*loops)
+            elapsed = time.monotonic() - measured_from
+
+            # Per-stage / per-model breakdown from the API's own /metrics
+            scrape = await client.get("/metrics")
+            if scrape.status_code == 200:
+                with open(os.path.join(tmp, "metrics.prom"), "w") as f:
+                    f.write(scrape.text)
+
+            async with httpx.AsyncClient(timeout=5) as c:
+                upstream = {
+                    "openrouter": (await c.get(f"http://127.0.0.1:{llm_port}/_stub/stats")).json(),
+                    "postgrest":  (await c.get(f"http://127.0.0.1:{db_port}/_stub/stats")).json(),
+                }
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    endpoints_report = summarize(gen.samples, gen.ttft, elapsed)
+    total = sum(e["requests"] for e in endpoints_report.values())
+    errors = sum(e["requests"] * e["error_rate"] for e in endpoints_report.values())
+    return {
+        "config": {k: v for k, v in vars(args).items() if k != "json"},
+        "elapsed_s": round(elapsed, 2),
+        "total": {"requests": total, "rps": round(total / elapsed, 2),
+                  "error_rate": round(errors / total, 4) if total else 0.0},
+        "endpoints": endpoints_report,
+        "upstream": upstream,
+        "logs": tmp,
+    }
+
+
+def print_report(report: dict):
+    print(f"\n{'endpoint':<15}{'reqs':>7}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}  status")
+    for name, e in report["endpoints"].items():
+        status = " ".join(f"{k}×{v}" for k, v in sorted(e["status"].items()))
+        print(f"{name:<15}{e['requests']:>7}{e['rps']:>8.1f}{e['p50_ms']:>9.0f}{e['p95_ms']:>9.0f}"
+              f"{e['p99_ms']:>9.0f}{e['error_rate']:>8.1%}  {status}")
+        if "ttft_p50_ms" in e:
+            print(f"{'':<15}time to first token p50 {e['ttft_p50_ms']:.0f} ms, p95 {e['ttft_p95_ms']:.0f} ms")
+    t = report["total"]
+    print(f"{'total':<15}{t['requests']:>7}{t['rps']:>8.1f}{'':>27}{t['error_rate']:>8.1%}")
+    print(f"\n📡 Upstream calls: {json.dumps(report['upstream'])}")
+    metrics_path = os.path.join(report["logs"], "metrics.prom")
+    if os.path.exists(metrics_path):
+        print(f"📈 API /metrics after the run: {metrics_path}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="End-to-end load test against local upstream stubs")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint=weight,... (see header)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--timeout", type=float, default=120, help="per-request client timeout (s)")
+    parser.add_argument("--app-workers", type=int, default=1)
+    parser.add_argument("--app-dir", default=BACKEND_DIR, help="working directory of the API (holds models/)")
+    parser.add_argument("--startup-timeout", type=float, default=60)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--images", type=int, default=20, help="distinct upload images before repeats")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency", type=float, default=0.8)
+    parser.add_argument("--llm-jitter", type=float, default=0.25)
+    parser.add_argument("--llm-token-delay", type=float, default=0.02)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-429-rate", type=float, default=0.0)
+    parser.add_argument("--llm-retry-after", type=float, default=1)
+    parser.add_argument("--db-latency", type=float, default=0.02)
+    parser.add_argument("--batch-size", type=int, default=100, help="reports per predict_batch request")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the API process (repeatable)")
+    parser.add_argument("--json", help="write the report to this path")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    args.app_dir = os.path.abspath(args.app_dir)
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"📝 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
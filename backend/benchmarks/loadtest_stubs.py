@@ -0,0 +1,191 @@
+# File: loadtest_stubs.py
+#
+# Local stand-ins for the two upstreams, used by benchmarks/loadtest.py:
+#
+#   openrouter_app — OpenRouter-compatible POST /api/v1/chat/completions.
+#                    Answers OCR (image) prompts with a lab-report JSON,
+#                    /explain prompts with explanation JSON and chat with
+#                    plain text; supports "stream": true (SSE chunks).
+#   postgrest_app  — the slice of Supabase PostgREST the app uses:
+#                    chat_history (select / insert) and profiles (single).
+#
+# Behaviour is set through env vars (loadtest.py passes them through):
+#
+#   STUB_LLM_LATENCY      mean seconds before the first byte      (0.8)
+#   STUB_LLM_JITTER       ± fraction of that latency               (0.25)
+#   STUB_LLM_TOKEN_DELAY  seconds between streamed chunks          (0.02)
+#   STUB_LLM_ERROR_RATE   fraction answered with a 500             (0)
+#   STUB_LLM_429_RATE     fraction answered with a 429             (0)
+#   STUB_LLM_RETRY_AFTER  Retry-After sent with 429s               (1)
+#   STUB_DB_LATENCY       seconds per PostgREST request            (0.02)
+#
+# Run one by hand with:
+#   cd backend
+#   python -m uvicorn benchmarks.loadtest_stubs:openrouter_app --port 9100
+
+import os
+import json
+import time
+import random
+import asyncio
+from collections import Counter, defaultdict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LLM_LATENCY     = float(os.getenv("STUB_LLM_LATENCY", "0.8"))
+LLM_JITTER      = float(os.getenv("STUB_LLM_JITTER", "0.25"))
+LLM_TOKEN_DELAY = float(os.getenv("STUB_LLM_TOKEN_DELAY", "0.02"))
+LLM_ERROR_RATE  = float(os.getenv("STUB_LLM_ERROR_RATE", "0"))
+LLM_429_RATE    = float(os.getenv("STUB_LLM_429_RATE", "0"))
+LLM_RETRY_AFTER = os.getenv("STUB_LLM_RETRY_AFTER", "1")
+DB_LATENCY      = float(os.getenv("STUB_DB_LATENCY", "0.02"))
+
+OCR_TEMPLATES = [
+    {"Hemoglobin": "{hb} g/dL", "RBC Count": "{rbc} million/cumm", "MCV": "{mcv} fL",
+     "MCH": "{mch} pg", "MCHC": "33.1 g/dL", "RDW": "13.9 %", "Total WBC Count": "7,400 /cumm",
+     "Platelet Count": "2,45,000 /cumm", "Age": "{age} years", "Sex": "{sex}",
+     "Hemoglobin Reference Range": "12.0-15.5", "Sample Type": "EDTA Blood"},
+    {"Glucose (Fasting)": "{glu} mg/dL", "Insulin": "{ins} uU/mL", "BMI": "{bmi}",
+     "Blood Pressure": "{bp} mmHg", "Age": "{age}", "Patient ID": "HM{pid}"},
+    {"Total Bilirubin": "{tb} mg/dL", "Direct Bilirubin": "0.3 mg/dL", "Alkaline Phosphatase": "{alp} U/L",
+     "SGPT (ALT)": "{alt} U/L", "SGOT (AST)": "{ast} U/L", "Total Proteins": "6.8 g/dL",
+     "Albumin": "{alb} g/dL", "A/G Ratio": "1.2", "Age": "{age}", "Gender": "{sex}",
+     "Method": "Photometry"},
+]
+
+CHAT_REPLY = (
+    "Thanks for telling me that. A mild headache after a long day is usually linked to "
+    "tiredness, screen time or not drinking enough water, so it is worth keeping an eye on. "
+    "How many hours of sleep have you been getting this week?"
+)
+
+
+def _ocr_text(rng: random.Random) -> str:
+    values = {
+        "hb": f"{rng.uniform(8, 17):.1f}", "rbc": f"{rng.uniform(3.5, 6):.2f}",
+        "mcv": f"{rng.uniform(70, 100):.1f}", "mch": f"{rng.uniform(22, 34):.1f}",
+        "age": rng.randint(18, 80), "sex": rng.choice(["Male", "Female"]),
+        "glu": rng.randint(70, 220), "ins": rng.randint(0, 250), "bmi": f"{rng.uniform(18, 40):.1f}",
+        "bp": rng.randint(60, 110), "pid": rng.randint(10000, 99999),
+        "tb": f"{rng.uniform(0.3, 6):.1f}", "alp": rng.randint(60, 600), "alt": rng.randint(10, 200),
+        "ast": rng.randint(10, 200), "alb": f"{rng.uniform(2.5, 5):.1f}",
+    }
+    template = rng.choice(OCR_TEMPLATES)
+    return json.dumps({k: v.format(**values) for k, v in template.items()})
+
+
+def _explain_text() -> str:
+    return json.dumps({
+        "explanation": "Your result sits in a range that deserves some attention, but it is not a cause for alarm.",
+        "precautions": [
+            "Drink enough water through the day",
+            "Add leafy greens and lentils to your meals",
+            "Take a 20 minute walk most days",
+            "See your doctor if you feel unusually tired or dizzy",
+            "Small steady changes make a real difference",
+        ],
+    })
+
+
+def _prompt_kind(messages: list[dict]) -> str:
+    for m in messages:
+        content = m.get("content")
+        if isinstance(content, list) and any(part.get("type") == "image_url" for part in content):
+            return "ocr"
+    last = messages[-1].get("content") if messages else ""
+    if isinstance(last, str) and '"precautions"' in last:
+        return "explain"
+    return "chat"
+
+
+# ── OpenRouter stub ───────────────────────────────────────────────────────────
+openrouter_app = FastAPI()
+_llm_stats: dict[str, Counter] = defaultdict(Counter)
+_rng = random.Random()
+
+
+@openrouter_app.post("/api/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    kind = _prompt_kind(body.get("messages", []))
+    await asyncio.sleep(max(0.0, LLM_LATENCY * (1 + _rng.uniform(-LLM_JITTER, LLM_JITTER))))
+
+    roll = _rng.random()
+    if roll < LLM_429_RATE:
+        _llm_stats[kind]["429"] += 1
+        return JSONResponse({"error": {"message": "Rate limit exceeded (stub)", "code": 429}},
+                            status_code=429, headers={"Retry-After": LLM_RETRY_AFTER})
+    if roll < LLM_429_RATE + LLM_ERROR_RATE:
+        _llm_stats[kind]["500"] += 1
+        return JSONResponse({"error": {"message": "Upstream error (stub)", "code": 500}}, status_code=500)
+
+    _llm_stats[kind]["200"] += 1
+    text = _ocr_text(_rng) if kind == "ocr" else _explain_text() if kind == "explain" else CHAT_REPLY
+
+    if body.get("stream"):
+        async def chunks():
+            words = text.split(" ")
+            for i in range(0, len(words), 3):
+                delta = " ".join(words[i:i + 3]) + ("" if i + 3 >= len(words) else " ")
+                yield "data: " + json.dumps({"choices": [{"delta": {"content": delta}}]}) + "\n\n"
+                await asyncio.sleep(LLM_TOKEN_DELAY)
+            yield "data: [DONE]\n\n"
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    return {
+        "id": f"stub-{time.time_ns()}",
+        "model": body.get("model"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+    }
+
+
+@openrouter_app.get("/_stub/stats")
+def llm_stats():
+    return {kind: dict(counts) for kind, counts in _llm_stats.items()}
+
+
+# ── PostgREST stub (chat_history, profiles) ──────────────────────────────────
+postgrest_app = FastAPI()
+_history: dict[str, list[dict]] = defaultdict(list)
+_db_stats: Counter = Counter()
+
+
+def _eq(request: Request, column: str) -> str | None:
+    value = request.query_params.get(column, "")
+    return value[3:] if value.startswith("eq.") else None
+
+
+@postgrest_app.get("/rest/v1/chat_history")
+async def select_chat_history(request: Request):
+    await asyncio.sleep(DB_LATENCY)
+    _db_stats["chat_history.select"] += 1
+    rows = sorted(_history.get(_eq(request, "user_id"), []), key=lambda r: r["created_at"],
+                  reverse=request.query_params.get("order", "").endswith(".desc"))
+    limit = int(request.query_params.get("limit", len(rows)))
+    return [{"role": r["role"], "content": r["content"], "created_at": r["created_at"]} for r in rows[:limit]]
+
+
+@postgrest_app.post("/rest/v1/chat_history", status_code=201)
+async def insert_chat_history(request: Request):
+    await asyncio.sleep(DB_LATENCY)
+    body = await request.json()
+    rows = body if isinstance(body, list) else [body]
+    _db_stats["chat_history.insert"] += 1
+    _db_stats["chat_history.rows"] += len(rows)
+    for row in rows:
+        _history[row["user_id"]].append(row)
+    return rows
+
+
+@postgrest_app.get("/rest/v1/profiles")
+async def select_profile(request: Request):
+    await asyncio.sleep(DB_LATENCY)
+    _db_stats["profiles.select"] += 1
+    user_id = _eq(request, "id") or ""
+    return {"full_name": f"Load Test {user_id[:4]}", "email": f"{user_id[:8]}@loadtest.local"}
+
+
+@postgrest_app.get("/_stub/stats")
+def db_stats():
+    return dict(_db_stats)
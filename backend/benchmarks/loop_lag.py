@@ -0,0 +1,142 @@
+# File: loop_lag.py
+#
+# Event-loop lag under mixed inference + I/O load, once per INFERENCE_EXECUTOR:
+#
+#   inline    predictions run on the event loop (how /predict-risk used to work)
+#   thread    bounded ThreadPoolExecutor (the default)
+#   process   bounded ProcessPoolExecutor
+#
+# Each setup is one benchmarks.loadtest run with the same traffic: CPU-bound
+# predict / predict_batch requests next to I/O-bound chat (LLM stub) and
+# health requests. Reports the API's own healthmate_event_loop_lag_seconds
+# quantiles (from its /metrics after the run), the latency of the I/O
+# routes that share the loop, and how many requests the pool turned away.
+#
+#   cd backend
+#   python -m benchmarks.loop_lag --app-dir /srv/healthmate
+#   python -m benchmarks.loop_lag --executors inline,thread --duration 20 --batch-size 200
+#   python -m benchmarks.loop_lag --json loop_lag.json
+
+import os
+import re
+import json
+import asyncio
+import argparse
+
+from benchmarks import loadtest
+
+EXECUTORS   = ["inline", "thread", "process"]
+DEFAULT_MIX = "health=2,chat=2,predict=4,predict_batch=1"
+LAG_METRIC  = "healthmate_event_loop_lag_seconds"
+
+_BUCKET_RE = re.compile(rf'^{LAG_METRIC}_bucket\{{le="([^"]+)"\}} (\S+)$')
+
+
+# ── Prometheus histogram → quantiles ──────────────────────────────────────────
+def lag_buckets(prom_text: str) -> list[tuple[float, float]]:
+    """Cumulative (upper bound, count) pairs of the loop-lag histogram."""
+    buckets = []
+    for line in prom_text.splitlines():
+        m = _BUCKET_RE.match(line)
+        if m:
+            buckets.append((float(m.group(1)), float(m.group(2))))
+    return sorted(buckets)
+
+
+def histogram_quantile(q: float, buckets: list[tuple[float, float]]) -> float | None:
+    """Same linear interpolation inside the bucket as PromQL's histogram_quantile."""
+    if not buckets or buckets[-1][1] == 0:
+        return None
+    rank = q * buckets[-1][1]
+    prev_bound, prev_count = 0.0, 0.0
+    for bound, count in buckets:
+        if count >= rank:
+            if bound == float("inf"):
+                return prev_bound
+            return prev_bound + (bound - prev_bound) * (rank - prev_count) / max(count - prev_count, 1e-12)
+        prev_bound, prev_count = bound, count
+    return prev_bound
+
+
+# ── Runs ──────────────────────────────────────────────────────────────────────
+def run_executor(executor: str, args) -> dict:
+    lt_args = loadtest.build_parser().parse_args([])
+    lt_args.mix = args.mix
+    lt_args.concurrency = args.concurrency
+    lt_args.duration = args.duration
+    lt_args.warmup = args.warmup
+    lt_args.batch_size = args.batch_size
+    lt_args.app_dir = os.path.abspath(args.app_dir)
+    lt_args.app_env = [f"INFERENCE_EXECUTOR={executor}"] + args.app_env
+
+    print(f"\n━━ INFERENCE_EXECUTOR={executor} ━━")
+    report = asyncio.run(loadtest.run(lt_args))
+
+    lag = {}
+    prom_path = os.path.join(report["logs"], "metrics.prom")
+    if os.path.exists(prom_path):
+        with open(prom_path) as f:
+            buckets = lag_buckets(f.read())
+        for q in (0.5, 0.99):
+            value = histogram_quantile(q, buckets)
+            lag[f"p{int(q * 100)}_ms"] = round(value * 1000, 1) if value is not None else None
+        lag["samples"] = int(buckets[-1][1]) if buckets else 0
+
+    return {"loop_lag": lag, "endpoints": report["endpoints"], "logs": report["logs"]}
+
+
+def _status_count(endpoint: dict | None, prefix: str) -> int:
+    if not endpoint:
+        return 0
+    return sum(n for status, n in endpoint["status"].items() if status.startswith(prefix))
+
+
+def print_comparison(results: dict):
+    def p99(r, name):
+        e = r["endpoints"].get(name)
+        return f"{e['p99_ms']:.0f}" if e else "-"
+
+    def lag(r, key):
+        v = r["loop_lag"].get(key)
+        return f"{v:.1f}" if v is not None else "-"
+
+    print(f"\n{'executor':<10}{'lag p50 ms':>12}{'lag p99 ms':>12}{'health p99':>12}{'chat p99':>10}"
+          f"{'predict p99':>13}{'batch p99':>11}{'503s':>7}{'504s':>7}")
+    for name, r in results.items():
+        rejected = sum(_status_count(r["endpoints"].get(e), "503") for e in ("predict", "predict_batch"))
+        timed_out = sum(_status_count(r["endpoints"].get(e), "504") for e in ("predict", "predict_batch"))
+        print(f"{name:<10}{lag(r, 'p50_ms'):>12}{lag(r, 'p99_ms'):>12}{p99(r, 'health'):>12}{p99(r, 'chat'):>10}"
+              f"{p99(r, 'predict'):>13}{p99(r, 'predict_batch'):>11}{rejected:>7}{timed_out:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event-loop lag per inference executor under mixed load")
+    parser.add_argument("--executors", default=",".join(EXECUTORS), help=f"comma-separated subset of {EXECUTORS}")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="loadtest endpoint=weight,...")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--batch-size", type=int, default=100, help="reports per predict_batch request")
+    parser.add_argument("--app-dir", default=loadtest.BACKEND_DIR, help="working directory of the API (holds models/)")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the API process, e.g. INFERENCE_WORKERS=2")
+    parser.add_argument("--json", help="write the results to this path")
+    args = parser.parse_args()
+
+    results = {}
+    for executor in args.executors.split(","):
+        if executor not in EXECUTORS:
+            raise SystemExit(f"❌ Unknown executor: {executor}")
+        results[executor] = run_executor(executor, args)
+
+    print_comparison(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"\n📝 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# File: memory.py
+#
+# Per-worker memory report: how much of each worker is its own (USS) and how
+# much is shared with the other workers (copy-on-write pages from a
+# preloading master, shared libraries), from /proc/<pid>/smaps_rollup.
+#
+# Launches the API in each serving setup, sends a few requests so every
+# worker has touched the models, waits for memory to settle and reports:
+#
+#   uvicorn           uvicorn --workers N  (spawned workers, each loads its own copy)
+#   gunicorn          gunicorn.conf.py with PRELOAD_MODELS=0  (forked, each loads its own)
+#   gunicorn-preload  gunicorn.conf.py with PRELOAD_MODELS=1  (loaded once in the master)
+#
+#   cd backend
+#   python -m benchmarks.memory --app-dir /srv/healthmate --workers 4
+#   python -m benchmarks.memory --setups gunicorn-preload --json mem.json
+#   python -m benchmarks.memory --pid 12345       # a server that is already running (its master pid)
+#
+# Linux only. USS is what one more worker costs; the sum of PSS over the
+# master and its workers is the whole server's real footprint.
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import importlib.util
+import subprocess
+
+import httpx
+
+from app.memory import memory_summary, child_pids
+from benchmarks.loadtest import _free_port
+from benchmarks.startup import APP_ENV, PREDICT_BODY
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SETUPS = ["uvicorn", "gunicorn", "gunicorn-preload"]
+
+SYMPTOM_BODY = {"symptoms": ["headache", "nausea", "fatigue"]}
+
+
+def _command(setup: str, port: int, workers: int) -> tuple[list[str], dict]:
+    if setup == "uvicorn":
+        return ([sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+                 "--workers", str(workers), "--log-level", "warning", "--no-access-log"], {})
+    return ([sys.executable, "-m", "gunicorn", "-c", os.path.join(BACKEND_DIR, "gunicorn.conf.py"), "app.main:app"],
+            {"BIND": f"127.0.0.1:{port}", "WEB_CONCURRENCY": str(workers),
+             "PRELOAD_MODELS": "1" if setup == "gunicorn-preload" else "0"})
+
+
+def _settle(pids: list[int], timeout: float, tolerance: float = 0.01):
+    """Wait until no process's RSS moves by more than `tolerance` between two samples."""
+    deadline = time.monotonic() + timeout
+    last = None
+    while time.monotonic() < deadline:
+        now = [(memory_summary(p) or {}).get("rss", 0) for p in pids]
+        if last is not None and all(abs(a - b) <= tolerance * max(b, 1) for a, b in zip(now, last)):
+            return
+        last = now
+        time.sleep(0.5)
+
+
+def _role(pid: int) -> str:
+    # uvicorn --workers also starts multiprocessing's resource tracker
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            cmdline = f.read()
+    except OSError:
+        return "worker"
+    return "helper" if b"resource_tracker" in cmdline else "worker"
+
+
+def snapshot(master: int) -> dict:
+    processes = []
+    for role, pid in [("master", master)] + [(_role(p), p) for p in child_pids(master)]:
+        summary = memory_summary(pid)
+        if summary is not None:
+            processes.append({"role": role, "pid": pid, **summary})
+    workers = [p for p in processes if p["role"] == "worker"]
+    return {
+        "processes": processes,
+        "workers":   len(workers),
+        "total_pss": sum(p["pss"] for p in processes),
+        "total_rss": sum(p["rss"] for p in processes),
+        "worker_uss_mean":    sum(p["uss"] for p in workers) // max(len(workers), 1),
+        "worker_shared_mean": sum(p["shared"] for p in workers) // max(len(workers), 1),
+    }
+
+
+def measure_setup(setup: str, app_dir: str, workers: int, requests: int, timeout: float) -> dict:
+    port = _free_port()
+    cmd, extra_env = _command(setup, port, workers)
+    env = dict(os.environ, **APP_ENV, **extra_env)
+    log = tempfile.TemporaryFile()
+    proc = subprocess.Popen(cmd, cwd=app_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            deadline = time.monotonic() + timeout
+            while True:
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    log.seek(0)
+                    raise RuntimeError(f"{setup} did not become ready:\n{log.read().decode()[-2000:]}")
+                try:
+                    if client.get("/ready").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.2)
+
+            # New connections each time so the kernel spreads them over the workers
+            for i in range(requests):
+                client.post("/api1/predict-risk", json=PREDICT_BODY, headers={"Connection": "close"})
+                client.post("/api/predict", json=SYMPTOM_BODY, headers={"Connection": "close"})
+
+        _settle([proc.pid] + child_pids(proc.pid), timeout)
+        return snapshot(proc.pid)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        log.close()
+
+
+# ── Report ────────────────────────────────────────────────────────────────────
+def _mb(n: int) -> str:
+    return f"{n / 1024 / 1024:.1f}"
+
+
+def print_snapshot(name: str, snap: dict):
+    print(f"\n{name}")
+    print(f"  {'process':<16}{'rss MB':>10}{'pss MB':>10}{'uss MB':>10}{'shared MB':>11}")
+    for p in snap["processes"]:
+        print(f"  {p['role'] + ' ' + str(p['pid']):<16}{_mb(p['rss']):>10}{_mb(p['pss']):>10}"
+              f"{_mb(p['uss']):>10}{_mb(p['shared']):>11}")
+    print(f"  {snap['workers']} workers: total PSS {_mb(snap['total_pss'])} MB (RSS sum {_mb(snap['total_rss'])} MB), "
+          f"each extra worker ≈ {_mb(snap['worker_uss_mean'])} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-worker unique vs shared memory")
+    parser.add_argument("--app-dir", default=BACKEND_DIR, help="working directory of the API (holds models/)")
+    parser.add_argument("--setups", default=",".join(SETUPS), help=f"comma-separated subset of {SETUPS}")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=20, help="predict + symptom requests before sampling")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--pid", type=int, help="report an already-running server (master pid) instead")
+    parser.add_argument("--json", help="write the report to this path")
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        sys.exit("❌ /proc/<pid>/smaps_rollup is not available (Linux 4.14+ only)")
+
+    report = {}
+    if args.pid:
+        report[f"pid {args.pid}"] = snapshot(args.pid)
+    else:
+        for setup in args.setups.split(","):
+            if setup.startswith("gunicorn") and importlib.util.find_spec("gunicorn") is None:
+                print(f"⚠️  Skipping {setup}: gunicorn is not installed")
+                continue
+            report[setup] = measure_setup(setup, os.path.abspath(args.app_dir), args.workers,
+                                          args.requests, args.timeout)
+
+    for name, snap in report.items():
+        print_snapshot(name, snap)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\n📝 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
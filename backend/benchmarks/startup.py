@@ -0,0 +1,231 @@
+# File: startup.py
+#
+# Cold-start benchmark. Two measurements, each repeated --runs times in fresh
+# processes (median reported):
+#
+#   imports   `python -X importtime -c "import app.main"` — cumulative import
+#             time of every app.* module and the heaviest third-party packages
+#   serve     launch the API under uvicorn per STARTUP_MODE and time, from
+#             process spawn: first HTTP response, first successful
+#             POST /api1/predict-risk, and /ready turning 200
+#             (plus the server's own per-step warm-up times)
+#
+#   cd backend
+#   python -m benchmarks.startup --app-dir /srv/healthmate       # where models/ lives
+#   python -m benchmarks.startup --modes background --runs 5
+#   python -m benchmarks.startup --history benchmarks/startup_history.jsonl
+#   python -m benchmarks.startup --budget 3.0                    # exit 1 if first predict takes longer
+#
+# --history appends one JSON line per run (git rev, machine, results) so the
+# numbers can be tracked across commits.
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import platform
+import statistics
+import subprocess
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.loadtest import _free_port
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PREDICT_BODY = {"features": {"Hemoglobin": "11.2 g/dL", "Glucose": "148 mg/dL", "Age": "52", "Sex": "Female"}}
+
+# Enough config for app.main to import; upstreams point at a closed port
+# because nothing here should reach them
+APP_ENV = {
+    "PYTHONPATH":          BACKEND_DIR,
+    "OPENROUTER_API_KEY":  "startup-bench",
+    "OPENROUTER_BASE_URL": "http://127.0.0.1:9/api/v1",
+    "SUPABASE_URL":        "http://127.0.0.1:9",
+    "SUPABASE_PROJECT_ID": "startup-bench",
+    "SUPABASE_ANON_KEY":   "startup-bench",
+    "SUPABASE_SERVICE_ROLE_KEY": "startup-bench",
+    "SUPABASE_JWT_ISSUER": "http://127.0.0.1:9/auth/v1",
+}
+
+
+# ── Import time ───────────────────────────────────────────────────────────────
+def import_times(app_dir: str, env: dict) -> dict[str, float]:
+    """Cumulative import time (ms) per module for one fresh `import app.main`."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                          cwd=app_dir, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import app.main failed:\n{proc.stderr[-2000:]}")
+    # Children are printed before their parent; a depth-0 line closes a tree.
+    # Only the trees of `app` and `app.main` count — not interpreter start-up.
+    times, subtree = {}, []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header row
+        depth = (len(name.rstrip()) - len(name.strip()) - 1) // 2
+        subtree.append((name.strip(), int(cumulative) / 1000))
+        if depth > 0:
+            continue
+        if subtree[-1][0] in ("app", "app.main"):
+            # app.* modules, plus everything else by top-level package
+            for module, ms in subtree:
+                if module.startswith("app") or "." not in module:
+                    times[module] = max(times.get(module, 0.0), ms)
+        subtree = []
+    return times
+
+
+def measure_imports(app_dir: str, env: dict, runs: int, top: int) -> dict:
+    samples = [import_times(app_dir, env) for _ in range(runs)]
+    names = set().union(*samples)
+    median = {n: round(statistics.median(s.get(n, 0.0) for s in samples), 1) for n in names}
+    app_modules = {n: v for n, v in median.items() if n.startswith("app")}
+    third_party = dict(sorted(((n, v) for n, v in median.items() if not n.startswith("app")),
+                              key=lambda kv: -kv[1])[:top])
+    return {"total_ms": median.get("app.main"), "app": dict(sorted(app_modules.items(), key=lambda kv: -kv[1])),
+            "third_party": third_party}
+
+
+# ── Time to first prediction ──────────────────────────────────────────────────
+def serve_once(app_dir: str, env: dict, timeout: float) -> dict:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+           "--log-level", "warning", "--no-access-log"]
+
+    log = tempfile.TemporaryFile()
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=app_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    result = {"first_response_s": None, "first_predict_s": None, "ready_s": None, "warmup": None}
+    try:
+        with httpx.Client(base_url=base, timeout=10) as client:
+            deadline = start + timeout
+            while time.perf_counter() < deadline:
+                if proc.poll() is not None:
+                    log.seek(0)
+                    raise RuntimeError(f"API exited during startup:\n{log.read().decode()[-2000:]}")
+                try:
+                    if result["first_predict_s"] is None:
+                        r = client.post("/api1/predict-risk", json=PREDICT_BODY)
+                        result["first_response_s"] = result["first_response_s"] or time.perf_counter() - start
+                        if r.status_code == 200:
+                            result["first_predict_s"] = time.perf_counter() - start
+                    r = client.get("/ready")
+                    if r.status_code == 200:
+                        result["ready_s"] = time.perf_counter() - start
+                        result["warmup"] = r.json()
+                        if result["first_predict_s"] is not None:
+                            break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+            else:
+                raise RuntimeError(f"API not serving predictions after {timeout:.0f}s")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        log.close()
+    return result
+
+
+def measure_serve(app_dir: str, env: dict, mode: str, runs: int, timeout: float) -> dict:
+    samples = [serve_once(app_dir, dict(env, STARTUP_MODE=mode), timeout) for _ in range(runs)]
+
+    def med(key):
+        return round(statistics.median(s[key] for s in samples), 3)
+
+    steps = {}
+    for name in samples[-1]["warmup"]["steps"]:
+        values = [s["warmup"]["steps"][name]["ms"] for s in samples if s["warmup"]["steps"][name]["ms"] is not None]
+        steps[name] = round(statistics.median(values), 1) if values else None
+    return {"first_response_s": med("first_response_s"), "first_predict_s": med("first_predict_s"),
+            "ready_s": med("ready_s"), "warmup_steps_ms": steps}
+
+
+# ── Report ────────────────────────────────────────────────────────────────────
+def environment() -> dict:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                             capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        rev = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_rev":   rev,
+        "python":    platform.python_version(),
+        "machine":   platform.machine(),
+        "platform":  platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def print_report(report: dict):
+    imports = report["imports"]
+    print(f"\nimport app.main: {imports['total_ms']:.0f} ms (median of {report['runs']})")
+    print(f"  {'app module':<28}{'ms':>8}")
+    for name, ms in imports["app"].items():
+        print(f"  {name:<28}{ms:>8.1f}")
+    print(f"  {'heaviest third-party':<28}{'ms':>8}")
+    for name, ms in imports["third_party"].items():
+        print(f"  {name:<28}{ms:>8.1f}")
+
+    print(f"\n{'mode':<12}{'first response':>16}{'first predict':>15}{'ready':>9}")
+    for mode, r in report["serve"].items():
+        print(f"{mode:<12}{r['first_response_s']:>15.2f}s{r['first_predict_s']:>14.2f}s{r['ready_s']:>8.2f}s")
+    for mode, r in report["serve"].items():
+        steps = ", ".join(f"{n} {ms:.0f} ms" for n, ms in r["warmup_steps_ms"].items() if ms is not None)
+        print(f"  {mode} warm-up: {steps}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and time-to-first-prediction benchmark")
+    parser.add_argument("--app-dir", default=BACKEND_DIR, help="working directory of the API (holds models/)")
+    parser.add_argument("--modes", default="eager,background", help="STARTUP_MODE values to launch")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="third-party packages to list")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--json", help="write the report to this path")
+    parser.add_argument("--history", help="append the report as one JSON line to this file")
+    parser.add_argument("--budget", type=float, help="exit 1 if first predict (any mode) takes longer (s)")
+    args = parser.parse_args()
+    app_dir = os.path.abspath(args.app_dir)
+    env = dict(os.environ, **APP_ENV)
+
+    report = {
+        "environment": environment(),
+        "runs":        args.runs,
+        "imports":     measure_imports(app_dir, env, args.runs, args.top),
+        "serve":       {mode: measure_serve(app_dir, env, mode, args.runs, args.timeout)
+                        for mode in args.modes.split(",")},
+    }
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\n📝 Report written to {args.json}")
+    if args.history:
+        with open(args.history, "a") as f:
+            f.write(json.dumps(report) + "\n")
+        print(f"📈 Appended to {args.history}")
+
+    if args.budget is not None:
+        slow = [m for m, r in report["serve"].items() if r["first_predict_s"] > args.budget]
+        if slow:
+            print(f"\n❌ First prediction slower than {args.budget:.1f}s in: {', '.join(slow)}")
+            sys.exit(1)
+        print(f"\n✅ First prediction within {args.budget:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+# File: suite.py
+#
+# Benchmark suite for the prediction + normalization hot paths, with a
+# baseline gate. Each case times one stage over a fixed, seeded workload
+# (benchmarks/corpus.py) and reports per-item latency (p50/p95 over rounds)
+# and throughput:
+#
+#   clean_numeric            raw value strings from OCR-shaped payloads
+#   normalize_input_data     OCR-shaped payloads of 10/30/100 keys, caches cold and warm
+#   run_prediction_for_all_models   one dataset row at a time
+#   run_prediction_batch     dataset rows in batches of 1/10/100/1000
+#   process_report_batch     normalize + predict, batches of 10/100
+#   process_report_data      one OCR-shaped report (what resubmitting an edited report costs)
+#   apply_report_delta       one edited field on a scored report (/predict-risk/delta)
+#   symptom.predict_batch    batches of 1/10/100 (skipped if models/symbipredict_model.joblib is missing)
+#
+#   cd backend
+#   python -m benchmarks.suite                                  # run, compare against baseline.json
+#   python -m benchmarks.suite --json out.json                  # also write machine-readable results
+#   python -m benchmarks.suite --only normalize --threshold 0.5
+#   python -m benchmarks.suite --save-baseline                  # record this machine's numbers
+#
+# Exit status is 1 if any case's p50 is slower than the baseline by more than
+# --threshold (default 25%). Baselines are per machine — re-record after
+# moving hosts rather than loosening the threshold.
+
+import gc
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app import prediction_api1 as p1
+from app import symptom
+from benchmarks.corpus import ocr_corpus, dataset_payloads
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+PAYLOAD_SIZES = [10, 30, 100]
+PREDICT_BATCH_SIZES = [1, 10, 100, 1000]
+PIPELINE_BATCH_SIZES = [10, 100]
+SYMPTOM_BATCH_SIZES = [1, 10, 100]
+
+
+# ── Timing ────────────────────────────────────────────────────────────────────
+def _clear_normalization_caches():
+    p1.resolve_key.cache_clear()
+    p1._clean_numeric_cached.cache_clear()
+
+
+def measure(run, items: int, min_time: float, setup=None, min_rounds: int = 10, max_rounds: int = 300) -> dict:
+    """
+    Times `run()` (which processes `items` inputs) over several rounds.
+    `setup()` runs before every round, outside the timed region. GC is
+    paused while timing (as timeit does) so collections don't land on
+    whichever case happens to trigger them.
+    """
+    def one_round() -> float:
+        if setup:
+            setup()
+        t = time.perf_counter()
+        run()
+        return time.perf_counter() - t
+
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        first = one_round()  # warm-up, also sizes the round count
+        rounds = int(min(max_rounds, max(min_rounds, min_time / max(first, 1e-9))))
+        times = np.array([one_round() for _ in range(rounds)])
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    per_item = times / items * 1e6
+    return {
+        "items":          items,
+        "rounds":         rounds,
+        "p50_us":         round(float(np.median(per_item)), 3),
+        "p95_us":         round(float(np.percentile(per_item, 95)), 3),
+        "min_us":         round(float(per_item.min()), 3),
+        "throughput_per_s": round(items / float(np.median(times)), 1),
+    }
+
+
+# ── Cases ─────────────────────────────────────────────────────────────────────
+def build_cases() -> list[tuple]:
+    """(case_id, run, items, setup) tuples; workloads are built here, not timed."""
+    cases = []
+
+    # clean_numeric over every value in a mixed OCR corpus (uncached function)
+    values = [v for payload in ocr_corpus(200, 30) for v in payload.values()]
+    cases.append(("clean_numeric", lambda: [p1.clean_numeric(v) for v in values], len(values), None))
+
+    # normalize_input_data: cold = fresh LRUs each round, warm = steady-state server
+    for size in PAYLOAD_SIZES:
+        payloads = ocr_corpus(200, size)
+        run = lambda payloads=payloads: [p1.normalize_input_data(p) for p in payloads]
+        cases.append((f"normalize_input_data/keys={size}/cold", run, len(payloads), _clear_normalization_caches))
+        cases.append((f"normalize_input_data/keys={size}/warm", run, len(payloads), None))
+
+    # Model stage on dataset rows (every disease's rows, so each model runs on its own inputs)
+    rows = [p1.normalize_input_data(r) for r in dataset_payloads()]
+    rng = random.Random(0)
+    rng.shuffle(rows)
+
+    singles = rows[:50]
+    cases.append(("run_prediction_for_all_models",
+                  lambda: [p1.run_prediction_for_all_models(r) for r in singles], len(singles), None))
+
+    for n in PREDICT_BATCH_SIZES:
+        batch = [rows[i % len(rows)] for i in range(n)]
+        cases.append((f"run_prediction_batch/n={n}", lambda batch=batch: p1.run_prediction_batch(batch), n, None))
+
+    raw = dataset_payloads()
+    for n in PIPELINE_BATCH_SIZES:
+        batch = [raw[i % len(raw)] for i in range(n)]
+        cases.append((f"process_report_batch/n={n}", lambda batch=batch: p1.process_report_batch(batch), n, None))
+
+    cases.extend(edit_cases())
+    cases.extend(symptom_cases())
+    return cases
+
+
+def edit_cases() -> list[tuple]:
+    # The same single-value edits, as a full resubmit and as a delta on a stored session
+    rng = random.Random(0)
+    edits = []
+    for raw in ocr_corpus(100, 30):
+        normalized, predictions = p1.score_report(raw)
+        key = rng.choice([k for k in raw if p1.resolve_key(k)] or list(raw))
+        changes = {key: f"{rng.uniform(1, 200):.1f}"}
+        edits.append((raw, normalized, predictions, changes, {**raw, **changes}))
+
+    return [
+        ("process_report_data/edit=1",
+         lambda: [p1.process_report_data(edited) for *_, edited in edits], len(edits), None),
+        ("apply_report_delta/edit=1",
+         lambda: [p1.apply_report_delta(raw, n, p, c) for raw, n, p, c, _ in edits], len(edits), None),
+    ]
+
+
+def symptom_cases() -> list[tuple]:
+    # MODEL_PATH is relative, like in the server: run from the directory holding models/
+    try:
+        symptom.load_artifacts()
+    except Exception as e:
+        print(f"⚠️  Skipping symptom cases: {e}")
+        return []
+
+    names = list(symptom.feature_index)
+    rng = random.Random(0)
+    cases = []
+    for n in SYMPTOM_BATCH_SIZES:
+        batch = [rng.sample(names, rng.randint(2, 8)) for _ in range(n)]
+        cases.append((f"symptom.predict_batch/n={n}",
+                      lambda batch=batch: symptom.predict_batch(batch, 3), n, None))
+    return cases
+
+
+# ── Baseline comparison ───────────────────────────────────────────────────────
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Case ids whose p50 regressed beyond the threshold."""
+    regressions = []
+    print(f"\n{'case':<44}{'baseline µs':>13}{'now µs':>11}{'change':>9}")
+    for case_id, now in results.items():
+        base = baseline.get(case_id)
+        if base is None:
+            print(f"{case_id:<44}{'—':>13}{now['p50_us']:>11.1f}{'new':>9}")
+            continue
+        change = now["p50_us"] / base["p50_us"] - 1.0
+        flag = ""
+        if change > threshold:
+            regressions.append(case_id)
+            flag = "  ❌"
+        print(f"{case_id:<44}{base['p50_us']:>13.1f}{now['p50_us']:>11.1f}{change:>+8.0%}{flag}")
+    for case_id in baseline:
+        if case_id not in results:
+            print(f"{case_id:<44}{'(not run)':>13}")
+    return regressions
+
+
+def environment() -> dict:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                             capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        rev = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_rev":   rev,
+        "python":    platform.python_version(),
+        "numpy":     np.__version__,
+        "machine":   platform.machine(),
+        "platform":  platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "model_runtime": {name: entry.runtime for name, entry in p1.registry.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prediction / normalization benchmark suite")
+    parser.add_argument("--only", help="run cases whose id contains this substring")
+    parser.add_argument("--min-time", type=float, default=0.3, help="seconds of timed rounds per case")
+    parser.add_argument("--json", help="write results to this path")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed p50 slowdown (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="write results to --baseline and exit 0")
+    args = parser.parse_args()
+
+    cases = build_cases()
+    if args.only:
+        cases = [c for c in cases if args.only in c[0]]
+
+    results = {}
+    print(f"{'case':<44}{'p50 µs':>10}{'p95 µs':>10}{'items/s':>12}")
+    for case_id, run, items, setup in cases:
+        r = measure(run, items, args.min_time, setup)
+        results[case_id] = r
+        print(f"{case_id:<44}{r['p50_us']:>10.1f}{r['p95_us']:>10.1f}{r['throughput_per_s']:>12,.0f}")
+
+    report = {"environment": environment(), "threshold": args.threshold, "results": results}
+
+    if args.save_baseline:
+        report.pop("threshold")
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\n💾 Baseline saved to {os.path.relpath(args.baseline)}")
+        return
+
+    regressions = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+        report["baseline_environment"] = baseline.get("environment")
+    else:
+        print(f"\n⚠️  No baseline at {os.path.relpath(args.baseline)} — run with --save-baseline first")
+    report["regressions"] = regressions
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\n📝 Results written to {args.json}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# File: gunicorn.conf.py
+#
+# Pre-fork serving with the ML artifacts loaded once, in the master.
+# With PRELOAD_MODELS=1 (default) the master imports app.main, runs the
+# blocking warm-up steps (disease models, symptom model, heavy imports),
+# freezes the GC and only then forks the workers. Every worker shares those
+# pages copy-on-write instead of unpickling its own copy.
+#
+#   cd backend
+#   gunicorn -c gunicorn.conf.py app.main:app
+#   WEB_CONCURRENCY=8 gunicorn -c gunicorn.conf.py app.main:app   # sticky routing only, see below
+#   python -m benchmarks.memory              # per-worker unique vs shared memory
+#
+# `uvicorn --workers N` can't do this: it starts workers with multiprocessing
+# "spawn", so each one imports and loads everything again.
+#
+# The default is ONE worker, and with one worker the sharing above saves
+# nothing — there is no sibling to share pages with. Several pieces of state
+# are still per process: report jobs (/upload-image/?mode=job, then
+# /jobs/{id}), report sessions (/api1/predict-risk/delta), the chat history
+# cache and the /metrics counters. Until those move to a shared store, the
+# memory saving only applies behind a proxy with sticky routing (per user /
+# per client) and WEB_CONCURRENCY raised to match. A job polled on the wrong
+# worker answers 404 "held by another server worker".
+
+import os
+import gc
+
+bind         = os.getenv("BIND", "0.0.0.0:8000")
+workers      = int(os.getenv("WEB_CONCURRENCY", "1"))   # see above before raising
+worker_class = "uvicorn_worker.UvicornWorker"           # uvicorn.workers is deprecated
+timeout      = int(os.getenv("GUNICORN_TIMEOUT", "120"))   # OCR races can run long
+preload_app  = os.getenv("PRELOAD_MODELS", "1") not in ("0", "false", "False")
+
+
+def when_ready(server):
+    """Master, after the app import and before the first fork."""
+    if not preload_app:
+        return
+    from app.warmup import warmup
+    warmup.preload()
+    if not warmup.ready:
+        server.log.error("Preload failed: %s", warmup.status()["steps"])
+    # Move everything loaded so far out of the collector's reach: a GC pass in
+    # a worker would otherwise write to every object header and un-share the
+    # pages holding them
+    gc.freeze()
+    server.log.info("Models preloaded in master (%d objects frozen)", gc.get_freeze_count())
@@ -24,7 +24,9 @@ interface DiseaseResult extends Prediction {
 
 interface ApiResult {
   message: string;
+  report_id?: string;
   extracted_data: Record<string, string | number>;
+  changes?: Record<string, string | number>;
   predictions?: Record<string, Prediction>;
 }
 
@@ -127,11 +129,25 @@ export default function ReportResult() {
       // Grab the extraction dataset confirmed by the user in RiskPredictor.tsx
       const editableData = resultData.extracted_data;
 
-      const res = await fetch(`${API_BASE_URL}/api1/predict-risk`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json", Authorization: `Bearer ${session.access_token}` },
-        body: JSON.stringify({ features: editableData }),
-      });
+      const headers = { "Content-Type": "application/json", Authorization: `Bearer ${session.access_token}` };
+
+      // Send only the corrected values when the server still holds this report;
+      // re-send everything if it doesn't (404: expired, or another server instance)
+      let res: Response | null = null;
+      if (resultData.report_id && resultData.changes) {
+        res = await fetch(`${API_BASE_URL}/api1/predict-risk/delta`, {
+          method: "POST",
+          headers,
+          body: JSON.stringify({ report_id: resultData.report_id, changes: resultData.changes }),
+        });
+      }
+      if (!res || res.status === 404) {
+        res = await fetch(`${API_BASE_URL}/api1/predict-risk`, {
+          method: "POST",
+          headers,
+          body: JSON.stringify({ features: editableData }),
+        });
+      }
 
       const data = await res.json();
       if (!res.ok) throw new Error(data.detail || "Analysis failed");
@@ -156,9 +156,15 @@ export default function RiskPredictor() {
     if (!fullApiResult) return;
     setIsAnalyzing(true);
 
+    // Only the values the user corrected — the backend kept the rest under report_id
+    const changes = Object.fromEntries(
+      Object.entries(extractedData).filter(([k, v]) => fullApiResult.extracted_data?.[k] !== v)
+    );
+
     const updatedResult = {
       ...fullApiResult,
-      extracted_data: extractedData
+      extracted_data: extractedData,
+      changes,
     };
 
     sessionStorage.setItem("healthmate_report_result", JSON.stringify(updatedResult));